@@ -0,0 +1,457 @@
+"""
+Benchmark suite of py_secure_shell_automator, run against an in-process SSH and SFTP server.
+
+Usage: `python -m benchmarks.run_benchmarks --output results.json [--quick] [--only run_cmd sftp] [--baseline previous.json]
+[--transport-profile lan-bulk]`
+
+Every benchmark writes its measures to a single JSON document, along with the versions of the library,
+paramiko and Python, so the results of two releases can be compared. Durations are in milliseconds.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+import paramiko
+import py_secure_shell_automator
+from py_secure_shell_automator import PySecureShellAutomator
+from py_secure_shell_automator.base_ssh import TRANSPORT_PROFILES
+from .ssh_server import LocalSSHServer
+
+
+@dataclass
+class BenchmarkContext:
+    """
+    What every benchmark receives.
+
+    Attributes:
+        server (LocalSSHServer): The running server.
+        work_dir (str): Temporary directory for the files of the benchmarks, removed at the end.
+        quick (bool): Whether to run fewer iterations and smaller payloads, for a smoke run.
+        transport_profile (str): Transport profile of the connections.
+    """
+
+    server: LocalSSHServer
+    work_dir: str
+    quick: bool
+    transport_profile: str = "default"
+
+    def connect(self, **kwargs) -> PySecureShellAutomator:
+        """
+        Open a connection to the server.
+
+        Args:
+            **kwargs: Other attributes of PySecureShellAutomator.
+
+        Returns:
+            PySecureShellAutomator: The connected object.
+        """
+        return PySecureShellAutomator(
+            host=self.server.host,
+            port=self.server.port,
+            username="benchmark",
+            password="benchmark",
+            transport_profile=self.transport_profile,
+            **kwargs,
+        )
+
+    def iterations(self, full: int, quick: int) -> int:
+        """
+        Number of iterations of a measure, depending on `quick`.
+        """
+        return quick if self.quick else full
+
+
+BENCHMARKS: dict[str, Callable[[BenchmarkContext], dict]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """
+    Decorator registering a benchmark under the given name.
+
+    Args:
+        name (str): Name of the benchmark, key of its results in the JSON document.
+    """
+
+    def register(function: Callable[[BenchmarkContext], dict]) -> Callable:
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """
+    Summarize durations, in seconds, as statistics in milliseconds.
+
+    Args:
+        samples (list[float]): Durations in seconds.
+
+    Returns:
+        dict[str, float]: Number of samples, mean, median, 95th percentile, min and max.
+    """
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "min_ms": ordered[0] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def timed(function: Callable, *args, **kwargs) -> float:
+    """
+    Run a function and return how long it took, in seconds.
+    """
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+@benchmark("connect")
+def bench_connect(ctx: BenchmarkContext) -> dict:
+    samples = []
+    for _ in range(ctx.iterations(20, 3)):
+        start = time.perf_counter()
+        py_ssh = ctx.connect()
+        samples.append(time.perf_counter() - start)
+        py_ssh.close()
+    return summarize(samples)
+
+
+@benchmark("run_cmd")
+def bench_run_cmd(ctx: BenchmarkContext) -> dict:
+    py_ssh = ctx.connect()
+    iterations = ctx.iterations(200, 20)
+    try:
+        py_ssh.run_cmd("true")  # Warm up
+        latency = [timed(py_ssh.run_cmd, "true") for _ in range(iterations)]
+
+        with py_ssh.shell_session():
+            py_ssh.run_cmd("true")
+            shell_session_latency = [
+                timed(py_ssh.run_cmd, "true") for _ in range(iterations)
+            ]
+
+        start = time.perf_counter()
+        py_ssh.run_cmds_concurrently(["true"] * iterations)
+        concurrent_duration = time.perf_counter() - start
+
+        output_size = 1024 * 1024 * ctx.iterations(16, 1)
+        large_output = timed(
+            py_ssh.run_cmd, f"head -c {output_size} /dev/zero | tr '\\0' 'x'"
+        )
+    finally:
+        py_ssh.close()
+
+    return {
+        "latency": summarize(latency),
+        "throughput_cmds_per_s": iterations / sum(latency),
+        "shell_session_latency": summarize(shell_session_latency),
+        "concurrent_throughput_cmds_per_s": iterations / concurrent_duration,
+        "large_output_mb_per_s": output_size / large_output / 1e6,
+    }
+
+
+@benchmark("sftp")
+def bench_sftp(ctx: BenchmarkContext) -> dict:
+    sizes = [64 * 1024, 1024 * 1024]
+    if not ctx.quick:
+        sizes += [16 * 1024 * 1024, 64 * 1024 * 1024]
+    py_ssh = ctx.connect(sftp=True)
+    results = {}
+    try:
+        for size in sizes:
+            local_path = os.path.join(ctx.work_dir, f"sftp_{size}.bin")
+            remote_path = os.path.join(ctx.work_dir, f"sftp_{size}.remote")
+            copy_path = os.path.join(ctx.work_dir, f"sftp_{size}.copy")
+            with open(local_path, "wb") as f:
+                f.write(os.urandom(size))
+
+            iterations = range(ctx.iterations(3, 1))
+            put = [
+                timed(py_ssh.copy_file_to_remote, local_path, remote_path)
+                for _ in iterations
+            ]
+            get = [
+                timed(py_ssh.copy_file_from_remote, remote_path, copy_path)
+                for _ in iterations
+            ]
+            results[str(size)] = {
+                "put_mb_per_s": size / statistics.median(put) / 1e6,
+                "get_mb_per_s": size / statistics.median(get) / 1e6,
+            }
+            for path in (local_path, remote_path, copy_path):
+                os.remove(path)
+    finally:
+        py_ssh.close()
+    return results
+
+
+@benchmark("sftp_parallel")
+def bench_sftp_parallel(ctx: BenchmarkContext) -> dict:
+    size = (8 if ctx.quick else 256) * 1024 * 1024
+    modes = {
+        "single": {},
+        "parallel_4": {"parallelism": 4},
+        "parallel_4_verify": {"parallelism": 4, "verify": True},
+        "parallel_8_2_connections": {"parallelism": 8, "connections": 2},
+    }
+    local_path = os.path.join(ctx.work_dir, "sftp_parallel.bin")
+    remote_path = os.path.join(ctx.work_dir, "sftp_parallel.remote")
+    copy_path = os.path.join(ctx.work_dir, "sftp_parallel.copy")
+    with open(local_path, "wb") as f:
+        for _ in range(size // (1024 * 1024)):
+            f.write(os.urandom(1024 * 1024))
+
+    py_ssh = ctx.connect(sftp=True)
+    results = {}
+    try:
+        for mode, options in modes.items():
+            # Ranges of 1/16 of the file, so every session gets several of them
+            options = {"chunk_size": size // 16, **options}
+            iterations = range(ctx.iterations(3, 1))
+            put = [
+                timed(py_ssh.copy_file_to_remote, local_path, remote_path, **options)
+                for _ in iterations
+            ]
+            get = [
+                timed(py_ssh.copy_file_from_remote, remote_path, copy_path, **options)
+                for _ in iterations
+            ]
+            results[mode] = {
+                "put_mb_per_s": size / statistics.median(put) / 1e6,
+                "get_mb_per_s": size / statistics.median(get) / 1e6,
+            }
+    finally:
+        py_ssh.close()
+        for path in (local_path, remote_path, copy_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return results
+
+
+@benchmark("tree_transfer")
+def bench_tree_transfer(ctx: BenchmarkContext) -> dict:
+    dirs, files = (2, 100) if ctx.quick else (20, 100)
+    source = os.path.join(ctx.work_dir, "tree_source")
+    paths = []
+    for d in range(dirs):
+        os.makedirs(os.path.join(source, f"dir_{d}"))
+        for f in range(files):
+            paths.append(os.path.join(f"dir_{d}", f"file_{f}.js"))
+            with open(os.path.join(source, paths[-1]), "wb") as fh:
+                fh.write(os.urandom(2048))
+
+    py_ssh = ctx.connect(sftp=True)
+    count = dirs * files
+    results = {}
+    try:
+
+        def per_file(remote_dir: str) -> None:
+            for d in range(dirs):
+                py_ssh.create_directory(os.path.join(remote_dir, f"dir_{d}"))
+            for path in paths:
+                py_ssh.copy_file_to_remote(
+                    os.path.join(source, path), os.path.join(remote_dir, path)
+                )
+
+        duration = timed(per_file, os.path.join(ctx.work_dir, "per_file"))
+        results["per_file"] = {"put_files_per_s": count / duration}
+        for mode, compress in (("tar", False), ("tar_gzip", True)):
+            remote_dir = os.path.join(ctx.work_dir, f"{mode}_remote")
+            put = timed(py_ssh.upload_tree, source, remote_dir, compress=compress)
+            get = timed(
+                py_ssh.download_tree,
+                remote_dir,
+                os.path.join(ctx.work_dir, f"{mode}_copy"),
+                compress=compress,
+            )
+            results[mode] = {
+                "put_files_per_s": count / put,
+                "get_files_per_s": count / get,
+            }
+    finally:
+        py_ssh.close()
+    return results
+
+
+@benchmark("get_directory_structure")
+def bench_get_directory_structure(ctx: BenchmarkContext) -> dict:
+    shapes = [(10, 10), (100, 10)] + ([(100, 100)] if not ctx.quick else [])
+    py_ssh = ctx.connect()
+    results = {}
+    try:
+        for dirs, files in shapes:
+            root = os.path.join(ctx.work_dir, f"tree_{dirs}x{files}")
+            for d in range(dirs):
+                os.makedirs(os.path.join(root, f"dir_{d}"))
+                for f in range(files):
+                    open(os.path.join(root, f"dir_{d}", f"file_{f}.txt"), "w").close()
+
+            samples = [
+                timed(py_ssh.get_directory_structure, root)
+                for _ in range(ctx.iterations(5, 1))
+            ]
+            results[f"{dirs}x{files}"] = summarize(samples)
+            shutil.rmtree(root)
+    finally:
+        py_ssh.close()
+    return results
+
+
+@benchmark("fan_out")
+def bench_fan_out(ctx: BenchmarkContext) -> dict:
+    cmds_per_connection = ctx.iterations(20, 5)
+    results = {}
+    for connections in [1, 4, 16] + ([64] if not ctx.quick else []):
+
+        def worker(_) -> None:
+            py_ssh = ctx.connect()
+            try:
+                for _ in range(cmds_per_connection):
+                    py_ssh.run_cmd("true")
+            finally:
+                py_ssh.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(worker, range(connections)))
+        duration = time.perf_counter() - start
+        results[str(connections)] = {
+            "duration_ms": duration * 1000,
+            "throughput_cmds_per_s": connections * cmds_per_connection / duration,
+        }
+    return results
+
+
+def run(names: list[str], quick: bool, transport_profile: str = "default") -> dict:
+    """
+    Run the benchmarks against a fresh in-process server.
+
+    Args:
+        names (list[str]): Names of the benchmarks to run.
+        quick (bool): Whether to run fewer iterations and smaller payloads.
+        transport_profile (str, optional): Transport profile of the connections. Defaults to "default".
+
+    Returns:
+        dict: The JSON document of the results.
+    """
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="py_ssh_benchmarks_")
+    try:
+        with LocalSSHServer() as server:
+            ctx = BenchmarkContext(server, work_dir, quick, transport_profile)
+            for name in names:
+                print(f"Running {name}...", flush=True)
+                results[name] = BENCHMARKS[name](ctx)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "py_secure_shell_automator": py_secure_shell_automator.__version__,
+            "paramiko": paramiko.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+            "transport_profile": transport_profile,
+        },
+        "results": results,
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """
+    Flatten nested results into dotted keys, keeping only the numeric measures.
+
+    Args:
+        results (dict): Results of the benchmarks.
+        prefix (str, optional): Prefix of the keys. Defaults to "".
+
+    Returns:
+        dict[str, float]: The measures, such as {"run_cmd.latency.median_ms": 2.1}.
+    """
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and key != "n":
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """
+    Compare the measures present in both documents.
+
+    Args:
+        baseline (dict): JSON document of a previous run.
+        current (dict): JSON document of the current run.
+
+    Returns:
+        list[str]: One line per measure, with both values and their ratio.
+    """
+    before = flatten(baseline["results"])
+    after = flatten(current["results"])
+    return [
+        f"{key}: {before[key]:.3f} -> {after[key]:.3f} (x{after[key] / before[key]:.2f})"
+        for key in sorted(before.keys() & after.keys())
+        if before[key]
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run_benchmarks",
+        description="Benchmark py_secure_shell_automator against an in-process SSH server.",
+    )
+    parser.add_argument(
+        "--output",
+        default="benchmark_results.json",
+        help="Path of the JSON results (default: benchmark_results.json)",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Fewer iterations and smaller payloads"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=sorted(BENCHMARKS),
+        default=list(BENCHMARKS),
+        help="Benchmarks to run (default: all)",
+    )
+    parser.add_argument(
+        "--baseline", help="JSON results of a previous run to compare with"
+    )
+    parser.add_argument(
+        "--transport-profile",
+        default="default",
+        choices=sorted(TRANSPORT_PROFILES),
+        help="Transport profile of the connections (default: default)",
+    )
+    args = parser.parse_args()
+
+    document = run(args.only, args.quick, args.transport_profile)
+    with open(args.output, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print("\n".join(compare(json.load(f), document)))
+
+
+if __name__ == "__main__":
+    main()
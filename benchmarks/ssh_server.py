@@ -0,0 +1,327 @@
+"""
+In-process SSH and SFTP server built on the paramiko server interfaces, used by the benchmarks.
+
+Commands are executed on the local machine with `/bin/sh` and the SFTP operations are served
+from the local filesystem, so the library can be measured end to end without any external service.
+"""
+
+import logging
+import os
+import socket
+import subprocess
+import threading
+
+from paramiko import (
+    AUTH_SUCCESSFUL,
+    OPEN_SUCCEEDED,
+    RSAKey,
+    ServerInterface,
+    SFTPAttributes,
+    SFTPHandle,
+    SFTPServer,
+    SFTPServerInterface,
+    SFTP_OK,
+    Transport,
+)
+
+# The server side logs every client disconnection as an error, keep it out of the benchmark output
+logging.getLogger("benchmarks.ssh_server").addHandler(logging.NullHandler())
+
+
+class _LocalSFTPHandle(SFTPHandle):
+    """
+    Handle of a local file opened through SFTP.
+    """
+
+    def stat(self):
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def chattr(self, attr):
+        try:
+            SFTPServer.set_file_attr(self.filename, attr)
+            return SFTP_OK
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+
+class _LocalSFTPServer(SFTPServerInterface):
+    """
+    Serves the SFTP requests from the local filesystem.
+    """
+
+    def list_folder(self, path):
+        try:
+            out = []
+            for name in os.listdir(path):
+                attr = SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)))
+                attr.filename = name
+                out.append(attr)
+            return out
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.lstat(path))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def open(self, path, flags, attr):
+        try:
+            binary_flag = getattr(os, "O_BINARY", 0)
+            flags |= binary_flag
+            mode = getattr(attr, "st_mode", None) or 0o666
+            fd = os.open(path, flags, mode)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        if (flags & os.O_CREAT) and (attr is not None):
+            attr._flags &= ~attr.FLAG_PERMISSIONS
+            SFTPServer.set_file_attr(path, attr)
+        if flags & os.O_WRONLY:
+            fstr = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            fstr = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            fstr = "rb"
+        try:
+            f = os.fdopen(fd, fstr)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        handle = _LocalSFTPHandle(flags)
+        handle.filename = path
+        handle.readfile = f
+        handle.writefile = f
+        return handle
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        try:
+            os.rename(oldpath, newpath)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def posix_rename(self, oldpath, newpath):
+        return self.rename(oldpath, newpath)
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(path)
+            if attr is not None:
+                SFTPServer.set_file_attr(path, attr)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def rmdir(self, path):
+        try:
+            os.rmdir(path)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def chattr(self, path, attr):
+        try:
+            SFTPServer.set_file_attr(path, attr)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def canonicalize(self, path):
+        return os.path.normpath(os.path.join("/", path))
+
+    def symlink(self, target_path, path):
+        try:
+            os.symlink(target_path, path)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def readlink(self, path):
+        try:
+            return os.readlink(path)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+
+class _LocalServerInterface(ServerInterface):
+    """
+    Accepts any credentials and runs the exec and shell requests as local processes.
+    """
+
+    def __init__(self, env: dict[str, str] | None) -> None:
+        self._env = env
+        self._pty_channels: set[int] = set()
+
+    def get_allowed_auths(self, username):
+        return "password,publickey"
+
+    def check_auth_password(self, username, password):
+        return AUTH_SUCCESSFUL
+
+    def check_auth_publickey(self, username, key):
+        return AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        return OPEN_SUCCEEDED
+
+    def check_channel_pty_request(
+        self, channel, term, width, height, pixelwidth, pixelheight, modes
+    ):
+        self._pty_channels.add(channel.get_id())
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        self._spawn(channel, ["/bin/sh", "-c", command.decode("utf-8")])
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self._spawn(channel, ["/bin/sh"])
+        return True
+
+    def _spawn(self, channel, argv: list[str]) -> None:
+        pty = channel.get_id() in self._pty_channels
+        threading.Thread(
+            target=_run_process, args=(channel, argv, pty, self._env), daemon=True
+        ).start()
+
+
+def _run_process(channel, argv: list[str], pty: bool, env) -> None:
+    """
+    Run a local process, pumping the channel into its stdin and its outputs into the channel.
+
+    There is no real terminal: when a PTY was requested, stderr is merged into stdout and the
+    line endings are translated, which is what the client observes from a real PTY.
+    """
+    process = subprocess.Popen(
+        argv,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT if pty else subprocess.PIPE,
+        env=env,
+    )
+
+    def pump_out(stream, send) -> None:
+        try:
+            for chunk in iter(lambda: stream.read1(32768), b""):
+                send(chunk.replace(b"\n", b"\r\n") if pty else chunk)
+        except OSError:
+            # The client closed the channel, like a SIGPIPE on a real host
+            process.kill()
+
+    def pump_in() -> None:
+        try:
+            for chunk in iter(lambda: channel.recv(32768), b""):
+                process.stdin.write(chunk)
+                process.stdin.flush()
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    pumps = [threading.Thread(target=pump_out, args=(process.stdout, channel.sendall))]
+    if not pty:
+        pumps.append(
+            threading.Thread(
+                target=pump_out, args=(process.stderr, channel.sendall_stderr)
+            )
+        )
+    for pump in pumps:
+        pump.daemon = True
+        pump.start()
+    threading.Thread(target=pump_in, daemon=True).start()
+
+    try:
+        for pump in pumps:
+            pump.join()
+        channel.send_exit_status(process.wait())
+    except Exception:
+        process.kill()
+    finally:
+        channel.close()
+
+
+class LocalSSHServer:
+    """
+    SSH server listening on localhost that accepts any credentials.
+
+    Attributes:
+        host (str): Address the server listens on. Defaults to 127.0.0.1.
+        port (int): Port the server listens on. Assigned by the OS when 0. Defaults to 0.
+        env (dict[str, str], optional): Environment of the spawned commands. Defaults to the environment of the process.
+
+    Example:
+        ```python
+        with LocalSSHServer() as server:
+            py_ssh = PySecureShellAutomator(host=server.host, port=server.port, username='user', password='password')
+        ```
+    """
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, env: dict[str, str] | None = None
+    ) -> None:
+        self.host = host
+        self._env = env
+        self._host_key = RSAKey.generate(2048)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self.port = self._sock.getsockname()[1]
+        self._transports: list[Transport] = []
+        self._stopped = threading.Event()
+
+    def __enter__(self) -> "LocalSSHServer":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Accept connections in a background thread.
+        """
+        self._sock.listen(128)
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        Stop accepting connections and close the open ones.
+        """
+        self._stopped.set()
+        self._sock.close()
+        for transport in self._transports:
+            transport.close()
+
+    def _serve(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            # Like sshd, which disables the Nagle algorithm for sessions with a PTY
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = Transport(client)
+            transport.set_log_channel("benchmarks.ssh_server")
+            transport.add_server_key(self._host_key)
+            transport.set_subsystem_handler("sftp", SFTPServer, _LocalSFTPServer)
+            transport.start_server(server=_LocalServerInterface(self._env))
+            self._transports.append(transport)
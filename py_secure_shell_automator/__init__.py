@@ -4,4 +4,12 @@ __version__ = "0.1.6"
 
 from .py_secure_shell_automator import PySecureShellAutomator
 from .base_ssh import CmdError
-from .models import Process, CmdResponse, Directory
\ No newline at end of file
+from .models import Process, CmdResponse, Directory, FileInfo, PoolStats, SSHEvent
+from .connection_pool import SSHConnectionPool
+from .broker import SSHBroker
+from .fleet import FleetExecutor, run_cmd_many
+from .async_ssh import AsyncPySecureShellAutomator
+from .profiling import profile_from_env
+
+# Opt-in profiling of the whole process, through the PY_SSH_PROFILE environment variable
+profile_from_env()
@@ -0,0 +1,3 @@
+from .async_base_ssh import AsyncBaseSSH
+from .async_cmd_stream import AsyncCmdStream
+from .async_py_secure_shell_automator import AsyncPySecureShellAutomator
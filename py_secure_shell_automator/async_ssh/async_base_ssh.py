@@ -0,0 +1,365 @@
+"""
+Provides the AsyncBaseSSH class, the asyncio counterpart of BaseSSH.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Type
+from paramiko import Channel
+from .async_cmd_stream import AsyncCmdStream
+from ..base_ssh import BaseSSH, CmdError, TransportProfile
+from ..base_ssh.output_buffer import OutputBuffer, TruncatePolicy
+from ..models import CmdResponse
+from ..py_secure_shell_automator import PySecureShellAutomator
+
+
+@dataclass
+class AsyncBaseSSH:
+    """
+    Connects to a remote host using the SSH protocol, and provides coroutines to execute commands.
+
+    Commands are started on the connection and their channels are then watched by the event loop,
+    so waiting for a remote command does not block any thread. Thousands of commands can run
+    concurrently from a single event loop.
+
+    The connection is opened on the first use, or explicitly with `connect` or `async with`.
+
+    Attributes:
+        host (str): Host to connect to the remote host.
+        username (str): Username to connect to the remote host.
+        password (str, optional): Password to connect to the remote host. Defaults to None.
+        port (int, optional): Port to connect to the remote host. Defaults to 22.
+        pkey (str, optional): Private key to connect to the remote host. Defaults to None.
+        timeout (int, optional): Timeout to connect to the remote host. Defaults to 10.
+        auth_timeout (int, optional): Authentication timeout to connect to the remote host. Defaults to 10.
+        auto_add_policy (bool, optional): Whether to add the host to the known hosts. Defaults to True.
+        sftp (bool, optional): Whether to use the SFTP protocol to connect to the remote host. Defaults to False.
+        keepalive_interval (int, optional): Seconds between keepalive packets sent on an idle connection. If 0, no keepalive is sent. Defaults to 0.
+        max_reconnect_attempts (int, optional): Attempts to reconnect when the connection is found dead before a command. Defaults to 3.
+        reconnect_backoff (float, optional): Seconds to wait after the first failed reconnection attempt, doubled after every further failure. Defaults to 1.0.
+        transport_profile (str | TransportProfile, optional): Tuning of the SSH transport, the name of a predefined profile or a `TransportProfile`. Defaults to "default".
+
+    Example:
+        ```python
+        import asyncio
+        from py_secure_shell_automator import AsyncPySecureShellAutomator
+
+        async def main():
+            async with AsyncPySecureShellAutomator(host='hostname', username='admin', password='admin_pass') as py_ssh:
+                cmd_response = await py_ssh.run_cmd(cmd='whoami')
+                print(cmd_response.out)  # Output: 'admin'
+
+        asyncio.run(main())
+        ```
+    """
+
+    host: str
+    username: str
+    password: str | None = None
+    port: int = 22
+    pkey: str | None = None
+    timeout: int = 10
+    auth_timeout: int = 10
+    auto_add_policy: bool = True
+    sftp: bool = False
+    keepalive_interval: int = 0
+    max_reconnect_attempts: int = 3
+    reconnect_backoff: float = 1.0
+    transport_profile: str | TransportProfile = "default"
+
+    def __post_init__(self) -> None:
+        """
+        Create the lock that serializes the connection. The connection itself is opened on first use.
+        """
+        self._sync: PySecureShellAutomator | None = None
+        self._connect_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncBaseSSH":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    @property
+    def hostname(self) -> Awaitable[str]:
+        """
+        Returns the hostname of the remote host. Must be awaited.
+
+        Returns:
+            Awaitable[str]: The hostname of the remote host.
+
+        Example:
+            >>> hostname = await py_ssh.hostname
+        """
+        return self._get_hostname()
+
+    async def _get_hostname(self) -> str:
+        """
+        Helper coroutine behind the hostname property.
+
+        Returns:
+            str: The hostname of the remote host.
+        """
+        return (await self.run_cmd("hostname -s")).out
+
+    async def connect(self) -> None:
+        """
+        Establish the SSH connection, if it's not established yet.
+
+        The handshake runs in the default executor, so it does not block the event loop.
+
+        Raises:
+            ConnectionError: If there is any error connecting to the remote host.
+
+        Example:
+            >>> py_ssh = AsyncPySecureShellAutomator(host='hostname', username='admin', password='admin_pass')
+            >>> await py_ssh.connect()
+        """
+        async with self._connect_lock:
+            if self._sync is not None:
+                return None
+            self._sync = await asyncio.to_thread(
+                PySecureShellAutomator,
+                host=self.host,
+                username=self.username,
+                password=self.password,
+                port=self.port,
+                pkey=self.pkey,
+                timeout=self.timeout,
+                auth_timeout=self.auth_timeout,
+                auto_add_policy=self.auto_add_policy,
+                sftp=self.sftp,
+                keepalive_interval=self.keepalive_interval,
+                max_reconnect_attempts=self.max_reconnect_attempts,
+                reconnect_backoff=self.reconnect_backoff,
+                transport_profile=self.transport_profile,
+            )
+
+    async def close(self) -> None:
+        """
+        Close the SFTP session, if any, and the SSH connection to the remote host.
+
+        Example:
+            >>> await py_ssh.close()
+        """
+        if self._sync is not None:
+            self._sync.close()
+            self._sync = None
+
+    async def run_cmd(
+        self,
+        cmd: str,
+        user: str | None = None,
+        raise_exception: bool = True,
+        custom_exception: Type[Exception] = CmdError,
+        err_message: str | None = None,
+        cmd_timeout: float | None = 10,
+        get_pty: bool = True,
+        decode: bool = True,
+        max_output_bytes: int | None = None,
+        truncate: TruncatePolicy = "tail",
+        spill_to_disk: bool = False,
+    ) -> CmdResponse:
+        """
+        Execute a command on the remote host. If the exit code is not 0, raise an exception.
+
+        Same contract as `BaseSSH.run_cmd`, but the remote command is awaited without blocking the event loop.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            user (str, optional): User to execute the command. If None, the user is the same as the one used to connect. Defaults to None.
+            raise_exception (bool, optional): If True, raise an exception if the exit code is not 0. Defaults to True.
+            custom_exception (Type[Exception], optional): Custom exception to raise if the exit code is not 0 and raise_exception is True. Defaults to CmdError.
+            err_message (str, optional): Error message to raise if the exit code is not 0 and raise_exception is True. If None, the output of the command is used. Defaults to None.
+            cmd_timeout (float, optional): Timeout to execute the command. Defaults to 10 seconds.
+            get_pty (bool, optional): If True, run the command in a pseudo-terminal, which merges the error output into the output.
+                If False, the error output is kept apart in `err`. Defaults to True.
+            decode (bool, optional): If True, `out` is decoded as UTF-8 and its trailing whitespace is stripped. If False, `out`
+                and `err` are the bytes received, untouched. Defaults to True.
+            max_output_bytes (int, optional): Bytes of the output, and of the error output, held in memory. Past it, the output
+                is truncated, or spilled to disk with `spill_to_disk`. If None, the whole output is held. Defaults to None.
+            truncate (str, optional): Part of the output kept when it's truncated: "head", "tail" or "head+tail".
+                Defaults to "tail".
+            spill_to_disk (bool, optional): If True, an output larger than max_output_bytes is written to a temporary file
+                and exposed as a read-only `mmap.mmap` of it instead of being truncated. Defaults to False.
+
+        Returns:
+            CmdResponse: Object with the output and exit code of the command.
+
+        Raises:
+            custom_exception: Raised if the exit code is not 0 and raise_exception is True.
+            TimeoutError: Raised if the command does not finish before cmd_timeout.
+
+        Examples:
+            >>> cmd_response = await py_ssh.run_cmd(cmd='whoami')
+            >>> print(cmd_response.out)  # Output: 'username'
+
+            Run many commands concurrently:
+            >>> responses = await asyncio.gather(*(py_ssh.run_cmd(cmd=f'echo {i}') for i in range(100)))
+        """
+        out = OutputBuffer(max_output_bytes, truncate, spill_to_disk)
+        err = OutputBuffer(max_output_bytes, truncate, spill_to_disk)
+        await self.connect()
+        channel = await asyncio.to_thread(
+            self._open_channel, BaseSSH._wrap_cmd(cmd, user), cmd_timeout, get_pty
+        )
+        try:
+            ext_code = await asyncio.wait_for(
+                self._wait_channel(channel, out, err), cmd_timeout
+            )
+        except BaseException as e:
+            out.close()
+            err.close()
+            if isinstance(e, asyncio.TimeoutError):
+                raise TimeoutError(f"Command timed out after {cmd_timeout} seconds")
+            raise
+        finally:
+            channel.close()
+
+        truncated_bytes = out.truncated_bytes + err.truncated_bytes
+        out = BaseSSH._output_value(out, decode)
+        err = BaseSSH._output_value(err, decode)
+
+        # Sometimes the error output is empty, so the output is used instead
+        return BaseSSH._cmd_response(
+            ext_code,
+            out,
+            err or out,
+            raise_exception,
+            custom_exception,
+            err_message,
+            {"truncated_bytes": truncated_bytes},
+            None if get_pty else err,
+        )
+
+    def stream_cmd(
+        self,
+        cmd: str,
+        user: str | None = None,
+        raise_exception: bool = True,
+        custom_exception: Type[Exception] = CmdError,
+        err_message: str | None = None,
+        cmd_timeout: float | None = 10,
+        lines: bool = True,
+        chunk_size: int = 32768,
+    ) -> AsyncCmdStream:
+        """
+        Execute a command on the remote host and asynchronously iterate over its output as it arrives.
+
+        Same contract as `BaseSSH.stream_cmd`. The command is started on the first iteration.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            user (str, optional): User to execute the command. If None, the user is the same as the one used to connect. Defaults to None.
+            raise_exception (bool, optional): If True, raise an exception at the end of the iteration if the exit code is not 0. Defaults to True.
+            custom_exception (Type[Exception], optional): Custom exception to raise if the exit code is not 0 and raise_exception is True. Defaults to CmdError.
+            err_message (str, optional): Error message to raise if the exit code is not 0 and raise_exception is True. If None, the end of the output is used. Defaults to None.
+            cmd_timeout (float, optional): Maximum time to wait for new output. If None, wait forever. Defaults to 10 seconds.
+            lines (bool, optional): If True, yield decoded lines without the line terminator. If False, yield the raw chunks of bytes. Defaults to True.
+            chunk_size (int, optional): Maximum number of bytes read from the channel at once. Defaults to 32768.
+
+        Returns:
+            AsyncCmdStream: Asynchronous iterator over the lines or chunks of the output.
+
+        Examples:
+            >>> stream = py_ssh.stream_cmd(cmd='make -C /path/to/project', cmd_timeout=None)
+            >>> async for line in stream:
+                    print(line)
+            >>> print(stream.ext_code)  # Output: 0
+        """
+
+        async def open_channel() -> Channel:
+            await self.connect()
+            return await asyncio.to_thread(
+                self._open_channel, BaseSSH._wrap_cmd(cmd, user), cmd_timeout
+            )
+
+        return AsyncCmdStream(
+            open_channel,
+            lines,
+            chunk_size,
+            raise_exception,
+            custom_exception,
+            err_message,
+            cmd_timeout,
+        )
+
+    def _open_channel(
+        self, cmd: str, cmd_timeout: float | None, get_pty: bool = True
+    ) -> Channel:
+        """
+        Open a session channel, with a PTY by default, and start the command on it.
+
+        Opening the channel costs a single round trip, so it runs in the default executor
+        instead of in the event loop.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            cmd_timeout (float, optional): Timeout to open the channel.
+            get_pty (bool, optional): Whether to request a pseudo-terminal for the command. Defaults to True.
+
+        Returns:
+            Channel: The channel running the command.
+        """
+        channel = self._sync._ssh.get_transport().open_session(timeout=cmd_timeout)
+        if get_pty:
+            channel.get_pty()
+        channel.exec_command(cmd)
+        return channel
+
+    async def _wait_channel(
+        self, channel: Channel, out: OutputBuffer, err: OutputBuffer
+    ) -> int:
+        """
+        Drain a channel until the remote command exits, without blocking the event loop.
+
+        The channel file descriptor becomes readable when stdout or stderr data arrives or the channel reaches EOF,
+        and it's registered in the event loop so the coroutine only wakes up when there's work to do.
+
+        Args:
+            channel (Channel): The channel running the command.
+            out (OutputBuffer): Buffer of the output.
+            err (OutputBuffer): Buffer of the error output.
+
+        Returns:
+            int: The exit code of the command.
+        """
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        fd = channel.fileno()
+        loop.add_reader(fd, readable.set)
+        try:
+            while True:
+                readable.clear()
+                while channel.recv_ready():
+                    out.write(channel.recv(32768))
+                while channel.recv_stderr_ready():
+                    err.write(channel.recv_stderr(32768))
+
+                if (channel.eof_received or channel.closed) and not channel.recv_ready():
+                    # The file descriptor stays readable after EOF, stop watching it
+                    # and wait for the exit status, which follows EOF almost immediately,
+                    # in a thread, since paramiko only signals it with a threading.Event
+                    loop.remove_reader(fd)
+                    if not channel.exit_status_ready():
+                        await asyncio.to_thread(channel.recv_exit_status)
+                    while channel.recv_stderr_ready():
+                        err.write(channel.recv_stderr(32768))
+                    return channel.exit_status
+
+                await readable.wait()
+        finally:
+            loop.remove_reader(fd)
+
+    def _get_user(self, run_as_root: bool) -> str | None:
+        """
+        Helper method to get the user based on the run_as_root parameter.
+
+        Args:
+            run_as_root (bool): Whether to run the command as root.
+
+        Returns:
+            str | None: The user to run the command as. Returns "root" if run_as_root is True, otherwise None.
+        """
+        return "root" if run_as_root else None
@@ -0,0 +1,127 @@
+"""
+Provides the AsyncCmdStream class, the asyncio counterpart of CmdStream.
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Type
+from paramiko import Channel
+from ..base_ssh.cmd_stream import _OutputSplitter
+
+
+class AsyncCmdStream:
+    """
+    Asynchronous iterator over the output of a remote command, yielding it as it arrives.
+
+    The command is started on the first iteration. Once the iteration is over, `ext_code` holds the exit
+    code of the command. If the exit code is not 0 and raise_exception is True, the exception is raised
+    when the iteration ends.
+
+    Attributes:
+        ext_code (int | None): The exit code of the command, or None while it is still running.
+
+    Example:
+        ```python
+        stream = py_ssh.stream_cmd(cmd='journalctl --no-pager')
+        async for line in stream:
+            if 'error' in line:
+                print(line)
+        print(stream.ext_code)  # Output: 0
+        ```
+    """
+
+    def __init__(
+        self,
+        open_channel: Callable[[], Awaitable[Channel]],
+        lines: bool,
+        chunk_size: int,
+        raise_exception: bool,
+        custom_exception: Type[Exception],
+        err_message: str | None,
+        cmd_timeout: float | None,
+    ) -> None:
+        self.ext_code: int | None = None
+        self._open_channel = open_channel
+        self._channel: Channel | None = None
+        self._chunk_size = chunk_size
+        self._splitter = _OutputSplitter(lines)
+        self._raise_exception = raise_exception
+        self._custom_exception = custom_exception
+        self._err_message = err_message
+        self._cmd_timeout = cmd_timeout
+        self._iterator = self._read()
+
+    def __aiter__(self) -> "AsyncCmdStream":
+        return self
+
+    async def __anext__(self) -> str | bytes:
+        return await self._iterator.__anext__()
+
+    async def __aenter__(self) -> "AsyncCmdStream":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Stop reading and close the channel. The remote command receives a SIGPIPE on its next write.
+
+        Example:
+            >>> async with py_ssh.stream_cmd(cmd='tail -f /var/log/syslog') as stream:
+                    async for line in stream:
+                        if 'ready' in line:
+                            break
+        """
+        await self._iterator.aclose()
+        if self._channel is not None:
+            self._channel.close()
+
+    async def _read(self) -> AsyncIterator[str | bytes]:
+        """
+        Asynchronous generator reading the channel until EOF, then collecting the exit code.
+
+        Yields:
+            str | bytes: Lines or chunks of the output.
+
+        Raises:
+            custom_exception: Raised at the end if the exit code is not 0 and raise_exception is True.
+            TimeoutError: Raised if no output is received for cmd_timeout seconds.
+        """
+        self._channel = channel = await self._open_channel()
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        fd = channel.fileno()
+        loop.add_reader(fd, readable.set)
+        try:
+            while True:
+                readable.clear()
+                while channel.recv_ready():
+                    for item in self._splitter.feed(channel.recv(self._chunk_size)):
+                        yield item
+
+                if (channel.eof_received or channel.closed) and not channel.recv_ready():
+                    break
+
+                try:
+                    await asyncio.wait_for(readable.wait(), self._cmd_timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(
+                        f"No output received for {self._cmd_timeout} seconds"
+                    )
+
+            # The file descriptor stays readable after EOF, stop watching it
+            loop.remove_reader(fd)
+            for item in self._splitter.flush():
+                yield item
+            # Paramiko only signals the exit status with a threading.Event
+            if not channel.exit_status_ready():
+                await asyncio.to_thread(channel.recv_exit_status)
+            self.ext_code = channel.exit_status
+        finally:
+            loop.remove_reader(fd)
+            channel.close()
+
+        if self.ext_code != 0 and self._raise_exception:
+            raise self._custom_exception(
+                self._err_message or self._splitter.error_message(self.ext_code)
+            )
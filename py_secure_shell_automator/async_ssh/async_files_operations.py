@@ -0,0 +1,261 @@
+"""
+Module containing the asyncio counterpart of the files operations
+"""
+
+import asyncio
+from .async_base_ssh import AsyncBaseSSH
+from ..files_operations import SSHFileOperations
+from ..files_operations.exceptions import *
+from ..models import Directory
+
+
+class AsyncSSHFileOperations(AsyncBaseSSH):
+    """
+    Class to perform files operations on a remote machine from asyncio code
+    """
+
+    async def copy_file_to_remote(
+        self,
+        local_path: str,
+        remote_path: str,
+        parallelism: int = 1,
+        chunk_size: int = 64 * 1024 * 1024,
+        connections: int = 1,
+        verify: bool = False,
+        delta: bool = False,
+        block_size: int = 1024 * 1024,
+        in_place: bool = False,
+    ) -> None:
+        """
+        Copies a file from the local machine to the remote host. `SFTP` must be initialized.
+
+        The transfer itself runs in the default executor, since paramiko's SFTP client is blocking.
+
+        Args:
+            local_path (str): Absolute path to the file on the local machine.
+            remote_path (str): Absolute path where the file should be copied to on the remote host.
+            parallelism (int, optional): Number of SFTP sessions moving ranges of the file at once. Defaults to 1.
+            chunk_size (int, optional): Bytes of a range. Defaults to 64 MiB.
+            connections (int, optional): Number of SSH connections the sessions are spread over. Defaults to 1.
+            verify (bool, optional): Whether to compare the SHA-256 of every range at both ends. Defaults to False.
+            delta (bool, optional): Whether to send only the blocks that differ from the remote file. Defaults to False.
+            block_size (int, optional): Bytes of a block compared with `delta`. Defaults to 1 MiB.
+            in_place (bool, optional): Whether `delta` changes the remote file directly instead of a copy. Defaults to False.
+
+        Raises:
+            SFTPNotInitializedError: If SFTP is not initialized.
+            FileTransferError: If there is an error copying the file to the remote host.
+
+        Examples:
+            >>> await py_ssh.copy_file_to_remote('/absolute/path/to/local/file.txt', '/absolute/path/to/remote/file.txt')
+        """
+        await self.connect()
+        await asyncio.to_thread(
+            self._sync.copy_file_to_remote,
+            local_path,
+            remote_path,
+            parallelism,
+            chunk_size,
+            connections,
+            verify,
+            delta,
+            block_size,
+            in_place,
+        )
+
+    async def copy_file_from_remote(
+        self,
+        remote_path: str,
+        local_path: str,
+        parallelism: int = 1,
+        chunk_size: int = 64 * 1024 * 1024,
+        connections: int = 1,
+        verify: bool = False,
+    ) -> None:
+        """
+        Copies a file from the remote host to the local machine. SFTP must be initialized.
+
+        The transfer itself runs in the default executor, since paramiko's SFTP client is blocking.
+
+        Args:
+            remote_path (str): Absolute path to the file on the remote host.
+            local_path (str): Absolute path where the file should be copied to on the local machine.
+            parallelism (int, optional): Number of SFTP sessions moving ranges of the file at once. Defaults to 1.
+            chunk_size (int, optional): Bytes of a range. Defaults to 64 MiB.
+            connections (int, optional): Number of SSH connections the sessions are spread over. Defaults to 1.
+            verify (bool, optional): Whether to compare the SHA-256 of every range at both ends. Defaults to False.
+
+        Raises:
+            SFTPNotInitializedError: If SFTP is not initialized.
+            FileTransferError: If there is an error copying the file from the remote host.
+
+        Examples:
+            >>> await py_ssh.copy_file_from_remote('/absolute/path/to/remote/file.txt', '/absolute/path/to/local/file.txt')
+        """
+        await self.connect()
+        await asyncio.to_thread(
+            self._sync.copy_file_from_remote,
+            remote_path,
+            local_path,
+            parallelism,
+            chunk_size,
+            connections,
+            verify,
+        )
+
+    async def get_file_content(self, filepath: str, run_as_root: bool = False) -> str:
+        """
+        Gets the content of a file as a string.
+
+        Args:
+            filepath (str): Path to the file to read.
+            run_as_root (bool, optional): Whether to run the command as root. Defaults to False.
+
+        Returns:
+            str: Content of the file as a string.
+
+        Raises:
+            GetFileContentError: If there is an error getting the file content.
+
+        Examples:
+            >>> content = await py_ssh.get_file_content('/path/to/file.txt')
+        """
+        cmd_response = await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHFileOperations._file_content_command(filepath),
+            custom_exception=GetFileContentError,
+        )
+        return cmd_response.out
+
+    async def remove_file(
+        self,
+        filepath: str,
+        force: bool = False,
+        run_as_root: bool = False,
+    ) -> None:
+        """
+        Remove a file.
+
+        Args:
+            filepath (str): The path to the file to remove.
+            force (bool, optional): If True, remove the file even if it's write-protected. Defaults to False.
+            run_as_root (bool, optional): Whether to run the command as root. Defaults to False.
+
+        Raises:
+            FileRemovalError: If there is an error removing the file.
+
+        Examples:
+            >>> await py_ssh.remove_file('/path/to/file.txt')
+        """
+        await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHFileOperations._remove_file_command(filepath, force),
+            custom_exception=FileRemovalError,
+        )
+
+    async def remove_directory(
+        self,
+        dirpath: str,
+        force: bool = False,
+        run_as_root: bool = False,
+    ) -> None:
+        """
+        Remove a directory.
+
+        Args:
+            dirpath (str): The path to the directory to remove.
+            force (bool, optional): If True, remove the directory even if it's not empty. Defaults to False.
+            run_as_root (bool, optional): Whether to run the command as root. Defaults to False.
+
+        Raises:
+            DirectoryRemovalError: If there is an error removing the directory.
+
+        Examples:
+            >>> await py_ssh.remove_directory('/path/to/non_empty_directory', force=True)
+        """
+        await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHFileOperations._remove_directory_command(dirpath, force),
+            custom_exception=DirectoryRemovalError,
+        )
+
+    async def create_directory(self, dirpath: str, run_as_root: bool = False) -> None:
+        """
+        Create a directory. If the directory already exists, the command will not fail.
+
+        Args:
+            dirpath (str): The path to the directory to create.
+            run_as_root (bool, optional): Whether to run the command as root. Defaults to False.
+
+        Raises:
+            DirectoryCreationError: If there is an error creating the directory.
+
+        Examples:
+            >>> await py_ssh.create_directory('/path/to/new_directory')
+        """
+        await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHFileOperations._create_directory_command(dirpath),
+            custom_exception=DirectoryCreationError,
+        )
+
+    async def get_directory_structure(
+        self, path: str, run_as_root: bool = False, metadata: bool = False
+    ) -> list[Directory]:
+        """
+        List the content of a directory on the remote server.
+
+        The whole tree is listed by a single `find` command, whatever its size.
+
+        Args:
+            path (str): The path to the directory to list. This should be an absolute path.
+            run_as_root (bool, optional): Whether to run the command with root user privileges. Defaults to False.
+            metadata (bool, optional): Whether to fill in the size, modification time, mode and owner of the
+                directories and files, in `info` and `file_info`. Defaults to False.
+
+        Returns:
+            list[Directory]: A list of Directory objects representing each directory and its files, parents first.
+
+        Raises:
+            ListDirectoryContentError: If the command fails to list the directory content.
+
+        Examples:
+            >>> dir_structure = await py_ssh.get_directory_structure('/path/to/directory')
+        """
+        cmd_response = await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHFileOperations._directory_structure_command(path, metadata),
+            custom_exception=ListDirectoryContentError,
+            cmd_timeout=None,
+            get_pty=False,
+            decode=False,
+        )
+        return SSHFileOperations._parse_directory_structure(cmd_response.out, metadata)
+
+    async def change_owner(
+        self,
+        path: str,
+        owner: str,
+        recursive: bool = False,
+        run_as_root: bool = False,
+    ) -> None:
+        """
+        Change the owner of a file or directory.
+
+        Args:
+            path (str): The path to the file or directory.
+            owner (str): The new owner.
+            recursive (bool, optional): If True, change the owner recursively. Defaults to False.
+            run_as_root (bool, optional): Whether to run the command as root. Defaults to False.
+
+        Raises:
+            OwnerChangeError: If there is an error changing the owner.
+
+        Examples:
+            >>> await py_ssh.change_owner('/path/to/directory', 'new_owner', recursive=True)
+        """
+        await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHFileOperations._change_owner_command(path, owner, recursive),
+            custom_exception=OwnerChangeError,
+        )
@@ -0,0 +1,130 @@
+"""
+Module containing the asyncio counterpart of the system information methods
+"""
+
+from .async_base_ssh import AsyncBaseSSH
+from ..get_system_info.exceptions import *
+
+
+class AsyncSSHSystemInfo(AsyncBaseSSH):
+    """
+    Class containing coroutines to get system information
+    """
+
+    async def get_cpu_usage(self, run_as_root: bool = False) -> str:
+        """
+        Get the CPU usage of the remote host.
+
+        Args:
+            run_as_root (bool): Whether to run the command as root. Default is False.
+
+        Returns:
+            str: CPU usage.
+
+        Raises:
+            GetSystemInfoError: If there is an error retrieving the CPU usage.
+
+        Example:
+            >>> cpu_usage = await py_ssh.get_cpu_usage()
+        """
+        return await self._get_system_info(
+            "top -b -n1 | grep 'Cpu(s)' | awk '{printf \"%.2f%%\", $2 + $4}'",
+            run_as_root,
+        )
+
+    async def get_memory_usage(self, run_as_root: bool = False) -> str:
+        """
+        Get the memory usage of the remote host.
+
+        Args:
+            run_as_root (bool): Whether to run the command as root. Default is False.
+
+        Returns:
+            str: Memory usage.
+
+        Raises:
+            GetSystemInfoError: If there is an error retrieving the memory usage.
+
+        Example:
+            >>> memory_usage = await py_ssh.get_memory_usage()
+        """
+        return await self._get_system_info(
+            "free -m | awk 'NR==2{printf \"%s/%sMB (%.2f%%)\", $3,$2,$3*100/$2 }'",
+            run_as_root,
+        )
+
+    async def get_disk_usage(self, run_as_root: bool = False) -> str:
+        """
+        Get the disk usage of the remote host.
+
+        Args:
+            run_as_root (bool): Whether to run the command as root. Default is False.
+
+        Returns:
+            str: Disk usage.
+
+        Raises:
+            GetSystemInfoError: If there is an error retrieving the disk usage.
+
+        Example:
+            >>> disk_usage = await py_ssh.get_disk_usage()
+        """
+        return await self._get_system_info(
+            'df -h | awk \'$NF=="/"{printf "%d/%dGB (%s)", $3,$2,$5}\'', run_as_root
+        )
+
+    async def get_kernel_version(self, run_as_root: bool = False) -> str:
+        """
+        Get the kernel version of the remote host.
+
+        Args:
+            run_as_root (bool): Whether to run the command as root. Default is False.
+
+        Returns:
+            str: Kernel version.
+
+        Raises:
+            GetSystemInfoError: If there is an error retrieving the kernel version.
+
+        Example:
+            >>> kernel_version = await py_ssh.get_kernel_version()
+        """
+        return await self._get_system_info("uname -r", run_as_root)
+
+    async def get_os_version(self, run_as_root: bool = False) -> str:
+        """
+        Get the operating system version of the remote host.
+
+        Args:
+            run_as_root (bool): Whether to run the command as root. Default is False.
+
+        Returns:
+            str: Operating system version.
+
+        Raises:
+            GetSystemInfoError: If there is an error retrieving the operating system version.
+
+        Example:
+            >>> os_version = await py_ssh.get_os_version()
+        """
+        return await self._get_system_info(
+            "cat /etc/os-release | grep PRETTY_NAME | cut -d '=' -f 2", run_as_root
+        )
+
+    async def _get_system_info(self, cmd: str, run_as_root: bool) -> str:
+        """
+        Helper coroutine to run a system information command.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            run_as_root (bool): Whether to run the command as root.
+
+        Returns:
+            str: The output of the command.
+        """
+        cmd_response = await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=cmd,
+            custom_exception=GetSystemInfoError,
+        )
+        return cmd_response.out
@@ -0,0 +1,85 @@
+"""
+Module containing the asyncio counterpart of the processes operations
+"""
+
+from .async_base_ssh import AsyncBaseSSH
+from ..models import Process
+from ..processes_operations import SSHProcessOperations
+from ..processes_operations.exceptions import *
+
+
+class AsyncSSHProcessOperations(AsyncBaseSSH):
+    """
+    Class containing process operations for asyncio code
+    """
+
+    async def get_single_process_status(
+        self, process: str, run_as_root: bool = False
+    ) -> list[Process]:
+        """
+        Get the status of all processes with a given name on the remote host.
+
+        Args:
+            process (str): Name of the process to check.
+            run_as_root (bool, optional): Whether to run the command as root. Default is False.
+
+        Returns:
+            list[Process]: A list of Process objects representing the running processes, containing the user, pid, cpu, mem, and command.
+
+        Raises:
+            CmdError: If there is no process with the given name.
+
+        Examples:
+            >>> processes = await py_ssh.get_single_process_status('nginx')
+        """
+        cmd_response = await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHProcessOperations._process_status_command(process),
+            err_message=f"Process {process} not found",
+        )
+        return SSHProcessOperations._parse_single_process_status(cmd_response.out)
+
+    async def kill_process(self, process: str, run_as_root: bool = False) -> None:
+        """
+        Kill a process on the remote host.
+
+        Args:
+            process (str): Name of the process to kill.
+            run_as_root (bool, optional): Whether to run the command as root. Default is False.
+
+        Raises:
+            KillProcessError: If there is an error while killing the process.
+
+        Examples:
+            >>> await py_ssh.kill_process('nginx')
+        """
+        await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHProcessOperations._kill_process_command(process),
+            custom_exception=KillProcessError,
+        )
+
+    async def get_all_running_processes(
+        self, run_as_root: bool = False
+    ) -> list[Process]:
+        """
+        Get all running processes on the remote host.
+
+        Args:
+            run_as_root (bool, optional): Whether to run the command as root. Default is False.
+
+        Returns:
+            list[Process]: List of Process objects representing the running processes, containing the user, pid, cpu, mem, and command.
+
+        Raises:
+            GetProcessesStatusError: If there is an error while getting the process status.
+
+        Examples:
+            >>> processes = await py_ssh.get_all_running_processes()
+        """
+        cmd_response = await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHProcessOperations._running_processes_command(),
+            custom_exception=GetProcessesStatusError,
+        )
+        return SSHProcessOperations._parse_running_processes(cmd_response.out)
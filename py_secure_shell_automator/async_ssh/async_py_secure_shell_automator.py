@@ -0,0 +1,32 @@
+from .async_files_operations import AsyncSSHFileOperations
+from .async_get_system_info import AsyncSSHSystemInfo
+from .async_processes_operations import AsyncSSHProcessOperations
+from .async_user_operations import AsyncSSHUserOperations
+
+
+class AsyncPySecureShellAutomator(
+    AsyncSSHFileOperations,
+    AsyncSSHProcessOperations,
+    AsyncSSHUserOperations,
+    AsyncSSHSystemInfo,
+):
+    """
+    Asyncio counterpart of PySecureShellAutomator. Every operation is a coroutine.
+
+    Attributes:
+        host (str): Host to connect to the remote host.
+        username (str): Username to connect to the remote host.
+        password (str, optional): Password to connect to the remote host. Defaults to None.
+        port (int, optional): Port to connect to the remote host. Defaults to 22.
+        pkey (str, optional): Private key to connect to the remote host. Defaults to None.
+        timeout (int, optional): Timeout to connect to the remote host. Defaults to 10.
+        auth_timeout (int, optional): Authentication timeout to connect to the remote host. Defaults to 10.
+        auto_add_policy (bool, optional): Whether to add the host to the known hosts. Defaults to True.
+        sftp (bool, optional): Whether to use the SFTP protocol to connect to the remote host. Defaults to False.
+
+    Example:
+            >>> from py_secure_shell_automator import AsyncPySecureShellAutomator
+            >>> async with AsyncPySecureShellAutomator(host='hostname', username='user_name', password='password') as py_ssh:
+                    cmd_response = await py_ssh.run_cmd(cmd='whoami')
+                    print(cmd_response.out)  # Output: 'user_name'
+    """
@@ -0,0 +1,61 @@
+"""
+Module containing the asyncio counterpart of the user operations
+"""
+
+from .async_base_ssh import AsyncBaseSSH
+from ..user_operations import SSHUserOperations
+from ..user_operations.exceptions import *
+
+
+class AsyncSSHUserOperations(AsyncBaseSSH):
+    """
+    Class containing methods to manage users on a remote host from asyncio code.
+    """
+
+    async def create_user(
+        self, username: str, password: str, run_as_root: bool = True
+    ) -> None:
+        """
+        Create a new user on the remote host.
+
+        Args:
+            username (str): The username of the new user.
+            password (str): The password of the new user.
+            run_as_root (bool): Whether to run the command as root. Default is True.
+
+        Raises:
+            UserCreationError: If there is an error creating the user.
+
+        Examples:
+            >>> await py_ssh.create_user(username='newuser', password='newpassword')
+        """
+        await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHUserOperations._create_user_command(username),
+            custom_exception=UserCreationError,
+        )
+        await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHUserOperations._set_password_command(username, password),
+            custom_exception=UserCreationError,
+        )
+
+    async def delete_user(self, username: str, run_as_root: bool = True) -> None:
+        """
+        Delete a user on the remote host.
+
+        Args:
+            username (str): The username of the user to delete.
+            run_as_root (bool): Whether to run the command as root. Default is True.
+
+        Raises:
+            UserDeletionError: If there is an error deleting the user.
+
+        Examples:
+            >>> await py_ssh.delete_user(username='olduser')
+        """
+        await self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=SSHUserOperations._delete_user_command(username),
+            custom_exception=UserDeletionError,
+        )
@@ -1,2 +1,18 @@
 from .base_ssh import BaseSSH
-from .exceptions import CmdError
\ No newline at end of file
+from .broker_client import BrokerClient
+from .cmd_stream import CmdStream
+from .command_batch import BatchResult, CommandBatch
+from .key_cache import clear_key_cache
+from .observer import SSHObserver
+from .output_buffer import OutputBuffer
+from .result_cache import ResultCache, cached_query
+from .shell_session import ShellSession
+from .transport_calibration import calibrate_transport_profiles
+from .transport_profile import TRANSPORT_PROFILES, TransportProfile
+from .exceptions import (
+    BatchError,
+    BrokerError,
+    ChannelOpenError,
+    CmdError,
+    ShellSessionError,
+)
@@ -2,12 +2,36 @@
 Provides the BaseSSH class, which serves as the foundation for establishing SSH connections to remote hosts, using Paramiko library.
 """
 
+import base64
+import mmap
+import os
+import select
 import shlex
-from dataclasses import dataclass
-from paramiko import SSHClient, AutoAddPolicy, RejectPolicy, RSAKey
-from typing import Type
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from paramiko import Channel, SSHClient, SFTPClient, AutoAddPolicy, RejectPolicy, SSHException
+from typing import Callable, Iterator, Type
+from .broker_client import BrokerClient, BrokerSFTP
+from .cmd_stream import CmdStream
+from .command_batch import CommandBatch, _NotBatchable
+from .input_feeder import CmdInput, InputFeeder, iter_input
+from .key_cache import load_host_keys, load_private_key
+from .observer import SSHObserver
+from .output_buffer import OutputBuffer, TruncatePolicy
+from .result_cache import ResultCache, cached_query
+from .shell_session import ShellSession
+from .transport_profile import TransportProfile, get_transport_profile
 from .exceptions import *
-from ..models import CmdResponse
+from ..models import CmdOutput, CmdResponse, SSHEvent
+
+# Maximum number of bytes read from a channel at once when buffering the output of a command
+_RECV_SIZE = 1024 * 1024
+# Bytes of the end of an output spilled to disk used as the error message of a failed command
+_ERROR_TAIL_SIZE = 4096
 
 
 @dataclass
@@ -25,6 +49,24 @@ class BaseSSH:
         auth_timeout (int, optional): Authentication timeout to connect to the remote host. Defaults to 10.
         auto_add_policy (bool, optional): Whether to add the host to the known hosts. Defaults to True.
         sftp (bool, optional): Whether to use the SFTP protocol to connect to the remote host. Defaults to False.
+        ssh_client (SSHClient, optional): An already connected SSHClient to reuse instead of opening a new connection. Defaults to None.
+        lazy (bool, optional): Whether to defer the connection, and the SFTP session, until they are first used. Defaults to False.
+        broker_socket (str, optional): Path to the socket of an SSHBroker. If provided, `run_cmd` and the SFTP transfers
+            go through the connections of the broker instead of a connection of this object. Defaults to None.
+        keepalive_interval (int, optional): Seconds between keepalive packets sent on an idle connection, so a dead
+            connection is detected, and a NAT or firewall does not drop it. If 0, no keepalive is sent. Defaults to 0.
+        max_reconnect_attempts (int, optional): Attempts to reconnect when the connection is found dead before a command.
+            If 0, the connection is never reopened. Defaults to 3.
+        reconnect_backoff (float, optional): Seconds to wait after the first failed reconnection attempt, doubled after
+            every further failure. Defaults to 1.0.
+        observers (list[SSHObserver], optional): Observers notified of every connection, command and SFTP transfer. Defaults to [].
+        transport_profile (str | TransportProfile, optional): Tuning of the SSH transport: compression, preferred algorithms,
+            window and packet sizes. Either the name of a predefined profile ("default", "lan-bulk", "wan-text",
+            "low-latency") or a `TransportProfile`. Defaults to "default".
+        cache_ttl (float, optional): Seconds the results of the cached queries, such as `hostname`, `get_kernel_version`
+            and `run_cmd(cached=True)`, stay valid. Defaults to 300.
+        cache_max_entries (int, optional): Maximum number of results cached, the least recently used ones being evicted.
+            If 0, nothing is cached. Defaults to 128.
 
     Example:
         ```python
@@ -45,31 +87,194 @@ class BaseSSH:
     auth_timeout: int = 10
     auto_add_policy: bool = True
     sftp: bool = False
+    ssh_client: SSHClient | None = field(default=None, repr=False, compare=False)
+    lazy: bool = False
+    broker_socket: str | None = None
+    keepalive_interval: int = 0
+    max_reconnect_attempts: int = 3
+    reconnect_backoff: float = 1.0
+    observers: list[SSHObserver] = field(default_factory=list, repr=False, compare=False)
+    transport_profile: str | TransportProfile = "default"
+    cache_ttl: float = 300.0
+    cache_max_entries: int = 128
 
     def __post_init__(self) -> None:
         """
-        Create an SSHClient object and set the policy to add the host to the known hosts.
+        Connect to the remote host, unless `lazy` is True, and open the SFTP session if `sftp` is True.
+
+        If `ssh_client` is provided, it is reused as is and no new connection is opened.
+        If `broker_socket` is provided, no connection is opened until a method needs a channel of its own.
         """
-        self._ssh = SSHClient()
-        self._ssh.load_system_host_keys()
-        self._ssh.set_missing_host_key_policy(
-            AutoAddPolicy() if self.auto_add_policy else RejectPolicy()
-        )
-        self._connects()
-        if self.sftp:
-            self._sftp = self._ssh.open_sftp()
+        self._transport_profile = get_transport_profile(self.transport_profile)
+        self._client: SSHClient | None = self.ssh_client
+        self._sftp_client: SFTPClient | BrokerSFTP | None = None
+        self._connect_lock = threading.RLock()
+        self._closed = False
+        self._reconnect_count = 0
+        self._shell_sessions: dict[str | None, ShellSession] | None = None
+        self._shell_sessions_lock = threading.Lock()
+        self._result_cache = ResultCache(self.cache_ttl, self.cache_max_entries)
+        # Set on the copies used by CommandBatch to record and replay the commands of an operation
+        self._cmd_interceptor: Callable[[str, str | None], tuple[int, str] | None] | None = None
+        self._broker: BrokerClient | None = None
+        if self.broker_socket is not None:
+            self._broker = BrokerClient(
+                self.broker_socket,
+                {
+                    "host": self.host,
+                    "port": self.port,
+                    "username": self.username,
+                    "password": self.password,
+                    "pkey": self.pkey,
+                    "timeout": self.timeout,
+                    "auth_timeout": self.auth_timeout,
+                    "auto_add_policy": self.auto_add_policy,
+                    "keepalive_interval": self.keepalive_interval,
+                    "transport_profile": asdict(self._transport_profile),
+                },
+            )
+        elif not self.lazy:
+            self.connect()
+            if self.sftp:
+                self._sftp_client = self._client.open_sftp()
         self._is_sftp_initialized = hasattr(self, "sftp")
 
     @property
+    def _ssh(self) -> SSHClient:
+        """
+        Returns the SSH client, connecting to the remote host on first use if `lazy` is True,
+        and reconnecting if the connection is dead.
+
+        Returns:
+            SSHClient: The connected SSH client.
+        """
+        client = self._client
+        if client is None:
+            self.connect()
+        elif not self._closed and not self._is_active(client):
+            self._reconnect(client)
+        return self._client
+
+    @property
+    def _sftp(self) -> SFTPClient | BrokerSFTP:
+        """
+        Returns the SFTP session, opening it on first use if `lazy` is True,
+        and reopening it if the connection is dead.
+
+        Returns:
+            SFTPClient | BrokerSFTP: The SFTP session, or its stand-in if `broker_socket` is provided.
+
+        Raises:
+            AttributeError: If `sftp` is False.
+        """
+        client = self._client
+        if (
+            client is not None
+            and self._broker is None
+            and not self._closed
+            and not self._is_active(client)
+        ):
+            self._reconnect(client)
+        if self._sftp_client is not None:
+            return self._sftp_client
+        if not self.sftp:
+            raise AttributeError("SFTP is not initialized")
+        with self._connect_lock:
+            if self._sftp_client is None:
+                self._sftp_client = (
+                    self._ssh.open_sftp()
+                    if self._broker is None
+                    else BrokerSFTP(self._broker)
+                )
+        return self._sftp_client
+
+    @property
+    def reconnect_count(self) -> int:
+        """
+        Returns the number of times the connection was found dead and reopened.
+
+        Returns:
+            int: The number of reconnections.
+        """
+        return self._reconnect_count
+
+    @property
+    @cached_query()
     def hostname(self) -> str:
         """
-        Returns the hostname of the remote host.
+        Returns the hostname of the remote host. The result is cached for `cache_ttl` seconds.
 
         Returns:
             str: The hostname of the remote host.
         """
         return self.run_cmd("hostname -s").out
 
+    def connect(self) -> None:
+        """
+        Establish the SSH connection, if it's not established yet.
+
+        Only needed with `lazy=True`, to connect at a chosen moment instead of on first use.
+
+        Raises:
+            ConnectionError: If there is any error connecting to the remote host, or the object was closed.
+
+        Example:
+            >>> py_ssh = PySecureShellAutomator(host='hostname', username='admin', password='admin_pass', lazy=True)
+            >>> py_ssh.connect()
+        """
+        with self._connect_lock:
+            if self._client is not None:
+                return None
+            if self._closed:
+                raise ConnectionError(f"The connection to {self.host} is closed")
+            client = SSHClient()
+            # Same as `load_system_host_keys`, but the file is parsed once per process
+            client._system_host_keys = load_host_keys(
+                os.path.expanduser("~/.ssh/known_hosts")
+            )
+            client.set_missing_host_key_policy(
+                AutoAddPolicy() if self.auto_add_policy else RejectPolicy()
+            )
+            with self._observe("connect"):
+                self._connects(client)
+            if self.keepalive_interval:
+                client.get_transport().set_keepalive(self.keepalive_interval)
+            self._client = client
+
+    def close(self) -> None:
+        """
+        Close the SFTP session, if any, and the SSH connection to the remote host.
+
+        Example:
+            >>> py_ssh = PySecureShellAutomator(host='hostname', username='admin', password='admin_pass')
+            >>> py_ssh.close()
+        """
+        self._closed = True
+        if self._sftp_client is not None:
+            self._sftp_client.close()
+        if self._client is not None:
+            self._client.close()
+
+    def invalidate_cache(self, query: str | None = None) -> int:
+        """
+        Forget the cached results of a query, whatever its arguments, or every cached result,
+        so they are queried again on next use.
+
+        The cache is also emptied when the connection is reopened, since the host may have rebooted.
+
+        Args:
+            query (str, optional): A command run with `run_cmd(cached=True)`, or the name of a cached query such as
+                "hostname" or "get_kernel_version". If None, every result is forgotten. Defaults to None.
+
+        Returns:
+            int: Number of results forgotten.
+
+        Example:
+            >>> py_ssh.run_cmd('apt-get -y dist-upgrade && reboot')
+            >>> py_ssh.invalidate_cache('get_kernel_version')
+        """
+        return self._result_cache.invalidate(query)
+
     def run_cmd(
         self,
         cmd: str,
@@ -78,10 +283,20 @@ class BaseSSH:
         custom_exception: Type[Exception] = CmdError,
         err_message: str | None = None,
         cmd_timeout: float | None = 10,
+        get_pty: bool = True,
+        decode: bool = True,
+        max_output_bytes: int | None = None,
+        truncate: TruncatePolicy = "tail",
+        spill_to_disk: bool = False,
+        stdin: CmdInput | None = None,
+        cached: bool = False,
     ) -> CmdResponse:
         """
         Execute a command on the remote host. If the exit code is not 0, raise an exception.
 
+        The output and the error output are drained together while the command runs, so a command writing a lot
+        to one of them never stalls waiting for the other to be read.
+
         Args:
             cmd (str): Command to execute on the remote host.
             user (str, optional): User to execute the command. If None, the user is the same as the one used to connect. Defaults to None.
@@ -89,12 +304,33 @@ class BaseSSH:
             custom_exception (Type[Exception], optional): Custom exception to raise if the exit code is not 0 and raise_exception is True. Defaults to CmdError.
             err_message (str, optional): Error message to raise if the exit code is not 0 and raise_exception is True. If None, the output of the command is used. Defaults to None.
             cmd_timeout (float, optional): Timeout to execute the command. Defaults to 10 seconds.
+            get_pty (bool, optional): If True, run the command in a pseudo-terminal, which merges the error output into the output
+                and turns the line endings into `\r\n`. If False, the output is received unaltered and the error output is kept
+                apart in `err`, which also saves the round trip of the PTY request. Defaults to True.
+            decode (bool, optional): If True, `out` is decoded as UTF-8 and its trailing whitespace is stripped. If False, `out`
+                and `err` are the bytes received, untouched. Defaults to True.
+            max_output_bytes (int, optional): Bytes of the output, and of the error output, held in memory. Past it, the output
+                is truncated, or spilled to disk with `spill_to_disk`, and `truncated_bytes` counts the bytes dropped.
+                If None, the whole output is held in memory. Defaults to None.
+            truncate (str, optional): Part of the output kept when it's truncated: "head", "tail" or "head+tail".
+                Defaults to "tail".
+            spill_to_disk (bool, optional): If True, an output larger than max_output_bytes is written to a temporary file
+                as it arrives, and exposed as a read-only `mmap.mmap` of it instead of being truncated. The file is removed
+                once the map is closed or garbage collected. Defaults to False.
+            stdin (CmdInput, optional): Input of the command: bytes, a binary file object or an iterable of chunks of bytes.
+                It's streamed to the command as it consumes it, while the output is received, so a file object is never read
+                whole. The command then runs without a PTY, which would echo and alter the input. Defaults to None.
+            cached (bool, optional): If True, the response is kept in the result cache for `cache_ttl` seconds, and the
+                same command run again with the same options gets it without running. Only for commands whose answer
+                almost never changes. Failed commands and outputs spilled to disk are not cached. Defaults to False.
 
         Returns:
-            CmdResponse: Object with the output and exit code of the command.
+            CmdResponse: Object with the output and exit code of the command. A cached response is shared by every caller.
 
         Raises:
             custom_exception: Raised if the exit code is not 0 and raise_exception is True.
+            ValueError: Raised if truncate is not a known policy, or if stdin is provided with cached.
+            TypeError: Raised if stdin is not bytes, a binary file object or an iterable of bytes.
 
         Examples:
 
@@ -155,39 +391,759 @@ class BaseSSH:
                     cmd_response = py_ssh.run_cmd(cmd='command_with_no_output', err_message='The command failed')
                 except CmdError as e:
                     print(e)  # Output: 'The command failed'
+
+            6. Getting a large binary output, with the warnings apart:
+            >>> cmd_response = py_ssh.run_cmd(cmd='pg_dump -Fc mydb', cmd_timeout=None, get_pty=False, decode=False)
+            >>> print(type(cmd_response.out))  # Output: <class 'bytes'>
+            >>> print(cmd_response.err)  # Output: b''
+
+            7. Bounding the memory used by a huge output:
+            >>> cmd_response = py_ssh.run_cmd(cmd='journalctl', cmd_timeout=None, max_output_bytes=2**20, truncate='head+tail')
+            >>> print(cmd_response.truncated_bytes)  # Output: 73400320
+            >>> cmd_response = py_ssh.run_cmd(cmd='cat /var/log/huge.log', max_output_bytes=2**20, spill_to_disk=True)
+            >>> with cmd_response.out as view:
+                    print(view[:100])
+
+            8. Feeding a local file to a command:
+            >>> with open('dump.sql', 'rb') as f:
+                    py_ssh.run_cmd(cmd='psql mydb', stdin=f, cmd_timeout=None)
+
+            9. Caching the answer of a query that almost never changes:
+            >>> cmd_response = py_ssh.run_cmd(cmd='nproc', cached=True)  # Runs nproc
+            >>> cmd_response = py_ssh.run_cmd(cmd='nproc', cached=True)  # Answered from the cache
+        """
+        # Not while a batch is recorded, whose responses are placeholders
+        if cached and self._cmd_interceptor is None:
+            if stdin is not None:
+                raise ValueError("A command with stdin can't be cached")
+            key = (cmd, user, get_pty, decode, max_output_bytes, truncate, spill_to_disk)
+            hit, cmd_response = self._result_cache.lookup(key)
+            if hit:
+                return cmd_response
+            cmd_response = self.run_cmd(
+                cmd,
+                user,
+                raise_exception,
+                custom_exception,
+                err_message,
+                cmd_timeout,
+                get_pty,
+                decode,
+                max_output_bytes,
+                truncate,
+                spill_to_disk,
+            )
+            if cmd_response.is_successful and not isinstance(
+                cmd_response.out, mmap.mmap
+            ):
+                self._result_cache.put(key, cmd_response)
+            return cmd_response
+
+        with self._observe("run_cmd", cmd=cmd, user=user) as event:
+            event.cmd_response = self._run_cmd(
+                cmd,
+                user,
+                raise_exception,
+                custom_exception,
+                err_message,
+                cmd_timeout,
+                get_pty,
+                decode,
+                max_output_bytes,
+                truncate,
+                spill_to_disk,
+                stdin,
+            )
+            event.bytes_transferred = event.cmd_response.bytes_received
+            return event.cmd_response
+
+    @contextmanager
+    def shell_session(self) -> Iterator["BaseSSH"]:
+        """
+        Context manager that routes every `run_cmd` through persistent shells, one per user.
+
+        Instead of opening a channel with a PTY for every command, and spawning `sudo` and a `su` login shell
+        when `user` is set, each user gets a shell that is started once and then fed the commands one after
+        another. Every helper method built on `run_cmd` (file, process, user and system operations) benefits
+        from it, which makes long sequences of `run_as_root=True` operations much faster.
+
+        The `CmdResponse` contract is unchanged. Each command runs in its own `/bin/sh -c`, with stdin from
+        /dev/null and stderr merged into stdout; when `user` is set, the whole command line runs as that user.
+        The shells are closed when the context exits.
+
+        Yields:
+            BaseSSH: This same object.
+
+        Raises:
+            ShellSessionError: Raised by `run_cmd` if a shell can't be started or exits unexpectedly.
+
+        Examples:
+            >>> with py_ssh.shell_session():
+                    for i in range(100):
+                        py_ssh.create_directory(f'/opt/app/dir_{i}', run_as_root=True)
+                        py_ssh.change_owner(f'/opt/app/dir_{i}', 'app', run_as_root=True)
+        """
+        if self._shell_sessions is not None:
+            yield self
+            return None
+
+        self._shell_sessions = {}
+        try:
+            yield self
+        finally:
+            with self._shell_sessions_lock:
+                for session in self._shell_sessions.values():
+                    session.close()
+                self._shell_sessions = None
+
+    def batch(
+        self, cmd_timeout: float | None = 60, stop_on_error: bool = False
+    ) -> CommandBatch:
+        """
+        Queue operations and send them to the remote host as a single script, in one round trip.
+
+        Any public method built on `run_cmd` can be called on the returned batch, with the same arguments.
+        Each call returns a `BatchResult` instead of executing immediately. When the `with` block exits,
+        the commands of all the queued operations are sent at once to a shell on the remote host, and the
+        results are filled in with the same return values and exceptions the methods would have produced.
+
+        As in `shell_session`, each command runs in its own `/bin/sh -c`, with stdin from /dev/null and
+        stderr merged into stdout. Operations whose flow depends on the output of a previous command still
+        work: the commands that were not known in advance are executed normally once the batch has run.
+
+        Args:
+            cmd_timeout (float, optional): Timeout to execute the whole batch. If None, wait forever. Defaults to 60 seconds.
+            stop_on_error (bool, optional): If True, stop at the first command with an exit code other than 0.
+                The results of the operations after it raise a BatchError. Defaults to False.
+
+        Returns:
+            CommandBatch: The batch to queue the operations on.
+
+        Raises:
+            BatchError: Raised when queuing an operation that uses the SSH or SFTP connection directly.
+
+        Examples:
+            >>> with py_ssh.batch(stop_on_error=True) as batch:
+                    batch.create_directory('/opt/app', run_as_root=True)
+                    batch.change_owner('/opt/app', 'app', run_as_root=True)
+                    version = batch.get_file_content('/opt/app/VERSION')
+            >>> print(version.result())  # Output: '1.0.0'
+        """
+        return CommandBatch(self, cmd_timeout, stop_on_error)
+
+    def run_cmds_concurrently(
+        self,
+        cmds: list[str],
+        user: str | None = None,
+        raise_exception: bool = True,
+        custom_exception: Type[Exception] = CmdError,
+        err_message: str | None = None,
+        cmd_timeout: float | None = 10,
+        max_sessions: int = 10,
+    ) -> list[CmdResponse]:
+        """
+        Execute several independent commands at the same time, each on its own channel of the existing connection.
+
+        SSH allows many session channels over one connection, so the commands share the connection but run
+        in parallel, taking about the time of the slowest one instead of the sum of all of them.
+
+        At most `max_sessions` channels are open at once. The default matches the `MaxSessions` default of
+        OpenSSH; if the server refuses a channel because its limit is lower, the limit is lowered to the number
+        of channels already open and the command is retried when one of them finishes.
+
+        Args:
+            cmds (list[str]): Commands to execute on the remote host.
+            user (str, optional): User to execute the commands. If None, the user is the same as the one used to connect. Defaults to None.
+            raise_exception (bool, optional): If True, raise an exception if any exit code is not 0, once all commands finished. Defaults to True.
+            custom_exception (Type[Exception], optional): Custom exception to raise if an exit code is not 0 and raise_exception is True. Defaults to CmdError.
+            err_message (str, optional): Error message to raise if an exit code is not 0 and raise_exception is True. If None, the output of the command is used. Defaults to None.
+            cmd_timeout (float, optional): Timeout to execute each command. Defaults to 10 seconds.
+            max_sessions (int, optional): Maximum number of channels open at the same time. Defaults to 10.
+
+        Returns:
+            list[CmdResponse]: The responses of the commands, in the same order as `cmds`.
+
+        Raises:
+            custom_exception: Raised for the first failed command, in the order of `cmds`, if raise_exception is True.
+
+        Examples:
+            >>> responses = py_ssh.run_cmds_concurrently(['uptime', 'df -h /', 'free -m', 'systemctl is-active nginx'])
+            >>> for response in responses:
+                    print(response.out)
+        """
+        limit = [max(1, min(max_sessions, len(cmds)))]
+        in_flight = [0]
+        slots = threading.Condition()
+
+        def run(cmd: str) -> CmdResponse:
+            while True:
+                with slots:
+                    slots.wait_for(lambda: in_flight[0] < limit[0])
+                    in_flight[0] += 1
+                try:
+                    return self.run_cmd(
+                        cmd,
+                        user=user,
+                        raise_exception=raise_exception,
+                        custom_exception=custom_exception,
+                        err_message=err_message,
+                        cmd_timeout=cmd_timeout,
+                    )
+                except ChannelOpenError:
+                    # The server refused the channel (MaxSessions), retry with fewer channels.
+                    # Only then, since a command whose channel was opened may have run already
+                    with slots:
+                        if in_flight[0] <= 1 or not self._ssh.get_transport().is_active():
+                            raise
+                        limit[0] = min(limit[0], in_flight[0] - 1)
+                finally:
+                    with slots:
+                        in_flight[0] -= 1
+                        slots.notify_all()
+
+        with ThreadPoolExecutor(max_workers=limit[0]) as executor:
+            futures = [executor.submit(run, cmd) for cmd in cmds]
+            wait(futures)
+        return [future.result() for future in futures]
+
+    def stream_cmd(
+        self,
+        cmd: str,
+        user: str | None = None,
+        raise_exception: bool = True,
+        custom_exception: Type[Exception] = CmdError,
+        err_message: str | None = None,
+        cmd_timeout: float | None = 10,
+        lines: bool = True,
+        chunk_size: int = 32768,
+        get_pty: bool = True,
+    ) -> CmdStream:
+        """
+        Execute a command on the remote host and iterate over its output as it arrives.
+
+        Unlike `run_cmd`, the output is not buffered: each line (or chunk of bytes) is yielded as soon as
+        it's received, so huge outputs are processed in constant memory and the first lines are available
+        before the command finishes. The exit code is available in `ext_code` once the iteration is over.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            user (str, optional): User to execute the command. If None, the user is the same as the one used to connect. Defaults to None.
+            raise_exception (bool, optional): If True, raise an exception at the end of the iteration if the exit code is not 0. Defaults to True.
+            custom_exception (Type[Exception], optional): Custom exception to raise if the exit code is not 0 and raise_exception is True. Defaults to CmdError.
+            err_message (str, optional): Error message to raise if the exit code is not 0 and raise_exception is True. If None, the end of the output is used. Defaults to None.
+            cmd_timeout (float, optional): Maximum time to wait for new output. If None, wait forever. Defaults to 10 seconds.
+            lines (bool, optional): If True, yield decoded lines without the line terminator. If False, yield the raw chunks of bytes. Defaults to True.
+            chunk_size (int, optional): Maximum number of bytes read from the channel at once. Defaults to 32768.
+            get_pty (bool, optional): Whether to request a pseudo-terminal for the command. Without one, the error
+                output is kept apart from the output, which is then passed through unaltered, e.g. binary data.
+                Defaults to True.
+
+        Returns:
+            CmdStream: Iterator over the lines or chunks of the output.
+
+        Raises:
+            custom_exception: Raised at the end of the iteration if the exit code is not 0 and raise_exception is True.
+            TimeoutError: Raised if no output is received for cmd_timeout seconds.
+
+        Examples:
+            Process a long build log as it's produced:
+            >>> stream = py_ssh.stream_cmd(cmd='make -C /path/to/project', cmd_timeout=None)
+            >>> for line in stream:
+                    print(line)
+            >>> print(stream.ext_code)  # Output: 0
+
+            Copy a large output to a local file in constant memory:
+            >>> with open('dump.sql', 'wb') as f:
+                    for chunk in py_ssh.stream_cmd(cmd='pg_dump mydb', lines=False, cmd_timeout=None):
+                        f.write(chunk)
         """
-        if user:
-            user = shlex.quote(user)  # Shell-escape the user
-            cmd = (
-                f"sudo {cmd}"
-                if user == "root"
-                else f"""sudo /usr/bin/su - {user} -c "{cmd}" """
+        channel = self._open_cmd_channel(cmd, user, cmd_timeout, get_pty)
+        channel.settimeout(cmd_timeout)
+        return CmdStream(
+            channel, lines, chunk_size, raise_exception, custom_exception, err_message
+        )
+
+    def _run_cmd(
+        self,
+        cmd: str,
+        user: str | None,
+        raise_exception: bool,
+        custom_exception: Type[Exception],
+        err_message: str | None,
+        cmd_timeout: float | None,
+        get_pty: bool = True,
+        decode: bool = True,
+        max_output_bytes: int | None = None,
+        truncate: TruncatePolicy = "tail",
+        spill_to_disk: bool = False,
+        stdin: CmdInput | None = None,
+    ) -> CmdResponse:
+        """
+        Helper method behind `run_cmd`, executing the command through the batch, the broker,
+        the persistent shell of the user or its own channel.
+
+        Persistent shells merge the error output and hold the whole decoded output, so the commands run
+        without a PTY, in bytes mode or with an output cap get their own channel instead.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            user (str, optional): User to execute the command. If None, the user used to connect.
+            raise_exception (bool): Whether to raise an exception if the exit code is not 0.
+            custom_exception (Type[Exception]): Exception to raise.
+            err_message (str, optional): Error message of the exception. If None, the output is used.
+            cmd_timeout (float, optional): Timeout to execute the command.
+            get_pty (bool, optional): Whether to run the command in a pseudo-terminal. Defaults to True.
+            decode (bool, optional): Whether to decode the output. Defaults to True.
+            max_output_bytes (int, optional): Bytes of each output held in memory. If None, no limit. Defaults to None.
+            truncate (TruncatePolicy, optional): Part of an output kept past max_output_bytes. Defaults to "tail".
+            spill_to_disk (bool, optional): Whether to spill an output past max_output_bytes to disk. Defaults to False.
+            stdin (CmdInput, optional): Input of the command, run without a PTY if provided. Defaults to None.
+
+        Returns:
+            CmdResponse: Object with the output and exit code of the command.
+        """
+        if stdin is not None:
+            # A PTY would echo the input back and interpret its control characters
+            get_pty = False
+            if self._cmd_interceptor is not None:
+                raise _NotBatchable("run_cmd with stdin")
+
+        if self._cmd_interceptor is not None:
+            intercepted = self._cmd_interceptor(cmd, user)
+            if intercepted is not None:
+                ext_code, out = intercepted
+                if not decode:
+                    out = out.encode("utf-8")
+                return self._cmd_response(
+                    ext_code, out, out, raise_exception, custom_exception, err_message
+                )
+
+        if self._broker is not None:
+            response = self._broker.request(
+                "run_cmd",
+                cmd=cmd,
+                user=user,
+                cmd_timeout=cmd_timeout,
+                get_pty=get_pty,
+                decode=decode,
+                max_output_bytes=max_output_bytes,
+                truncate=truncate,
+                spill_to_disk=spill_to_disk,
+                # The broker runs the command on its own, so the input is sent whole
+                stdin=None
+                if stdin is None
+                else base64.b64encode(b"".join(iter_input(stdin))).decode("ascii"),
+            )
+            ext_code = response["ext_code"]
+            out = BrokerClient.decode_output(response["out"])
+            err = BrokerClient.decode_output(response["err"])
+            timing = response["timing"]
+        elif (
+            self._shell_sessions is not None
+            and get_pty
+            and decode
+            and max_output_bytes is None
+        ):
+            ext_code, out = self._get_shell_session(user).run(cmd, cmd_timeout)
+            out = out.rstrip()
+            return self._cmd_response(
+                ext_code, out, out, raise_exception, custom_exception, err_message
             )
+        else:
+            ext_code, out, err, timing = self._exec_cmd(
+                cmd,
+                user,
+                cmd_timeout,
+                get_pty,
+                decode,
+                max_output_bytes,
+                truncate,
+                spill_to_disk,
+                stdin,
+            )
+
+        # Sometimes the error output is empty, so the output is used instead
+        return self._cmd_response(
+            ext_code,
+            out,
+            err or out,
+            raise_exception,
+            custom_exception,
+            err_message,
+            timing,
+            None if get_pty else err,
+        )
+
+    def _exec_cmd(
+        self,
+        cmd: str,
+        user: str | None,
+        cmd_timeout: float | None,
+        get_pty: bool = True,
+        decode: bool = True,
+        max_output_bytes: int | None = None,
+        truncate: TruncatePolicy = "tail",
+        spill_to_disk: bool = False,
+        stdin: CmdInput | None = None,
+    ) -> tuple[int, CmdOutput, CmdOutput, dict[str, float | int | None]]:
+        """
+        Helper method to execute a command on its own channel and wait for it to exit.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            user (str, optional): User to execute the command. If None, the user used to connect.
+            cmd_timeout (float, optional): Timeout to execute the command.
+            get_pty (bool, optional): Whether to run the command in a pseudo-terminal. Defaults to True.
+            decode (bool, optional): Whether to decode the outputs and strip their trailing whitespace. Defaults to True.
+            max_output_bytes (int, optional): Bytes of each output held in memory. If None, no limit. Defaults to None.
+            truncate (TruncatePolicy, optional): Part of an output kept past max_output_bytes. Defaults to "tail".
+            spill_to_disk (bool, optional): Whether to spill an output past max_output_bytes to a temporary file
+                instead of truncating it. Defaults to False.
+            stdin (CmdInput, optional): Input streamed to the command while its output is drained. Defaults to None.
+
+        Returns:
+            tuple[int, CmdOutput, CmdOutput, dict[str, float | int | None]]: The exit code, the output and the error
+                output of the command, and its timing and size attributes of `CmdResponse`.
+        """
+        # Validates the policy before the command is started
+        out = OutputBuffer(max_output_bytes, truncate, spill_to_disk)
+        err = OutputBuffer(max_output_bytes, truncate, spill_to_disk)
+
+        start = time.perf_counter()
+        try:
+            channel = self._open_cmd_channel(cmd, user, cmd_timeout, get_pty)
+        except ChannelOpenError:
+            # The connection dropped after the liveness check, or was found half-open, the command never started
+            client = self._client
+            if self._closed or self._is_active(client):
+                raise
+            self._reconnect(client)
+            channel = self._open_cmd_channel(cmd, user, cmd_timeout, get_pty)
+        channel_open_time = time.perf_counter() - start
+
+        try:
+            feeder = None
+            if stdin is not None:
+                feeder = InputFeeder(channel, stdin)
+                feeder.start()
+            time_to_first_byte = self._drain_channel(channel, start, out, err)
+            ext_code = channel.recv_exit_status()
+            time_to_exit = time.perf_counter() - start
+            if feeder is not None:
+                feeder.join()
+        except BaseException:
+            out.close()
+            err.close()
+            raise
+        finally:
+            channel.close()
 
-        _, stdout, stderr = self._ssh.exec_command(
-            cmd, get_pty=True, timeout=cmd_timeout
+        timing = {
+            "channel_open_time": channel_open_time,
+            "time_to_first_byte": time_to_first_byte,
+            "time_to_exit": time_to_exit,
+            "bytes_received": out.received + err.received,
+            "truncated_bytes": out.truncated_bytes + err.truncated_bytes,
+        }
+        return (
+            ext_code,
+            self._output_value(out, decode),
+            self._output_value(err, decode),
+            timing,
         )
-        ext_code = stderr.channel.recv_exit_status()
-        out = stdout.read().decode("utf-8").rstrip()
 
-        # Sometimes cmd_err is empty, so it's used out instead
-        cmd_err = stderr.read().decode("utf-8").rstrip() or out
+    @staticmethod
+    def _drain_channel(
+        channel: Channel, start: float, out: OutputBuffer, err: OutputBuffer
+    ) -> float | None:
+        """
+        Helper method to read the output and the error output of a channel until EOF.
+
+        Both are read as they arrive: the flow control window of the channel is shared by the two streams,
+        so leaving one of them unread until the other is over would stall a command writing a lot to it.
+
+        Args:
+            channel (Channel): The channel running the command.
+            start (float): `time.perf_counter()` at the start of the call, to time the first byte.
+            out (OutputBuffer): Buffer of the output.
+            err (OutputBuffer): Buffer of the error output.
+
+        Returns:
+            float | None: The seconds from `start` to the first byte received, or None if nothing was received.
+        """
+        time_to_first_byte = None
+        while True:
+            if channel.recv_ready():
+                out.write(channel.recv(_RECV_SIZE))
+            elif channel.recv_stderr_ready():
+                err.write(channel.recv_stderr(_RECV_SIZE))
+            elif channel.eof_received or channel.closed:
+                # Data may have arrived right before the EOF, between the checks above
+                if not (channel.recv_ready() or channel.recv_stderr_ready()):
+                    return time_to_first_byte
+                continue
+            else:
+                # Readable when data arrives on either stream, and once the channel reaches EOF
+                select.select([channel], [], [])
+                continue
+
+            if time_to_first_byte is None:
+                time_to_first_byte = time.perf_counter() - start
+
+    @staticmethod
+    def _output_value(buffer: OutputBuffer, decode: bool) -> CmdOutput:
+        """
+        Helper method to get the value of an output buffer, decoded if requested.
+
+        Args:
+            buffer (OutputBuffer): The buffer, once the stream is over.
+            decode (bool): Whether to decode the output and strip its trailing whitespace.
+
+        Returns:
+            CmdOutput: The output. Outputs spilled to disk are always returned as a memory map.
+        """
+        if not decode or buffer.spilled:
+            return buffer.getvalue()
+        # A truncation can split a multi-byte character
+        errors = "replace" if buffer.truncated_bytes else "strict"
+        return buffer.decode(errors).rstrip()
+
+    def _open_cmd_channel(
+        self,
+        cmd: str,
+        user: str | None,
+        cmd_timeout: float | None,
+        get_pty: bool = True,
+    ) -> Channel:
+        """
+        Helper method to open a channel and start a command on it.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            user (str, optional): User to execute the command. If None, the user used to connect.
+            cmd_timeout (float, optional): Timeout to open the channel.
+            get_pty (bool, optional): Whether to request a pseudo-terminal for the command. Defaults to True.
+
+        Returns:
+            Channel: The channel running the command.
+
+        Raises:
+            ChannelOpenError: If the channel can't be opened, so the command was not started.
+        """
+        transport = self._ssh.get_transport()
+        start = time.monotonic()
+        try:
+            channel = transport.open_session(timeout=cmd_timeout)
+        except (SSHException, OSError) as e:
+            timeout = transport.channel_timeout if cmd_timeout is None else cmd_timeout
+            if transport.is_active() and time.monotonic() - start >= timeout:
+                # The server did not even refuse the channel: the connection is half-open, e.g. the
+                # host vanished or a firewall dropped it. Closing it lets the caller reopen it
+                transport.close()
+            # Paramiko only reports a ChannelException to one of the threads whose channel
+            # was refused, the others get a generic SSHException
+            raise ChannelOpenError(f"Unable to open a channel to {self.host}: {e}") from e
+        if get_pty:
+            channel.get_pty()
+        channel.exec_command(self._wrap_cmd(cmd, user))
+        return channel
 
+    def _reconnect(self, stale_client: SSHClient) -> None:
+        """
+        Helper method to replace a dead connection, retrying with an exponential backoff.
+
+        The SFTP session is reopened too, and the persistent shells are restarted on their next use.
+        If another thread already replaced the connection, nothing is done.
+
+        Args:
+            stale_client (SSHClient): The dead client.
+
+        Raises:
+            ConnectionError: If the connection is still dead after `max_reconnect_attempts` attempts,
+                or reconnecting is disabled.
+        """
+        with self._connect_lock:
+            if self._client is not stale_client:
+                return None
+            if self.max_reconnect_attempts <= 0:
+                raise ConnectionError(f"The connection to {self.host} is closed")
+
+            had_sftp = self._sftp_client is not None
+            self._sftp_client = None
+            stale_client.close()
+            self._client = None
+            for attempt in range(self.max_reconnect_attempts):
+                if attempt:
+                    time.sleep(self.reconnect_backoff * 2 ** (attempt - 1))
+                try:
+                    self.connect()
+                    break
+                except ConnectionError:
+                    if attempt == self.max_reconnect_attempts - 1:
+                        raise
+            self._reconnect_count += 1
+            # The host may have rebooted, or another host taken over its address
+            self._result_cache.invalidate()
+            if had_sftp:
+                self._sftp_client = self._client.open_sftp()
+
+    @contextmanager
+    def _observe(self, kind: str, **details) -> Iterator[SSHEvent]:
+        """
+        Helper context manager measuring an operation and reporting it to the observers.
+
+        The body fills in the details only known at the end, such as the response or the bytes transferred.
+        Operations recorded by a batch are not reported, since they are not executed.
+
+        Args:
+            kind (str): Kind of operation.
+            **details: Other attributes of the event, such as the command or the remote path.
+
+        Yields:
+            SSHEvent: The event reported when the body exits.
+        """
+        event = SSHEvent(kind, self.host, self.port, **details)
+        if not self.observers or self._cmd_interceptor is not None:
+            yield event
+            return None
+
+        event.operation = self._caller_operation()
+        start = time.perf_counter()
+        try:
+            yield event
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            event.duration = time.perf_counter() - start
+            for observer in self.observers:
+                try:
+                    observer.on_event(event)
+                except Exception:
+                    # A broken observer must not break the operation
+                    pass
+
+    def _caller_operation(self) -> str | None:
+        """
+        Helper method to find the outermost public method of this object in the call stack,
+        to attribute an operation to the helper method that triggered it.
+
+        Returns:
+            str | None: The name of the method, or None if the operation was not triggered by a public method.
+        """
+        operation = None
+        frame = sys._getframe(1)
+        while frame is not None:
+            if frame.f_locals.get("self") is self and not frame.f_code.co_name.startswith("_"):
+                operation = frame.f_code.co_name
+            frame = frame.f_back
+        return operation
+
+    def _get_shell_session(self, user: str | None) -> ShellSession:
+        """
+        Helper method to get the persistent shell of a user, starting it if it's not running.
+
+        Args:
+            user (str, optional): User the shell runs as. If None, the user used to connect.
+
+        Returns:
+            ShellSession: The running shell of the user.
+        """
+        with self._shell_sessions_lock:
+            session = self._shell_sessions.get(user)
+            if session is None or not session.is_alive:
+                session = ShellSession(self._ssh, user)
+                self._shell_sessions[user] = session
+            return session
+
+    @staticmethod
+    def _is_active(client: SSHClient) -> bool:
+        """
+        Helper method to check, without any round trip, that the transport of a client is still running.
+
+        Args:
+            client (SSHClient): The client to check.
+
+        Returns:
+            bool: True if the transport is active, False otherwise.
+        """
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @staticmethod
+    def _wrap_cmd(cmd: str, user: str | None) -> str:
+        """
+        Helper method to wrap a command so it's executed as the given user.
+
+        Args:
+            cmd (str): Command to execute on the remote host.
+            user (str, optional): User to execute the command. If None, the command is returned unchanged.
+
+        Returns:
+            str: The command, prefixed with `sudo` for root or `sudo su - user -c` for other users.
+        """
+        if not user:
+            return cmd
+
+        user = shlex.quote(user)  # Shell-escape the user
+        return (
+            f"sudo {cmd}"
+            if user == "root"
+            else f"""sudo /usr/bin/su - {user} -c "{cmd}" """
+        )
+
+    @staticmethod
+    def _cmd_response(
+        ext_code: int,
+        out: CmdOutput,
+        cmd_err: CmdOutput,
+        raise_exception: bool,
+        custom_exception: Type[Exception],
+        err_message: str | None,
+        timing: dict[str, float | int | None] | None = None,
+        err: CmdOutput | None = None,
+    ) -> CmdResponse:
+        """
+        Helper method to build the response of a command, raising if it failed and raise_exception is True.
+
+        Args:
+            ext_code (int): Exit code of the command.
+            out (CmdOutput): Output of the command.
+            cmd_err (CmdOutput): Error output of the command, used as output when the command failed.
+            raise_exception (bool): Whether to raise an exception if the exit code is not 0.
+            custom_exception (Type[Exception]): Exception to raise.
+            err_message (str, optional): Error message of the exception. If None, cmd_err is used.
+            timing (dict[str, float | int | None], optional): Timing and size attributes of the response, if measured.
+            err (CmdOutput, optional): Error output kept apart, for commands run without a PTY. Defaults to None.
+
+        Returns:
+            CmdResponse: Object with the output and exit code of the command.
+
+        Raises:
+            custom_exception: Raised if the exit code is not 0 and raise_exception is True.
+        """
         if ext_code == 0:
-            return CmdResponse(ext_code, out)
+            return CmdResponse(ext_code, out, err=err, **(timing or {}))
 
         if raise_exception:
+            if isinstance(cmd_err, mmap.mmap):
+                # Only the end of an output spilled to disk makes a sensible message
+                cmd_err = cmd_err[-_ERROR_TAIL_SIZE:]
+            if isinstance(cmd_err, bytes):
+                cmd_err = cmd_err.decode("utf-8", errors="replace").rstrip()
             raise custom_exception(err_message or cmd_err)
 
-        return CmdResponse(ext_code, cmd_err)
+        return CmdResponse(ext_code, cmd_err, err=err, **(timing or {}))
 
-    def _connects(self) -> None:
+    def _connects(self, client: SSHClient) -> None:
         """
         Establish an SSH connection to the remote host using the SSH client object.
 
         This method initializes the SSH connection with the provided host, username,
-        and other authentication details. It does not take any parameters and does
-        not return any value.
+        and other authentication details. It does not return any value.
+
+        Args:
+            client (SSHClient): The SSH client to connect.
 
         Raises:
             AuthenticationException: If authentication fails.
@@ -203,22 +1159,28 @@ class BaseSSH:
 
             # Load the private key if provided, else use password
             if self.pkey:
-                private_key = RSAKey(filename=self.pkey)
-                self._ssh.connect(
+                private_key = load_private_key(self.pkey)
+                client.connect(
                     hostname=self.host,
+                    port=self.port,
                     username=self.username,
                     pkey=private_key,
                     timeout=self.timeout,
                     auth_timeout=self.auth_timeout,
+                    compress=self._transport_profile.compress,
+                    transport_factory=self._transport_profile.transport_factory(),
                 )
                 return None
 
-            self._ssh.connect(
+            client.connect(
                 hostname=self.host,
+                port=self.port,
                 username=self.username,
                 password=self.password,
                 timeout=self.timeout,
                 auth_timeout=self.auth_timeout,
+                compress=self._transport_profile.compress,
+                transport_factory=self._transport_profile.transport_factory(),
             )
             return None
 
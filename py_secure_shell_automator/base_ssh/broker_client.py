@@ -0,0 +1,154 @@
+"""
+Provides the BrokerClient class, which sends requests to an SSHBroker over its Unix domain socket.
+"""
+
+import base64
+import json
+import mmap
+import os
+import socket
+import tempfile
+from typing import Any
+from .exceptions import BrokerError
+
+# Exceptions raised in the broker that are raised again, with the same type, in the client
+_KNOWN_ERRORS: dict[str, type[Exception]] = {
+    "ConnectionError": ConnectionError,
+    "TimeoutError": TimeoutError,
+}
+
+
+class BrokerClient:
+    """
+    Client side of the broker protocol: one JSON object per line, each request answered by one response.
+
+    A new connection to the socket is used for every request, so a client can be shared by many threads.
+
+    Attributes:
+        socket_path (str): Path to the Unix domain socket of the broker.
+        connection (dict[str, Any]): Parameters of the SSH connection the requests are run on.
+    """
+
+    def __init__(self, socket_path: str, connection: dict[str, Any]) -> None:
+        self.socket_path = socket_path
+        self.connection = connection
+
+    def request(self, op: str, **params) -> dict[str, Any]:
+        """
+        Send a request to the broker and wait for its response.
+
+        Args:
+            op (str): Operation to run in the broker.
+            **params: Parameters of the operation.
+
+        Returns:
+            dict[str, Any]: The response of the broker.
+
+        Raises:
+            BrokerError: If the broker can't be reached or the operation failed in the broker.
+            ConnectionError: If the broker could not connect to the remote host.
+            TimeoutError: If the operation timed out in the broker.
+        """
+        payload = json.dumps({"op": op, "connection": self.connection, **params})
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.socket_path)
+                sock.sendall(payload.encode("utf-8") + b"\n")
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+        except OSError as e:
+            raise BrokerError(f"Error communicating with the broker at {self.socket_path}: {e}")
+
+        if not line:
+            raise BrokerError(f"The broker at {self.socket_path} closed the connection")
+
+        response = json.loads(line)
+        if "error" in response:
+            raise _KNOWN_ERRORS.get(response.get("type"), BrokerError)(response["error"])
+        return response
+
+    @staticmethod
+    def encode_output(output: str | bytes | mmap.mmap) -> str | dict[str, str]:
+        """
+        Encode the output of a command for a response of the broker.
+
+        JSON can't carry bytes, so they are sent base64-encoded, and outputs spilled to disk are handed
+        over as a temporary file, which the client maps and removes.
+
+        Args:
+            output (str | bytes | mmap.mmap): The output.
+
+        Returns:
+            str | dict[str, str]: The output, or {"base64": ...} or {"path": ...}.
+        """
+        if isinstance(output, mmap.mmap):
+            with output, tempfile.NamedTemporaryFile(
+                prefix="py_ssh_output_", delete=False
+            ) as f:
+                f.write(output)
+            return {"path": f.name}
+        if isinstance(output, bytes):
+            return {"base64": base64.b64encode(output).decode("ascii")}
+        return output
+
+    @staticmethod
+    def decode_output(output: str | dict[str, str]) -> str | bytes | mmap.mmap:
+        """
+        Decode the output of a command encoded by `encode_output`.
+
+        Args:
+            output (str | dict[str, str]): The encoded output.
+
+        Returns:
+            str | bytes | mmap.mmap: The output.
+        """
+        if isinstance(output, str):
+            return output
+        if "base64" in output:
+            return base64.b64decode(output["base64"])
+        with open(output["path"], "rb") as f:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        os.unlink(output["path"])
+        return view
+
+
+class BrokerSFTP:
+    """
+    Stand-in for the SFTP session of a connection routed through a broker.
+
+    The broker runs on the same machine, so it reads and writes the local files directly.
+    Local paths are made absolute, since the broker may run in another working directory.
+    """
+
+    def __init__(self, broker: BrokerClient) -> None:
+        self._broker = broker
+
+    def put(self, localpath: str, remotepath: str) -> None:
+        """
+        Copy a local file to the remote host, through the broker.
+
+        Args:
+            localpath (str): Path to the local file.
+            remotepath (str): Path to the file on the remote host.
+        """
+        self._broker.request(
+            "sftp_put", local_path=os.path.abspath(localpath), remote_path=remotepath
+        )
+
+    def get(self, remotepath: str, localpath: str) -> None:
+        """
+        Copy a file from the remote host to a local file, through the broker.
+
+        Args:
+            remotepath (str): Path to the file on the remote host.
+            localpath (str): Path to the local file.
+        """
+        self._broker.request(
+            "sftp_get", remote_path=remotepath, local_path=os.path.abspath(localpath)
+        )
+
+    def close(self) -> None:
+        """
+        Nothing to close, the SFTP session belongs to the broker.
+        """
+        return None
@@ -0,0 +1,187 @@
+"""
+Provides the CmdStream class, an iterator over the output of a remote command as it arrives.
+"""
+
+import codecs
+import select
+from typing import Iterator, Type
+from paramiko import Channel
+
+# Bytes of the end of the output kept to build the error message of a failed command
+_ERROR_TAIL_SIZE = 4096
+
+
+class _OutputSplitter:
+    """
+    Splits the chunks received from a channel into decoded lines, or passes them through as bytes.
+
+    Only the end of the output is retained, to build the error message of a failed command,
+    so the memory used is bounded by the longest line.
+    """
+
+    def __init__(self, lines: bool) -> None:
+        self.lines = lines
+        self.tail = bytearray()
+        self.error_tail = bytearray()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._pending = ""
+
+    def feed(self, chunk: bytes) -> list[str | bytes]:
+        """
+        Feed a chunk of output.
+
+        Args:
+            chunk (bytes): Bytes received from the channel.
+
+        Returns:
+            list[str | bytes]: The complete lines in the chunk, or the chunk itself in bytes mode.
+        """
+        self.tail += chunk
+        del self.tail[:-_ERROR_TAIL_SIZE]
+        if not self.lines:
+            return [chunk]
+
+        *lines, self._pending = (self._pending + self._decoder.decode(chunk)).split("\n")
+        return [line.rstrip("\r") for line in lines]
+
+    def feed_error(self, chunk: bytes) -> None:
+        """
+        Feed a chunk of error output, received separately when the command runs without a PTY.
+
+        Args:
+            chunk (bytes): Bytes received from the error stream of the channel.
+        """
+        self.error_tail += chunk
+        del self.error_tail[:-_ERROR_TAIL_SIZE]
+
+    def flush(self) -> list[str | bytes]:
+        """
+        Flush the last line, which may not end with a newline.
+
+        Returns:
+            list[str | bytes]: The last line, if any.
+        """
+        if not self.lines:
+            return []
+        last_line = (self._pending + self._decoder.decode(b"", final=True)).rstrip("\r")
+        self._pending = ""
+        return [last_line] if last_line else []
+
+    def error_message(self, ext_code: int) -> str:
+        """
+        Build the error message of a failed command from the end of its error output, or of its output.
+
+        Args:
+            ext_code (int): Exit code of the command.
+
+        Returns:
+            str: The end of the error output or of the output, or a generic message if the command had none.
+        """
+        return (self.error_tail or self.tail).decode("utf-8", errors="replace").rstrip() or (
+            f"Command failed with exit code {ext_code}"
+        )
+
+
+class CmdStream:
+    """
+    Iterator over the output of a remote command, yielding it as it arrives instead of after the command exits.
+
+    Only the current chunk is held in memory, so outputs of any size can be processed. Once the iteration
+    is over, `ext_code` holds the exit code of the command. If the exit code is not 0 and raise_exception is
+    True, the exception is raised when the iteration ends.
+
+    Attributes:
+        ext_code (int | None): The exit code of the command, or None while it is still running.
+
+    Example:
+        ```python
+        stream = py_ssh.stream_cmd(cmd='journalctl --no-pager')
+        for line in stream:
+            if 'error' in line:
+                print(line)
+        print(stream.ext_code)  # Output: 0
+        ```
+    """
+
+    def __init__(
+        self,
+        channel: Channel,
+        lines: bool,
+        chunk_size: int,
+        raise_exception: bool,
+        custom_exception: Type[Exception],
+        err_message: str | None,
+    ) -> None:
+        self.ext_code: int | None = None
+        self._channel = channel
+        self._chunk_size = chunk_size
+        self._splitter = _OutputSplitter(lines)
+        self._raise_exception = raise_exception
+        self._custom_exception = custom_exception
+        self._err_message = err_message
+        self._iterator = self._read()
+
+    def __iter__(self) -> "CmdStream":
+        return self
+
+    def __next__(self) -> str | bytes:
+        return next(self._iterator)
+
+    def __enter__(self) -> "CmdStream":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop reading and close the channel. The remote command receives a SIGPIPE on its next write.
+
+        Example:
+            >>> with py_ssh.stream_cmd(cmd='tail -f /var/log/syslog') as stream:
+                    for line in stream:
+                        if 'ready' in line:
+                            break
+        """
+        self._iterator.close()
+        self._channel.close()
+
+    def _read(self) -> Iterator[str | bytes]:
+        """
+        Generator reading the channel until EOF, then collecting the exit code.
+
+        The error output of a command run without a PTY is read as it arrives too, since the flow control window
+        of the channel is shared by both streams, and only its end is kept, for the error message.
+
+        Yields:
+            str | bytes: Lines or chunks of the output.
+
+        Raises:
+            custom_exception: Raised at the end if the exit code is not 0 and raise_exception is True.
+            TimeoutError: Raised if nothing is received for the timeout of the channel.
+        """
+        channel = self._channel
+        try:
+            while True:
+                if channel.recv_ready():
+                    yield from self._splitter.feed(channel.recv(self._chunk_size))
+                elif channel.recv_stderr_ready():
+                    self._splitter.feed_error(channel.recv_stderr(self._chunk_size))
+                elif channel.eof_received or channel.closed:
+                    # Data may have arrived right before the EOF, between the checks above
+                    if not (channel.recv_ready() or channel.recv_stderr_ready()):
+                        break
+                # Readable when data arrives on either stream, and once the channel reaches EOF
+                elif not select.select([channel], [], [], channel.gettimeout())[0]:
+                    raise TimeoutError(
+                        f"No output received for {channel.gettimeout()} seconds"
+                    )
+            yield from self._splitter.flush()
+            self.ext_code = self._channel.recv_exit_status()
+        finally:
+            self._channel.close()
+
+        if self.ext_code != 0 and self._raise_exception:
+            raise self._custom_exception(
+                self._err_message or self._splitter.error_message(self.ext_code)
+            )
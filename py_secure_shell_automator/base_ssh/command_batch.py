@@ -0,0 +1,285 @@
+"""
+Provides the CommandBatch class, which sends many queued operations to the remote host in a single round trip.
+"""
+
+import copy
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable
+from .exceptions import BatchError
+from .shell_session import ShellSession
+from ..models import CmdResponse
+
+if TYPE_CHECKING:
+    from .base_ssh import BaseSSH
+
+
+class _NotBatchable(BaseException):
+    """
+    Raised when a queued operation touches the connection directly instead of going through `run_cmd`.
+
+    It derives from BaseException so the `except Exception` blocks of the operations don't swallow it.
+    """
+
+
+class _Unavailable:
+    """
+    Stand-in for the SSH and SFTP clients while an operation is recorded.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        raise _NotBatchable(name)
+
+
+class BatchResult:
+    """
+    Result of an operation queued in a batch, available once the batch is executed.
+
+    Attributes:
+        cmd_responses (list[CmdResponse]): Exit codes and outputs of the batched commands of the operation, once executed.
+
+    Example:
+        ```python
+        with py_ssh.batch() as batch:
+            content = batch.get_file_content('/etc/hostname')
+        print(content.result())  # Output: 'hostname'
+        ```
+    """
+
+    def __init__(self) -> None:
+        self.cmd_responses = []
+        self._done = False
+        self._value = None
+        self._exception: Exception | None = None
+
+    @property
+    def done(self) -> bool:
+        """
+        Returns whether the batch containing the operation was executed.
+
+        Returns:
+            bool: True if the result is available, False otherwise.
+        """
+        return self._done
+
+    def result(self) -> Any:
+        """
+        Returns the value returned by the operation, or raises the exception it raised.
+
+        Returns:
+            Any: The value returned by the operation.
+
+        Raises:
+            BatchError: If the batch was not executed yet, or the operation was skipped because of a previous failure.
+            Exception: The exception raised by the operation.
+
+        Example:
+            >>> processes = result.result()
+        """
+        if not self._done:
+            raise BatchError("The batch was not executed yet")
+        if self._exception is not None:
+            raise self._exception
+        return self._value
+
+    def exception(self) -> Exception | None:
+        """
+        Returns the exception raised by the operation, if any.
+
+        Returns:
+            Exception | None: The exception raised by the operation, or None if it succeeded.
+
+        Example:
+            >>> if result.exception() is not None:
+                    print(f"Step failed: {result.exception()}")
+        """
+        if not self._done:
+            raise BatchError("The batch was not executed yet")
+        return self._exception
+
+
+class CommandBatch:
+    """
+    Queue of operations sent to the remote host as a single script, in one round trip.
+
+    Any public method of the wrapped object built on `run_cmd` can be queued by calling it on the batch,
+    with the same arguments. Each call returns a `BatchResult`, filled in once the batch is executed.
+
+    Operations are recorded when they are queued, by running them against a stand-in of `run_cmd`, and
+    replayed with the real outputs once the script has run, so they return values and raise exceptions
+    exactly as they would have if called directly. Operations that use the connection directly, such as
+    SFTP transfers, can't be queued.
+
+    Attributes:
+        cmd_timeout (float, optional): Timeout to execute the whole batch. If None, wait forever.
+        stop_on_error (bool): If True, the operations following the first failed command are not executed.
+
+    Example:
+        ```python
+        with py_ssh.batch() as batch:
+            batch.create_directory('/opt/app', run_as_root=True)
+            batch.change_owner('/opt/app', 'app', run_as_root=True)
+            version = batch.get_file_content('/opt/app/VERSION')
+        print(version.result())
+        ```
+    """
+
+    def __init__(
+        self, ssh: "BaseSSH", cmd_timeout: float | None = 60, stop_on_error: bool = False
+    ) -> None:
+        self.cmd_timeout = cmd_timeout
+        self.stop_on_error = stop_on_error
+        self._ssh = ssh
+        self._calls: list[tuple[str, tuple, dict, list[tuple[str, str | None]], BatchResult]] = []
+        self._executed = False
+
+    def __enter__(self) -> "CommandBatch":
+        return self
+
+    def __exit__(self, exc_type, *_) -> None:
+        if exc_type is None:
+            self.execute()
+
+    def __getattr__(self, name: str) -> Callable[..., BatchResult]:
+        method = getattr(self._ssh, name)
+        if name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs) -> BatchResult:
+            return self._queue(name, args, kwargs)
+
+        return queue
+
+    def execute(self) -> None:
+        """
+        Send every queued operation in a single script and fill in their results.
+
+        Called automatically when the `with` block exits without an exception.
+
+        Raises:
+            BatchError: If the batch was already executed.
+            ShellSessionError: If the remote shell exited unexpectedly.
+            TimeoutError: If the batch did not finish before cmd_timeout.
+
+        Example:
+            >>> batch = py_ssh.batch()
+            >>> batch.remove_file('/tmp/file.txt')
+            >>> batch.execute()
+        """
+        if self._executed:
+            raise BatchError("The batch was already executed")
+        self._executed = True
+
+        steps = [step for *_, call_steps, _ in self._calls for step in call_steps]
+        if not steps:
+            return None
+
+        session = ShellSession(self._ssh._ssh)
+        try:
+            outputs = session.run_many(
+                [self._ssh._wrap_cmd(cmd, user) for cmd, user in steps],
+                cmd_timeout=self.cmd_timeout,
+                stop_on_error=self.stop_on_error,
+            )
+        finally:
+            session.close()
+
+        outputs = deque(outputs)
+        for name, args, kwargs, call_steps, result in self._calls:
+            call_outputs = deque(
+                outputs.popleft() for _ in range(min(len(call_steps), len(outputs)))
+            )
+            if len(call_outputs) < len(call_steps):
+                result._exception = BatchError(
+                    f"{name} was not executed because a previous command failed"
+                )
+            else:
+                self._replay(name, args, kwargs, call_outputs, result)
+            result._done = True
+
+    def _queue(self, name: str, args: tuple, kwargs: dict) -> BatchResult:
+        """
+        Record the commands run by an operation and queue it.
+
+        Args:
+            name (str): Name of the method.
+            args (tuple): Positional arguments of the call.
+            kwargs (dict): Keyword arguments of the call.
+
+        Returns:
+            BatchResult: The result of the operation, filled in once the batch is executed.
+
+        Raises:
+            BatchError: If the batch was already executed, or the operation can't be batched.
+        """
+        if self._executed:
+            raise BatchError("The batch was already executed")
+
+        steps: list[tuple[str, str | None]] = []
+
+        def record(cmd: str, user: str | None) -> tuple[int, str]:
+            steps.append((cmd, user))
+            return 0, ""
+
+        recorder = self._stand_in(record)
+        recorder._client = _Unavailable()
+        recorder._sftp_client = _Unavailable()
+        try:
+            getattr(recorder, name)(*args, **kwargs)
+        except _NotBatchable:
+            raise BatchError(f"{name} does not run through run_cmd and can't be batched")
+        except Exception:
+            # The operation could not parse the placeholder output, the commands are recorded anyway
+            pass
+
+        result = BatchResult()
+        self._calls.append((name, args, kwargs, steps, result))
+        return result
+
+    def _replay(
+        self,
+        name: str,
+        args: tuple,
+        kwargs: dict,
+        outputs: deque[tuple[int, str]],
+        result: BatchResult,
+    ) -> None:
+        """
+        Run an operation again, feeding it the real outputs of its commands.
+
+        If the operation needs more commands than it recorded, because its flow depends on the outputs,
+        the extra commands are executed normally.
+
+        Args:
+            name (str): Name of the method.
+            args (tuple): Positional arguments of the call.
+            kwargs (dict): Keyword arguments of the call.
+            outputs (deque[tuple[int, str]]): Exit codes and outputs of the recorded commands.
+            result (BatchResult): The result to fill in.
+        """
+        def replay(cmd: str, user: str | None) -> tuple[int, str] | None:
+            if not outputs:
+                return None
+            ext_code, out = outputs.popleft()
+            out = out.rstrip()
+            result.cmd_responses.append(CmdResponse(ext_code, out))
+            return ext_code, out
+
+        try:
+            result._value = getattr(self._stand_in(replay), name)(*args, **kwargs)
+        except Exception as e:
+            result._exception = e
+
+    def _stand_in(self, interceptor: Callable) -> "BaseSSH":
+        """
+        Helper method to build a copy of the wrapped object whose `run_cmd` goes through the interceptor.
+
+        Args:
+            interceptor (Callable): Called with the command and user, returns the exit code and output to use,
+                or None to execute the command normally.
+
+        Returns:
+            BaseSSH: The copy of the wrapped object.
+        """
+        stand_in = copy.copy(self._ssh)
+        stand_in._cmd_interceptor = interceptor
+        return stand_in
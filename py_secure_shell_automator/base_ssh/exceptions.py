@@ -2,6 +2,8 @@
 Module containing custom exceptions for the py_secure_shell_automator module
 """
 
+from paramiko import SSHException
+
 
 class CmdError(Exception):
     """
@@ -17,3 +19,35 @@ class AuthenticationError(Exception):
     """
 
     ...
+
+
+class ShellSessionError(Exception):
+    """
+    Raised when a persistent shell session exits unexpectedly.
+    """
+
+    ...
+
+
+class BatchError(Exception):
+    """
+    Raised when an operation can't be batched, or was not executed because the batch stopped before it.
+    """
+
+    ...
+
+
+class BrokerError(Exception):
+    """
+    Raised when the SSH broker can't be reached or fails to serve a request.
+    """
+
+    ...
+
+
+class ChannelOpenError(SSHException):
+    """
+    Raised when the channel of a command can't be opened, so the command was not started.
+    """
+
+    ...
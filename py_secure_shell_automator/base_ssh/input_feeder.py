@@ -0,0 +1,106 @@
+"""
+Provides the InputFeeder class, which streams the input of a command to its channel in a background thread.
+"""
+
+import threading
+from typing import BinaryIO, Iterable, Iterator
+from paramiko import Channel
+
+# Input of a command: bytes, a binary file object, or an iterable of chunks of bytes
+CmdInput = bytes | bytearray | memoryview | BinaryIO | Iterable[bytes]
+
+# Bytes read from a file object at once
+_CHUNK_SIZE = 256 * 1024
+
+
+def iter_input(stdin: CmdInput, chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Split the input of a command into chunks of bytes, reading file objects lazily.
+
+    Args:
+        stdin (CmdInput): The input.
+        chunk_size (int, optional): Size of the chunks read from bytes and file objects. Defaults to 256 KiB.
+
+    Yields:
+        bytes: The chunks of the input.
+
+    Raises:
+        TypeError: If the input, or one of its chunks, is not bytes.
+    """
+    if isinstance(stdin, (bytes, bytearray, memoryview)):
+        view = memoryview(stdin)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start : start + chunk_size])
+        return None
+    if hasattr(stdin, "read"):
+        while chunk := stdin.read(chunk_size):
+            if not isinstance(chunk, bytes):
+                raise TypeError("stdin must be opened in binary mode")
+            yield chunk
+        return None
+    for chunk in stdin:
+        if not isinstance(chunk, (bytes, bytearray, memoryview)):
+            raise TypeError(f"stdin chunks must be bytes, not {type(chunk).__name__}")
+        yield bytes(chunk)
+
+
+class InputFeeder:
+    """
+    Sends the input of a command to its channel in a background thread, then closes the write side
+    of the channel, so the remote process sees the end of its input.
+
+    Sending waits for the flow control window of the channel, so the input is read no faster than the
+    remote process consumes it, and only one chunk is held in memory. The output must be drained at the
+    same time, otherwise a process writing while it reads would never get more input.
+
+    If the remote process exits without reading its whole input, the rest is silently dropped, like a
+    broken pipe.
+
+    Attributes:
+        channel (Channel): The channel running the command.
+        stdin (CmdInput): The input of the command.
+        bytes_sent (int): Bytes of input sent so far.
+    """
+
+    def __init__(self, channel: Channel, stdin: CmdInput) -> None:
+        self.channel = channel
+        self.stdin = stdin
+        self.bytes_sent = 0
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._feed, daemon=True)
+
+    def start(self) -> None:
+        """
+        Start sending the input.
+        """
+        self._thread.start()
+
+    def join(self) -> None:
+        """
+        Wait for the input to be sent.
+
+        Raises:
+            Exception: The error raised while reading the input or sending it, if any.
+        """
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _feed(self) -> None:
+        """
+        Helper method running in the background thread.
+        """
+        try:
+            for chunk in iter_input(self.stdin):
+                self.channel.sendall(chunk)
+                self.bytes_sent += len(chunk)
+            self.channel.shutdown_write()
+        except BaseException as e:
+            if isinstance(e, OSError) and (
+                self.channel.closed or self.channel.exit_status_ready()
+            ):
+                # The remote process exited, or the channel was closed, before the end of the input
+                return None
+            self._error = e
+            # The remote process would wait for the rest of its input forever
+            self.channel.close()
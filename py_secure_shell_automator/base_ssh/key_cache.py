@@ -0,0 +1,103 @@
+"""
+Provides process-wide caches of the parsed known_hosts files and private keys, shared by every connection.
+"""
+
+import os
+import threading
+from paramiko import HostKeys, PKey, RSAKey
+
+_lock = threading.Lock()
+# Path -> ((mtime_ns, size), parsed object). An entry is reused while the file is unchanged
+_host_keys: dict[str, tuple[tuple[int, int], HostKeys]] = {}
+_private_keys: dict[str, tuple[tuple[int, int], PKey]] = {}
+
+
+def load_host_keys(filename: str) -> HostKeys:
+    """
+    Load a known_hosts file, parsing it only if it changed since the last call.
+
+    The returned object is shared by every caller, so it must not be modified.
+
+    Args:
+        filename (str): Path to the known_hosts file. A missing file results in empty host keys.
+
+    Returns:
+        HostKeys: The host keys in the file.
+
+    Examples:
+        >>> host_keys = load_host_keys(os.path.expanduser('~/.ssh/known_hosts'))
+    """
+    try:
+        version = _file_version(filename)
+    except OSError:
+        return HostKeys()
+
+    with _lock:
+        cached = _host_keys.get(filename)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    # Parsed outside the lock, a concurrent parse of the same file just does the work twice
+    host_keys = HostKeys(filename)
+    with _lock:
+        _host_keys[filename] = (version, host_keys)
+    return host_keys
+
+
+def load_private_key(filename: str) -> PKey:
+    """
+    Load an RSA private key file, parsing it only if it changed since the last call.
+
+    Args:
+        filename (str): Path to the private key file.
+
+    Returns:
+        PKey: The private key.
+
+    Raises:
+        OSError: If the file can't be read.
+        SSHException: If the file is not a valid private key.
+
+    Examples:
+        >>> private_key = load_private_key('/path/to/id_rsa')
+    """
+    version = _file_version(filename)
+    with _lock:
+        cached = _private_keys.get(filename)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    private_key = RSAKey(filename=filename)
+    with _lock:
+        _private_keys[filename] = (version, private_key)
+    return private_key
+
+
+def clear_key_cache() -> None:
+    """
+    Forget every cached known_hosts file and private key, so they are parsed again on next use.
+
+    Changed files are detected by their modification time and size, so this is only needed
+    when a file is replaced keeping both.
+
+    Examples:
+        >>> from py_secure_shell_automator.base_ssh import clear_key_cache
+        >>> clear_key_cache()
+    """
+    with _lock:
+        _host_keys.clear()
+        _private_keys.clear()
+
+
+def _file_version(filename: str) -> tuple[int, int]:
+    """
+    Helper function to identify the current version of a file.
+
+    Args:
+        filename (str): Path to the file.
+
+    Returns:
+        tuple[int, int]: The modification time, in nanoseconds, and the size of the file.
+    """
+    stat = os.stat(filename)
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,33 @@
+"""
+Provides the SSHObserver class, the interface of the objects notified of every operation of a BaseSSH.
+"""
+
+from ..models import SSHEvent
+
+
+class SSHObserver:
+    """
+    Receives an event for every connection, command and SFTP transfer of the objects it's registered on.
+
+    Subclass it and override `on_event`. Events are reported from the thread that performed the operation,
+    so observers shared by several threads must be thread-safe. Exceptions raised by an observer are ignored.
+
+    Example:
+        ```python
+        class SlowCmdLogger(SSHObserver):
+            def on_event(self, event: SSHEvent) -> None:
+                if event.kind == 'run_cmd' and event.duration > 1:
+                    print(f"{event.host} {event.operation}: {event.cmd} took {event.duration:.2f}s")
+
+        py_ssh = PySecureShellAutomator(host='hostname', username='admin', password='admin_pass', observers=[SlowCmdLogger()])
+        ```
+    """
+
+    def on_event(self, event: SSHEvent) -> None:
+        """
+        Called once an operation is over, whether it succeeded or raised.
+
+        Args:
+            event (SSHEvent): The operation.
+        """
+        return None
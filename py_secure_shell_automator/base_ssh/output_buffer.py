@@ -0,0 +1,160 @@
+"""
+Provides the OutputBuffer class, which accumulates the output of a command within a memory cap.
+"""
+
+import mmap
+import tempfile
+from typing import Literal
+
+TruncatePolicy = Literal["head", "tail", "head+tail"]
+
+
+class OutputBuffer:
+    """
+    Accumulates the chunks of one output stream of a command, holding at most `max_bytes` of it in memory.
+
+    Past the cap, the output is either truncated, keeping its beginning (`head`), its end (`tail`) or
+    half of each (`head+tail`), or, with `spill_to_disk`, written as it arrives to an anonymous temporary
+    file, exposed at the end as a read-only memory map. The temporary file has no name, so it's removed
+    as soon as the map is closed or garbage collected.
+
+    Attributes:
+        max_bytes (int, optional): Bytes held in memory. If None, the whole output is held. Defaults to None.
+        truncate (TruncatePolicy, optional): Part of the output kept when it's truncated. Defaults to "tail".
+        spill_to_disk (bool, optional): Whether to write the output to a temporary file past the cap instead of
+            truncating it. Defaults to False.
+        received (int): Bytes received so far.
+        truncated_bytes (int): Bytes dropped by the truncation so far.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int | None = None,
+        truncate: TruncatePolicy = "tail",
+        spill_to_disk: bool = False,
+    ) -> None:
+        if truncate not in ("head", "tail", "head+tail"):
+            raise ValueError(f"Unknown truncate policy: {truncate}")
+        self.max_bytes = max_bytes
+        self.truncate = truncate
+        self.spill_to_disk = spill_to_disk
+        self.received = 0
+        self.truncated_bytes = 0
+        self._head = bytearray()
+        # End of the output with the head+tail policy, beginning or end of it otherwise
+        self._tail = bytearray()
+        self._file = None
+
+    def __len__(self) -> int:
+        return self.received
+
+    @property
+    def spilled(self) -> bool:
+        """
+        Whether the output was written to a temporary file.
+
+        Returns:
+            bool: True if the output exceeded the cap with `spill_to_disk`, False otherwise.
+        """
+        return self._file is not None
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Append a chunk of output.
+
+        Args:
+            chunk (bytes): Bytes received from the channel.
+        """
+        self.received += len(chunk)
+        if self._file is not None:
+            self._file.write(chunk)
+            return None
+        if self.max_bytes is None:
+            self._tail += chunk
+            return None
+
+        if self.spill_to_disk:
+            self._tail += chunk
+            if len(self._tail) > self.max_bytes:
+                self._file = tempfile.TemporaryFile(prefix="py_ssh_output_")
+                self._file.write(self._tail)
+                self._tail = bytearray()
+            return None
+
+        match self.truncate:
+            case "head":
+                kept = max(0, min(len(chunk), self.max_bytes - len(self._tail)))
+                self._tail += chunk[:kept]
+                self.truncated_bytes += len(chunk) - kept
+            case "tail":
+                self._tail += chunk
+                self._drop_front(self._tail, len(self._tail) - self.max_bytes)
+            case "head+tail":
+                kept = max(0, min(len(chunk), self.max_bytes // 2 - len(self._head)))
+                self._head += chunk[:kept]
+                self._tail += chunk[kept:]
+                self._drop_front(
+                    self._tail, len(self._tail) - (self.max_bytes - self.max_bytes // 2)
+                )
+
+    def getvalue(self) -> bytes | mmap.mmap:
+        """
+        Get the output received, once the stream is over.
+
+        Returns:
+            bytes | mmap.mmap: The output kept, or a read-only memory map of the temporary file if it was spilled.
+        """
+        if self._file is None:
+            # A single copy of the output, however large
+            if not self._head:
+                return bytes(self._tail)
+            return b"".join((self._head, self._tail))
+        self._file.flush()
+        # The map keeps its own reference to the file, which is removed once the map is released
+        view = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._file.close()
+        self._file = None
+        return view
+
+    def decode(self, errors: str = "strict") -> str:
+        """
+        Decode the output received from UTF-8, once the stream is over, without copying it into bytes first.
+
+        Args:
+            errors (str, optional): Handling of the decoding errors, as for `bytes.decode`. Defaults to "strict".
+
+        Returns:
+            str: The output kept.
+
+        Raises:
+            ValueError: If the output was spilled to disk.
+        """
+        if self._file is not None:
+            raise ValueError("The output was spilled to disk, use getvalue")
+        if not self._head:
+            return self._tail.decode("utf-8", errors=errors)
+        # The head and the tail add up to at most max_bytes
+        return (self._head + self._tail).decode("utf-8", errors=errors)
+
+    def close(self) -> None:
+        """
+        Remove the temporary file, if the output was spilled and `getvalue` was not called.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _drop_front(self, buffer: bytearray, size: int) -> None:
+        """
+        Helper method to drop bytes from the beginning of a buffer, counting them as truncated.
+
+        Deleting from the front of a bytearray is amortized constant time in CPython, so the buffer
+        acts as a ring of the last bytes received.
+
+        Args:
+            buffer (bytearray): The buffer.
+            size (int): Number of bytes to drop. Nothing is dropped if it's not positive.
+        """
+        if size > 0:
+            del buffer[:size]
+            self.truncated_bytes += size
@@ -0,0 +1,160 @@
+"""
+Provides the ResultCache class, which keeps the results of idempotent queries of a host, and the cached_query decorator.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+# Returned by lookup when there is no valid entry, since None is a valid result
+_MISSING = object()
+
+
+class ResultCache:
+    """
+    Cache of the results of the queries of a host whose answer almost never changes, such as its hostname
+    or its kernel version.
+
+    Each entry expires `ttl` seconds after it was stored, and once the cache holds `max_entries` entries,
+    the least recently used one is evicted to make room for a new one. The cache is thread safe. Two threads
+    missing the same entry at once both run the query, and the last one to finish stores its result.
+
+    Attributes:
+        ttl (float, optional): Seconds an entry stays valid, unless stored with a TTL of its own. Defaults to 300.
+        max_entries (int, optional): Maximum number of entries. If 0, nothing is cached. Defaults to 128.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups not answered from the cache.
+
+    Example:
+        ```python
+        cache = ResultCache(ttl=60, max_entries=16)
+        cache.put(('uname -r', None), '6.8.0-45-generic')
+        hit, kernel_version = cache.lookup(('uname -r', None))
+        ```
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 128) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Key -> (expiry time, result), least recently used first
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        Get the result stored for a key, if it has not expired.
+
+        Args:
+            key (Hashable): Key of the query. Its first item is the query, a command or a method name.
+
+        Returns:
+            tuple[bool, Any]: Whether a valid result was found, and the result, or None if not found.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, result: Any, ttl: float | None = None) -> None:
+        """
+        Store the result of a query, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Hashable): Key of the query. Its first item is the query, a command or a method name.
+            result (Any): Result of the query.
+            ttl (float, optional): Seconds the result stays valid. If None, the `ttl` of the cache. Defaults to None.
+        """
+        if self.max_entries <= 0:
+            return None
+        expiry = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expiry, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, query: str | None = None) -> int:
+        """
+        Forget the results of a query, whatever its arguments, or every result.
+
+        Args:
+            query (str, optional): A command cached by `run_cmd`, or the name of a method decorated with `cached_query`.
+                If None, every result is forgotten. Defaults to None.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            if query is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [key for key in self._entries if key[0] == query]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+
+def cached_query(ttl: float | None = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator caching the result of a method of `BaseSSH` or of a subclass, in the result cache of the object,
+    per combination of arguments.
+
+    Only declare as cached the queries whose answer almost never changes. Exceptions are not cached, and the
+    arguments must be hashable. Put it below `@property` to cache a property. While a `batch` is recorded,
+    the method is always run.
+
+    Args:
+        ttl (float, optional): Seconds a result stays valid. If None, the `cache_ttl` of the object. Defaults to None.
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator.
+
+    Examples:
+        >>> from py_secure_shell_automator.base_ssh import cached_query
+        >>> class MyAutomator(PySecureShellAutomator):
+                @cached_query(ttl=3600)
+                def get_cpu_count(self) -> int:
+                    return int(self.run_cmd('nproc').out)
+        >>> py_ssh = MyAutomator(host='hostname', username='admin', password='admin_pass')
+        >>> py_ssh.get_cpu_count()  # Runs nproc
+        >>> py_ssh.get_cpu_count()  # Answered from the cache
+        >>> py_ssh.invalidate_cache('get_cpu_count')
+    """
+
+    def decorator(method: Callable) -> Callable:
+        name = method.__name__
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs) -> Any:
+            if self._cmd_interceptor is not None:
+                return method(self, *args, **kwargs)
+            # Bound to the parameters, so get_os_version() and get_os_version(run_as_root=False) share a result
+            arguments = signature.bind(self, *args, **kwargs)
+            arguments.apply_defaults()
+            key = (name, tuple(arguments.arguments.items())[1:])
+            hit, result = self._result_cache.lookup(key)
+            if hit:
+                return result
+            result = method(self, *args, **kwargs)
+            self._result_cache.put(key, result, ttl)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,190 @@
+"""
+Provides the ShellSession class, a long-lived remote shell that runs commands one after another.
+"""
+
+import re
+import shlex
+import socket
+import threading
+import time
+import uuid
+from paramiko import SSHClient
+from .exceptions import ShellSessionError
+
+# Bytes of the shell's own stderr kept to explain why a session died
+_STDERR_TAIL_SIZE = 4096
+
+
+class ShellSession:
+    """
+    A shell kept open on the remote host, optionally already running as another user, that executes
+    commands sent through its stdin.
+
+    Every command is followed by a unique sentinel line carrying its exit code, which delimits its output.
+    Compared to `run_cmd`, this saves opening a channel, allocating a PTY and, when running as another user,
+    spawning `sudo` and a `su` login shell for every command.
+
+    Each command runs in its own `/bin/sh -c` with stdin redirected from /dev/null and stderr merged into
+    stdout, so a command can't read the following ones or break the framing, and state such as the current
+    directory is not shared between commands, as with `run_cmd`.
+
+    Attributes:
+        user (str | None): User the shell runs as. If None, the user used to connect.
+    """
+
+    def __init__(self, client: SSHClient, user: str | None = None) -> None:
+        self.user = user
+        self._lock = threading.Lock()
+        self._stderr_tail = bytearray()
+        self._channel = client.get_transport().open_session()
+        self._channel.exec_command(self._shell_cmd(user))
+
+    @property
+    def is_alive(self) -> bool:
+        """
+        Returns whether the remote shell is still running.
+
+        Returns:
+            bool: True if the shell can accept commands, False otherwise.
+        """
+        return not (
+            self._channel.closed
+            or self._channel.eof_received
+            or self._channel.exit_status_ready()
+        )
+
+    def run(self, cmd: str, cmd_timeout: float | None = 10) -> tuple[int, str]:
+        """
+        Execute a command in the shell and wait for its sentinel.
+
+        Args:
+            cmd (str): Command to execute.
+            cmd_timeout (float, optional): Timeout to execute the command. If None, wait forever. Defaults to 10 seconds.
+
+        Returns:
+            tuple[int, str]: The exit code and the output, stdout and stderr merged, of the command.
+
+        Raises:
+            ShellSessionError: If the shell exited before the command finished.
+            TimeoutError: If the command does not finish before cmd_timeout. The session is closed,
+                since the shell is still busy with the command.
+        """
+        return self.run_many([cmd], cmd_timeout)[0]
+
+    def run_many(
+        self, cmds: list[str], cmd_timeout: float | None = 10, stop_on_error: bool = False
+    ) -> list[tuple[int, str]]:
+        """
+        Execute several commands in the shell, sending them all at once, and split the output per command.
+
+        The commands run one after another, but cost a single round trip in total.
+
+        Args:
+            cmds (list[str]): Commands to execute, in order.
+            cmd_timeout (float, optional): Timeout to execute all the commands. If None, wait forever. Defaults to 10 seconds.
+            stop_on_error (bool, optional): If True, the shell exits after the first command whose exit code is not 0.
+                The returned list then ends with that command and the session is no longer alive. Defaults to False.
+
+        Returns:
+            list[tuple[int, str]]: The exit code and the output, stdout and stderr merged, of each executed command.
+
+        Raises:
+            ShellSessionError: If the shell exited before the commands finished.
+            TimeoutError: If the commands do not finish before cmd_timeout. The session is closed,
+                since the shell is still busy with them.
+        """
+        sentinel = uuid.uuid4().hex
+        marker = re.compile(rb"\n" + sentinel.encode() + rb" (\d+)\n")
+        script = ""
+        for cmd in cmds:
+            script += (
+                f"/bin/sh -c {shlex.quote(cmd)} </dev/null 2>&1; rc=$?; "
+                f"printf '\\n%s %d\\n' {sentinel} $rc"
+            )
+            script += "; [ $rc -eq 0 ] || exit $rc\n" if stop_on_error else "\n"
+        deadline = None if cmd_timeout is None else time.monotonic() + cmd_timeout
+
+        with self._lock:
+            if not self.is_alive:
+                raise ShellSessionError(self._death_message())
+            self._channel.sendall(script.encode("utf-8"))
+
+            results: list[tuple[int, str]] = []
+            out = bytearray()
+            searched = 0
+            while len(results) < len(cmds):
+                self._drain_stderr()
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.close()
+                        raise TimeoutError(
+                            f"Command timed out after {cmd_timeout} seconds"
+                        )
+                    self._channel.settimeout(min(remaining, 0.5))
+                else:
+                    self._channel.settimeout(0.5)
+
+                try:
+                    chunk = self._channel.recv(32768)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    if stop_on_error and results and results[-1][0] != 0:
+                        return results
+                    raise ShellSessionError(self._death_message())
+
+                # Only the output after the last sentinel is kept, and only its new
+                # end (plus room for a sentinel split between chunks) is searched
+                out += chunk
+                while match := marker.search(out, max(searched - len(sentinel) - 16, 0)):
+                    results.append(
+                        (int(match.group(1)), out[: match.start()].decode("utf-8"))
+                    )
+                    del out[: match.end()]
+                    searched = 0
+                searched = len(out)
+
+            return results
+
+    def close(self) -> None:
+        """
+        Close the shell.
+        """
+        self._channel.close()
+
+    def _drain_stderr(self) -> None:
+        """
+        Read the stderr of the shell itself, so it can't fill the channel window. Only its end is kept.
+        """
+        while self._channel.recv_stderr_ready():
+            self._stderr_tail += self._channel.recv_stderr(32768)
+            del self._stderr_tail[:-_STDERR_TAIL_SIZE]
+
+    def _death_message(self) -> str:
+        """
+        Build the message explaining why the shell is not running anymore.
+
+        Returns:
+            str: The stderr of the shell, or a generic message.
+        """
+        self._drain_stderr()
+        stderr = self._stderr_tail.decode("utf-8", errors="replace").strip()
+        return stderr or f"The shell session of {self.user or 'the login user'} has exited"
+
+    @staticmethod
+    def _shell_cmd(user: str | None) -> str:
+        """
+        Helper method to build the command starting the shell as the given user.
+
+        Args:
+            user (str, optional): User the shell runs as. If None, the user used to connect.
+
+        Returns:
+            str: The command starting the shell.
+        """
+        if not user:
+            return "/bin/sh"
+        if user == "root":
+            return "sudo /bin/sh"
+        return f"sudo /usr/bin/su - {shlex.quote(user)}"
@@ -0,0 +1,122 @@
+"""
+Provides calibrate_transport_profiles, which measures the transport profiles against a host to pick the fastest.
+"""
+
+import io
+import os
+import statistics
+import time
+import uuid
+from typing import Iterable, Literal
+from .base_ssh import BaseSSH
+from .transport_profile import TRANSPORT_PROFILES, TransportProfile, get_transport_profile
+from ..models import TransportCalibration
+
+
+def calibrate_transport_profiles(
+    host: str,
+    username: str,
+    password: str | None = None,
+    port: int = 22,
+    pkey: str | None = None,
+    profiles: Iterable[str | TransportProfile] | None = None,
+    workload: Literal["bulk", "commands"] = "bulk",
+    payload: bytes | None = None,
+    cmd_samples: int = 20,
+    remote_dir: str = "/tmp",
+    **kwargs,
+) -> list[TransportCalibration]:
+    """
+    Measure each transport profile against a host: connection time, command latency and SFTP throughput.
+
+    Every profile gets a connection of its own, used for a series of commands doing nothing and for an upload
+    and a download of the payload, which is removed from the host afterwards. The best profile depends on the
+    link and on the CPUs at both ends, so it's worth measuring once per kind of host.
+
+    Args:
+        host (str): Host to connect to.
+        username (str): Username to connect to the remote host.
+        password (str, optional): Password to connect to the remote host. Defaults to None.
+        port (int, optional): Port to connect to the remote host. Defaults to 22.
+        pkey (str, optional): Private key to connect to the remote host. Defaults to None.
+        profiles (Iterable[str | TransportProfile], optional): Profiles to measure. Defaults to every predefined profile.
+        workload (str, optional): What the results are sorted for: "bulk" for the SFTP throughput, "commands" for the
+            command latency. Defaults to "bulk".
+        payload (bytes, optional): Data transferred by SFTP. Compression only pays off on compressible data, so a sample
+            of the real data gives the most accurate results. Defaults to 16 MiB of random bytes.
+        cmd_samples (int, optional): Number of commands whose latency is measured. Defaults to 20.
+        remote_dir (str, optional): Directory of the remote host where the payload is uploaded. Defaults to "/tmp".
+        **kwargs: Other attributes of `BaseSSH`, such as `timeout`.
+
+    Returns:
+        list[TransportCalibration]: The measures of each profile, fastest first for the workload.
+
+    Raises:
+        ValueError: If a profile name or the workload is unknown.
+
+    Examples:
+        >>> from py_secure_shell_automator.base_ssh import calibrate_transport_profiles
+        >>> results = calibrate_transport_profiles(host='hostname', username='admin', password='admin_pass')
+        >>> best = results[0].profile  # Output: 'lan-bulk'
+    """
+    if workload not in ("bulk", "commands"):
+        raise ValueError(f"Unknown workload: {workload}")
+    profiles = [
+        get_transport_profile(profile)
+        for profile in (profiles if profiles is not None else TRANSPORT_PROFILES)
+    ]
+    if payload is None:
+        payload = os.urandom(16 * 1024 * 1024)
+    remote_path = f"{remote_dir}/py_ssh_calibration_{uuid.uuid4().hex}"
+
+    results = []
+    for profile in profiles:
+        start = time.perf_counter()
+        py_ssh = BaseSSH(
+            host=host,
+            username=username,
+            password=password,
+            port=port,
+            pkey=pkey,
+            sftp=True,
+            transport_profile=profile,
+            **kwargs,
+        )
+        connect_time = time.perf_counter() - start
+        try:
+            py_ssh.run_cmd("true")  # The first channel pays for the lazy setup of the transport
+            latencies = []
+            for _ in range(cmd_samples):
+                start = time.perf_counter()
+                py_ssh.run_cmd("true")
+                latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            py_ssh._sftp.putfo(io.BytesIO(payload), remote_path)
+            upload_time = time.perf_counter() - start
+            try:
+                start = time.perf_counter()
+                py_ssh._sftp.getfo(remote_path, io.BytesIO())
+                download_time = time.perf_counter() - start
+            finally:
+                py_ssh._sftp.remove(remote_path)
+        finally:
+            py_ssh.close()
+
+        results.append(
+            TransportCalibration(
+                profile=profile.name,
+                connect_time=connect_time,
+                cmd_latency=statistics.median(latencies),
+                upload_throughput=len(payload) / upload_time,
+                download_throughput=len(payload) / download_time,
+            )
+        )
+
+    if workload == "commands":
+        return sorted(results, key=lambda result: result.cmd_latency)
+    # Sorted by the total time of a round trip of the payload
+    return sorted(
+        results,
+        key=lambda result: 1 / result.upload_throughput + 1 / result.download_throughput,
+    )
@@ -0,0 +1 @@
+from .ssh_broker import SSHBroker
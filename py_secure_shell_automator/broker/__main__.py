@@ -0,0 +1,27 @@
+"""
+Run an SSH broker listening on the given socket: `python -m py_secure_shell_automator.broker /path/to/socket`
+"""
+
+import argparse
+from .ssh_broker import SSHBroker
+
+parser = argparse.ArgumentParser(
+    prog="python -m py_secure_shell_automator.broker",
+    description="Share authenticated SSH connections between processes.",
+)
+parser.add_argument("socket_path", help="Path of the Unix domain socket to listen on")
+parser.add_argument(
+    "--idle-ttl",
+    type=float,
+    default=300,
+    help="Seconds a connection is kept without being used (default: 300)",
+)
+args = parser.parse_args()
+
+broker = SSHBroker(args.socket_path, idle_ttl=args.idle_ttl)
+try:
+    broker.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    broker.close()
@@ -0,0 +1,253 @@
+"""
+Module containing a local broker that shares authenticated SSH connections between processes
+"""
+
+import base64
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+from ..base_ssh import BaseSSH, BrokerClient, TransportProfile
+
+# Every parameter sent by the client, as sorted JSON, so connections opened with different options are not shared
+_ConnectionKey = str
+
+
+@dataclass
+class _BrokerConnection:
+    """
+    A connection held by the broker, and the lock serializing the transfers of its SFTP session.
+    """
+
+    ssh: BaseSSH
+    sftp_lock: threading.Lock = field(default_factory=threading.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Serves the requests of a client connection, one JSON object per line.
+    """
+
+    server: "_BrokerServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = self.server.broker._dispatch(json.loads(line))
+            except Exception as e:
+                response = {"error": str(e), "type": type(e).__name__}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _BrokerServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, broker: "SSHBroker") -> None:
+        self.broker = broker
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_bind(self) -> None:
+        # Requests carry credentials, only the owner of the broker may connect. The socket is bound in a
+        # private directory and only moved in place once its permissions are restricted
+        socket_path = self.server_address
+        private_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(socket_path)))
+        self.server_address = os.path.join(private_dir, "broker.sock")
+        try:
+            super().server_bind()
+            os.chmod(self.server_address, stat.S_IRUSR | stat.S_IWUSR)
+            os.rename(self.server_address, socket_path)
+        finally:
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+            os.rmdir(private_dir)
+        self.server_address = socket_path
+
+
+class SSHBroker:
+    """
+    Local broker holding authenticated SSH connections and running commands and SFTP transfers
+    on them for other processes, like the OpenSSH ControlMaster.
+
+    Processes use it by creating their objects with `broker_socket`. Every process routed through the
+    broker shares a single connection per host, port, credentials and connection settings (timeouts, host
+    key policy, keepalive, transport profile), each command running on its own channel, so the number of connections to a host no longer grows with the number of processes and
+    only the first request to a host pays the handshake.
+
+    The socket is only accessible to the user running the broker, and the SFTP transfers read and write
+    local files with the permissions of that user.
+
+    Attributes:
+        socket_path (str): Path of the Unix domain socket to listen on.
+        idle_ttl (float, optional): Seconds a connection is kept without being used. Defaults to 300.
+
+    Example:
+        ```python
+        # In the broker process, or with `python -m py_secure_shell_automator.broker /tmp/ssh_broker.sock`
+        from py_secure_shell_automator.broker import SSHBroker
+
+        SSHBroker('/tmp/ssh_broker.sock').serve_forever()
+
+        # In the worker processes
+        py_ssh = PySecureShellAutomator(host='hostname', username='admin', password='admin_pass', broker_socket='/tmp/ssh_broker.sock')
+        print(py_ssh.run_cmd(cmd='whoami').out)  # Output: 'admin'
+        ```
+    """
+
+    def __init__(self, socket_path: str, idle_ttl: float = 300) -> None:
+        self.socket_path = socket_path
+        self.idle_ttl = idle_ttl
+        self._connections: dict[_ConnectionKey, _BrokerConnection] = {}
+        self._lock = threading.Lock()
+        self._remove_stale_socket()
+        self._server = _BrokerServer(socket_path, self)
+
+    def __enter__(self) -> "SSHBroker":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def serve_forever(self) -> None:
+        """
+        Serve requests until `close` is called from another thread.
+
+        Example:
+            >>> SSHBroker('/tmp/ssh_broker.sock').serve_forever()
+        """
+        self._server.serve_forever()
+
+    def start(self) -> None:
+        """
+        Serve requests in a background thread of the current process.
+
+        Example:
+            >>> broker = SSHBroker('/tmp/ssh_broker.sock')
+            >>> broker.start()
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        """
+        Stop serving requests, close every connection and remove the socket.
+
+        Example:
+            >>> broker.close()
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            for connection in self._connections.values():
+                connection.ssh.close()
+            self._connections.clear()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        Run a request on the connection it targets.
+
+        Args:
+            request (dict[str, Any]): The decoded request.
+
+        Returns:
+            dict[str, Any]: The response to send back.
+
+        Raises:
+            ValueError: If the operation is unknown.
+        """
+        connection = self._get_connection(request["connection"])
+        match request["op"]:
+            case "run_cmd":
+                stdin = request.get("stdin")
+                ext_code, out, err, timing = connection.ssh._exec_cmd(
+                    request["cmd"],
+                    request["user"],
+                    request["cmd_timeout"],
+                    request.get("get_pty", True),
+                    request.get("decode", True),
+                    request.get("max_output_bytes"),
+                    request.get("truncate", "tail"),
+                    request.get("spill_to_disk", False),
+                    None if stdin is None else base64.b64decode(stdin),
+                )
+                return {
+                    "ext_code": ext_code,
+                    "out": BrokerClient.encode_output(out),
+                    "err": BrokerClient.encode_output(err),
+                    "timing": timing,
+                }
+            case "sftp_put":
+                with connection.sftp_lock:
+                    connection.ssh._sftp.put(request["local_path"], request["remote_path"])
+                return {}
+            case "sftp_get":
+                with connection.sftp_lock:
+                    connection.ssh._sftp.get(request["remote_path"], request["local_path"])
+                return {}
+            case op:
+                raise ValueError(f"Unknown operation: {op}")
+
+    def _get_connection(self, params: dict[str, Any]) -> _BrokerConnection:
+        """
+        Get the connection matching the parameters, creating it if needed.
+
+        The connection itself is opened on first use, outside of the broker lock, so a slow host
+        does not delay the requests to the others. Idle connections are closed, and dead ones are
+        reopened by BaseSSH on their next use.
+
+        Args:
+            params (dict[str, Any]): Parameters of the connection sent by the client.
+
+        Returns:
+            _BrokerConnection: The connection.
+        """
+        profile = params.get("transport_profile")
+        key = json.dumps(params, sort_keys=True)
+        now = time.monotonic()
+        with self._lock:
+            for other_key, other in list(self._connections.items()):
+                if other_key != key and now - other.last_used > self.idle_ttl:
+                    other.ssh.close()
+                    del self._connections[other_key]
+
+            connection = self._connections.get(key)
+            if connection is None:
+                if profile is not None:
+                    # JSON turned the tuples of algorithms into lists
+                    profile = {
+                        k: tuple(v) if isinstance(v, list) else v
+                        for k, v in profile.items()
+                    }
+                    params = {**params, "transport_profile": TransportProfile(**profile)}
+                connection = _BrokerConnection(
+                    BaseSSH(**params, sftp=True, lazy=True)
+                )
+                self._connections[key] = connection
+            connection.last_used = now
+            return connection
+
+    def _remove_stale_socket(self) -> None:
+        """
+        Remove the socket left by a broker that did not exit cleanly.
+
+        Raises:
+            OSError: If another broker is listening on the socket.
+        """
+        if not os.path.exists(self.socket_path):
+            return None
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+                return None
+        raise OSError(f"Another broker is listening on {self.socket_path}")
@@ -0,0 +1 @@
+from .connection_pool import SSHConnectionPool
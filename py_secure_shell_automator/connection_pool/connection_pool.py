@@ -0,0 +1,398 @@
+"""
+Module containing a pool of authenticated SSH connections shared between BaseSSH instances
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import Iterator, Type, TypeVar
+from paramiko import SSHClient
+from .exceptions import *
+from ..base_ssh import BaseSSH
+from ..base_ssh.transport_profile import get_transport_profile
+from ..models import PoolStats
+from ..py_secure_shell_automator import PySecureShellAutomator
+
+SSHHandle = TypeVar("SSHHandle", bound=BaseSSH)
+
+_PoolKey = tuple[str, int, str, str | None, str | None, tuple]
+
+# Attributes that change how a connection is opened, so connections opened with different values are not shared
+_CONNECTION_OPTIONS = (
+    "timeout",
+    "auth_timeout",
+    "auto_add_policy",
+    "broker_socket",
+    "keepalive_interval",
+    "transport_profile",
+)
+
+
+class SSHConnectionPool:
+    """
+    Pool of already authenticated SSH connections, keyed by host, port, username, credentials and the
+    attributes changing how a connection is opened: timeouts, host key policy, broker, keepalive and
+    transport profile.
+
+    Checking out a connection returns a regular `PySecureShellAutomator` (or any `BaseSSH` subclass)
+    backed by a pooled `SSHClient`, so the TCP connection, key exchange and authentication are only
+    paid the first time a host is used. Connections that stay idle for longer than `idle_ttl` seconds
+    or fail the health check are closed and replaced.
+
+    Attributes:
+        max_per_host (int, optional): Maximum number of connections, checked out or idle, per key. Defaults to 4.
+        idle_ttl (float, optional): Seconds an idle connection is kept before it is evicted. Defaults to 300.
+        checkout_timeout (float, optional): Seconds to wait for a free connection when `max_per_host` is reached.
+            If None, wait forever. Defaults to None.
+        health_check (bool, optional): Whether to check that a pooled connection is still alive before handing it out. Defaults to True.
+
+    Example:
+        ```python
+        from py_secure_shell_automator import SSHConnectionPool
+
+        pool = SSHConnectionPool(max_per_host=2, idle_ttl=60)
+        with pool.connection(host='hostname', username='admin', password='admin_pass') as py_ssh:
+            print(py_ssh.run_cmd(cmd='whoami').out)  # Output: 'admin'
+        print(pool.stats)  # Output: PoolStats(hits=0, misses=1, evictions=0, in_use=0, idle=1)
+        ```
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 4,
+        idle_ttl: float = 300,
+        checkout_timeout: float | None = None,
+        health_check: bool = True,
+    ) -> None:
+        self.max_per_host = max_per_host
+        self.idle_ttl = idle_ttl
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+        self._idle: dict[_PoolKey, list[tuple[SSHClient, float]]] = {}
+        self._in_use: dict[_PoolKey, int] = {}
+        # Checked out handles by id, since they are not hashable
+        self._checked_out: dict[int, BaseSSH] = {}
+        self._stats = PoolStats()
+        self._closed = False
+        self._lock = threading.Condition()
+
+    def __enter__(self) -> "SSHConnectionPool":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        Returns a snapshot of the pool statistics.
+
+        Returns:
+            PoolStats: Hits, misses, evictions and the number of connections in use and idle.
+        """
+        with self._lock:
+            return PoolStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                in_use=sum(self._in_use.values()),
+                idle=sum(len(idle) for idle in self._idle.values()),
+            )
+
+    def checkout(
+        self,
+        host: str,
+        username: str,
+        password: str | None = None,
+        port: int = 22,
+        pkey: str | None = None,
+        sftp: bool = False,
+        automator_cls: Type[SSHHandle] = PySecureShellAutomator,
+        **kwargs,
+    ) -> SSHHandle:
+        """
+        Check out a connection to the given host, opening a new one if none is idle.
+
+        The returned object must be given back with `release` once it is no longer needed.
+        Prefer the `connection` context manager, which does it automatically.
+
+        Args:
+            host (str): Host to connect to the remote host.
+            username (str): Username to connect to the remote host.
+            password (str, optional): Password to connect to the remote host. Defaults to None.
+            port (int, optional): Port to connect to the remote host. Defaults to 22.
+            pkey (str, optional): Private key to connect to the remote host. Defaults to None.
+            sftp (bool, optional): Whether to open an SFTP session on the checked out connection. Defaults to False.
+            automator_cls (Type[BaseSSH], optional): Class of the returned handle. Defaults to PySecureShellAutomator.
+            **kwargs: Any other attribute accepted by `automator_cls`. Only connections opened with the same
+                `timeout`, `auth_timeout`, `auto_add_policy`, `broker_socket`, `keepalive_interval` and
+                `transport_profile` are reused.
+
+        Returns:
+            BaseSSH: An instance of `automator_cls` backed by a pooled connection.
+
+        Raises:
+            PoolClosedError: If the pool is closed.
+            PoolExhaustedError: If `max_per_host` connections are in use and none is released before `checkout_timeout`.
+            ConnectionError: If a new connection could not be established.
+
+        Examples:
+            >>> py_ssh = pool.checkout(host='hostname', username='admin', password='admin_pass')
+            >>> try:
+                    py_ssh.run_cmd(cmd='whoami')
+                finally:
+                    pool.release(py_ssh)
+        """
+        options = {
+            option.name: kwargs.get(option.name, option.default)
+            for option in fields(automator_cls)
+            if option.name in _CONNECTION_OPTIONS
+        }
+        key = self._key(host, port, username, password, pkey, options)
+        # None opens a new connection
+        client = self._acquire(key)
+        try:
+            handle = automator_cls(
+                host=host,
+                username=username,
+                password=password,
+                port=port,
+                pkey=pkey,
+                sftp=sftp,
+                ssh_client=client,
+                **kwargs,
+            )
+        except Exception:
+            if client is not None:
+                client.close()
+            with self._lock:
+                self._in_use[key] -= 1
+                self._lock.notify_all()
+            raise
+        with self._lock:
+            self._checked_out[id(handle)] = handle
+        return handle
+
+    def release(self, handle: BaseSSH) -> None:
+        """
+        Give a checked out connection back to the pool.
+
+        The SFTP session of the handle, if any, is closed. The underlying SSH connection is kept
+        for the next checkout unless it is no longer healthy or the pool is closed. The handle is
+        detached from it, so it can't be used anymore, and releasing it again does nothing.
+
+        Args:
+            handle (BaseSSH): Object returned by `checkout`.
+
+        Examples:
+            >>> py_ssh = pool.checkout(host='hostname', username='admin', password='admin_pass')
+            >>> pool.release(py_ssh)
+        """
+        key = self._key(
+            handle.host,
+            handle.port,
+            handle.username,
+            handle.password,
+            handle.pkey,
+            {name: getattr(handle, name) for name in _CONNECTION_OPTIONS},
+        )
+        with self._lock:
+            # Released already, or not checked out of this pool
+            if self._checked_out.pop(id(handle), None) is not handle:
+                return None
+        client = handle._client
+        sftp_client = handle._sftp_client
+        # Neither using the connection of the next checkout, nor opening one of its own
+        handle._closed = True
+        handle._client = None
+        handle._sftp_client = None
+        if sftp_client is not None:
+            sftp_client.close()
+
+        with self._lock:
+            self._in_use[key] = max(self._in_use.get(key, 0) - 1, 0)
+            # A lazy handle that was never used has no connection to keep
+            if client is not None:
+                if self._closed or not self._is_healthy(client):
+                    client.close()
+                else:
+                    self._idle.setdefault(key, []).append((client, time.monotonic()))
+            self._lock.notify_all()
+
+    @contextmanager
+    def connection(self, host: str, username: str, **kwargs) -> Iterator[BaseSSH]:
+        """
+        Context manager that checks out a connection and releases it on exit.
+
+        Args:
+            host (str): Host to connect to the remote host.
+            username (str): Username to connect to the remote host.
+            **kwargs: Any other argument accepted by `checkout`.
+
+        Yields:
+            BaseSSH: An instance of `automator_cls` backed by a pooled connection.
+
+        Examples:
+            >>> with pool.connection(host='hostname', username='admin', password='admin_pass') as py_ssh:
+                    py_ssh.create_directory('/tmp/new_directory')
+        """
+        handle = self.checkout(host=host, username=username, **kwargs)
+        try:
+            yield handle
+        finally:
+            self.release(handle)
+
+    def evict_idle(self) -> int:
+        """
+        Close every idle connection that exceeded `idle_ttl`.
+
+        Expired connections are also evicted on every checkout, so calling this method is only
+        needed to free resources of pools that are not used for a long time.
+
+        Returns:
+            int: Number of evicted connections.
+
+        Examples:
+            >>> evicted = pool.evict_idle()
+        """
+        with self._lock:
+            return self._evict_expired()
+
+    def close(self) -> None:
+        """
+        Close every idle connection and refuse new checkouts.
+
+        Connections that are checked out are closed when they are released.
+
+        Examples:
+            >>> pool.close()
+        """
+        with self._lock:
+            self._closed = True
+            for idle in self._idle.values():
+                for client, _ in idle:
+                    client.close()
+            self._idle.clear()
+            self._lock.notify_all()
+
+    def _acquire(self, key: _PoolKey) -> SSHClient | None:
+        """
+        Reserve a slot for the given key, returning an idle client if a healthy one is available.
+
+        Args:
+            key (_PoolKey): Key of the connection.
+
+        Returns:
+            SSHClient | None: An idle client, or None if the caller must open a new connection.
+        """
+        deadline = (
+            None
+            if self.checkout_timeout is None
+            else time.monotonic() + self.checkout_timeout
+        )
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("The connection pool is closed")
+
+                self._evict_expired()
+                idle = self._idle.get(key, [])
+                while idle:
+                    client, _ = idle.pop()
+                    if not self.health_check or self._is_healthy(client):
+                        self._in_use[key] = self._in_use.get(key, 0) + 1
+                        self._stats.hits += 1
+                        return client
+                    client.close()
+                    self._stats.evictions += 1
+
+                if self._in_use.get(key, 0) < self.max_per_host:
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    self._stats.misses += 1
+                    return None
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolExhaustedError(
+                        f"No connection to {key[0]} available after {self.checkout_timeout} seconds"
+                    )
+                self._lock.wait(remaining)
+
+    def _evict_expired(self) -> int:
+        """
+        Close idle connections that exceeded `idle_ttl`. The lock must be held by the caller.
+
+        Returns:
+            int: Number of evicted connections.
+        """
+        evicted = 0
+        now = time.monotonic()
+        for key, idle in self._idle.items():
+            fresh = []
+            for client, last_used in idle:
+                if now - last_used < self.idle_ttl:
+                    fresh.append((client, last_used))
+                    continue
+                client.close()
+                evicted += 1
+            self._idle[key] = fresh
+        self._stats.evictions += evicted
+        return evicted
+
+    @staticmethod
+    def _key(
+        host: str,
+        port: int,
+        username: str,
+        password: str | None,
+        pkey: str | None,
+        options: dict,
+    ) -> _PoolKey:
+        """
+        Build the key of the connections opened with the given credentials and options.
+
+        Args:
+            host (str): Host of the connection.
+            port (int): Port of the connection.
+            username (str): Username of the connection.
+            password (str | None): Password of the connection.
+            pkey (str | None): Private key of the connection.
+            options (dict): Value of each of `_CONNECTION_OPTIONS`.
+
+        Returns:
+            _PoolKey: The key.
+        """
+        # A profile given by name and the profile itself open the same connections
+        options = {
+            **options,
+            "transport_profile": get_transport_profile(options["transport_profile"]),
+        }
+        return (
+            host,
+            port,
+            username,
+            password,
+            pkey,
+            tuple(options[name] for name in _CONNECTION_OPTIONS),
+        )
+
+    @staticmethod
+    def _is_healthy(client: SSHClient) -> bool:
+        """
+        Check that the transport of the client is still active.
+
+        Args:
+            client (SSHClient): Client to check.
+
+        Returns:
+            bool: True if the transport is active and accepts writes, False otherwise.
+        """
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except Exception:
+            return False
+        return True
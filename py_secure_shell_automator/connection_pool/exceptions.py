@@ -0,0 +1,19 @@
+"""
+Module containing custom exceptions for the connection_pool module
+"""
+
+
+class PoolExhaustedError(Exception):
+    """
+    Raised when no connection becomes available for a host before the checkout timeout.
+    """
+
+    ...
+
+
+class PoolClosedError(Exception):
+    """
+    Raised when an attempt is made to check out a connection from a closed pool.
+    """
+
+    ...
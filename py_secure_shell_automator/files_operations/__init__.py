@@ -1 +1,6 @@
+from .chunked_transfer import ChunkedTransfer
+from .delta_transfer import DeltaTransfer
+from .directory_sync import DirectorySync
 from .files_operations import SSHFileOperations
+from .remote_file import RemoteFile
+from .tar_transfer import TarTransfer
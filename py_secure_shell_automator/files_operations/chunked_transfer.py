@@ -0,0 +1,331 @@
+"""
+Provides the ChunkedTransfer class, which copies a file in ranges over several SFTP sessions at once, and verifies the copy.
+"""
+
+import dataclasses
+import hashlib
+import os
+import queue
+import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from paramiko import SFTPClient, SFTPFile
+from .exceptions import *
+from ..base_ssh import BaseSSH
+
+# Bytes read from, or written to, a local file per call. Paramiko splits the writes into SFTP requests of 32 KiB
+_BLOCK_SIZE = 1024 * 1024
+# Size of the data of an SFTP read request of Paramiko
+_REQUEST_SIZE = 32 * 1024
+
+# (index, offset, length) of a range of the file
+_Chunk = tuple[int, int, int]
+
+
+class ChunkedTransfer:
+    """
+    Copies a file split into ranges of `chunk_size` bytes, moved concurrently by `parallelism` SFTP sessions,
+    each on a channel of its own, and so with a flow control window of its own. The sessions are spread over
+    `connections` SSH connections: the channels of one connection share its socket and the thread decrypting
+    its packets, so more connections help when a single core can't keep up with the link.
+
+    Every session keeps requests in flight instead of waiting for each reply: uploads are written behind,
+    pipelined up to the window of the channel, and downloads are read ahead, `read_ahead` bytes per session.
+    Local reads and writes go to the offset of each range directly, so the file is never held in memory.
+
+    With `verify`, the SHA-256 of every range is computed locally while it's transferred, and remotely once
+    the file is complete, by `parallelism` processes of the remote host. Ranges that don't match are
+    transferred once more before giving up.
+
+    Attributes:
+        py_ssh (BaseSSH): The object whose connection, and credentials for the extra connections, are used.
+        parallelism (int, optional): Number of SFTP sessions moving ranges at once. Defaults to 4.
+        chunk_size (int, optional): Bytes of a range. Defaults to 64 MiB.
+        connections (int, optional): Number of SSH connections the sessions are spread over, the connection of
+            `py_ssh` included. Defaults to 1.
+        read_ahead (int, optional): Bytes requested ahead by each session when downloading. Defaults to 8 MiB.
+        verify (bool, optional): Whether to compare the SHA-256 of every range at both ends. Needs `sha256sum`,
+            `tail`, `head` and `xargs` on the remote host. Defaults to True.
+
+    Example:
+        ```python
+        from py_secure_shell_automator.files_operations import ChunkedTransfer
+
+        transfer = ChunkedTransfer(py_ssh, parallelism=8, connections=2)
+        transfer.upload('/images/disk.qcow2', '/var/lib/libvirt/images/disk.qcow2')
+        ```
+    """
+
+    def __init__(
+        self,
+        py_ssh: BaseSSH,
+        parallelism: int = 4,
+        chunk_size: int = 64 * 1024 * 1024,
+        connections: int = 1,
+        read_ahead: int = 8 * 1024 * 1024,
+        verify: bool = True,
+    ) -> None:
+        if parallelism < 1 or connections < 1 or chunk_size < 1:
+            raise ValueError(
+                "parallelism, connections and chunk_size must be positive"
+            )
+        self.py_ssh = py_ssh
+        self.parallelism = parallelism
+        self.chunk_size = chunk_size
+        self.connections = connections
+        self.read_ahead = read_ahead
+        self.verify = verify
+
+    def upload(self, local_path: str, remote_path: str) -> int:
+        """
+        Copy a local file to the remote host, overwriting the remote file if it exists.
+
+        Args:
+            local_path (str): Path to the local file.
+            remote_path (str): Path to the file on the remote host.
+
+        Returns:
+            int: Size of the file, in bytes.
+
+        Raises:
+            FileTransferError: If the copy doesn't match the local file after a second attempt.
+            OSError: If a local or remote file can't be read or written.
+
+        Examples:
+            >>> size = transfer.upload('/images/disk.qcow2', '/var/lib/libvirt/images/disk.qcow2')
+        """
+        with open(local_path, "rb") as local_file:
+            fd = local_file.fileno()
+            size = os.fstat(fd).st_size
+
+            def put(remote_file: SFTPFile, chunk: _Chunk) -> str:
+                _, offset, length = chunk
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+                digest = hashlib.sha256() if self.verify else None
+                remote_file.seek(offset)
+                end = offset + length
+                while offset < end:
+                    data = os.pread(fd, min(_BLOCK_SIZE, end - offset), offset)
+                    if not data:
+                        raise FileTransferError(
+                            f"{local_path} was truncated during the copy"
+                        )
+                    if digest is not None:
+                        digest.update(data)
+                    remote_file.write(data)
+                    offset += len(data)
+                return "" if digest is None else digest.hexdigest()
+
+            def prepare(sftp: SFTPClient) -> None:
+                sftp.open(remote_path, "wb").close()
+
+            self._copy(size, remote_path, "r+b", put, prepare)
+        return size
+
+    def download(self, remote_path: str, local_path: str) -> int:
+        """
+        Copy a file of the remote host to a local file, overwriting the local file if it exists.
+
+        Args:
+            remote_path (str): Path to the file on the remote host.
+            local_path (str): Path to the local file.
+
+        Returns:
+            int: Size of the file, in bytes.
+
+        Raises:
+            FileTransferError: If the copy doesn't match the remote file after a second attempt.
+            OSError: If a local or remote file can't be read or written.
+
+        Examples:
+            >>> size = transfer.download('/var/backups/db.dump', '/backups/db.dump')
+        """
+        sftp = self.py_ssh._ssh.open_sftp()
+        try:
+            size = sftp.stat(remote_path).st_size
+        finally:
+            sftp.close()
+        with open(local_path, "wb") as local_file:
+            local_file.truncate(size)
+            fd = local_file.fileno()
+            max_requests = max(1, self.read_ahead // _REQUEST_SIZE)
+
+            def get(remote_file: SFTPFile, chunk: _Chunk) -> str:
+                _, offset, length = chunk
+                # Paramiko reassembles reads larger than a request slowly, so the replies are read one by one,
+                # and gathered into blocks written at once
+                requests = [
+                    (request, min(_REQUEST_SIZE, offset + length - request))
+                    for request in range(offset, offset + length, _REQUEST_SIZE)
+                ]
+                digest = hashlib.sha256() if self.verify else None
+                block = bytearray()
+                for data in remote_file.readv(requests, max_requests):
+                    if digest is not None:
+                        digest.update(data)
+                    block += data
+                    if len(block) >= _BLOCK_SIZE:
+                        os.pwrite(fd, block, offset)
+                        offset += len(block)
+                        block.clear()
+                if block:
+                    os.pwrite(fd, block, offset)
+                return "" if digest is None else digest.hexdigest()
+
+            self._copy(size, remote_path, "rb", get)
+        return size
+
+    def _copy(
+        self,
+        size: int,
+        remote_path: str,
+        mode: str,
+        transfer: Callable[[SFTPFile, _Chunk], str],
+        prepare: Callable[[SFTPClient], None] | None = None,
+    ) -> None:
+        """
+        Helper method to transfer every range, verify them and transfer the mismatching ones again.
+
+        Args:
+            size (int): Size of the file.
+            remote_path (str): Path to the file on the remote host.
+            mode (str): Mode the remote file is opened with by each session.
+            transfer (Callable[[SFTPFile, _Chunk], str]): Transfers a range with the remote file of a session,
+                and returns the SHA-256 of the range, or an empty string if `verify` is False.
+            prepare (Callable[[SFTPClient], None], optional): Called with the first session before the transfer.
+
+        Raises:
+            FileTransferError: If ranges still mismatch after the second attempt.
+        """
+        chunks = [
+            (index, offset, min(self.chunk_size, size - offset))
+            for index, offset in enumerate(range(0, size, self.chunk_size))
+        ]
+        extra_connections = [
+            # Copies without observers, which already get the event of the whole transfer
+            dataclasses.replace(
+                self.py_ssh,
+                ssh_client=None,
+                lazy=False,
+                sftp=False,
+                broker_socket=None,
+                observers=[],
+            )
+            for _ in range(min(self.connections, len(chunks) or 1) - 1)
+        ]
+        clients = [self.py_ssh._ssh] + [py_ssh._ssh for py_ssh in extra_connections]
+        sessions = [
+            clients[i % len(clients)].open_sftp()
+            for i in range(min(self.parallelism, len(chunks)) or 1)
+        ]
+        try:
+            if prepare is not None:
+                prepare(sessions[0])
+            digests = self._run(sessions, remote_path, mode, transfer, chunks)
+            if not self.verify:
+                return None
+            mismatches = self._mismatches(remote_path, chunks, digests)
+            if mismatches:
+                digests = self._run(sessions, remote_path, mode, transfer, mismatches)
+                mismatches = self._mismatches(remote_path, mismatches, digests)
+            if mismatches:
+                raise FileTransferError(
+                    f"Checksum mismatch of {remote_path} at offsets "
+                    f"{', '.join(str(offset) for _, offset, _ in mismatches)}"
+                )
+        finally:
+            for session in sessions:
+                session.close()
+            for py_ssh in extra_connections:
+                py_ssh.close()
+
+    @staticmethod
+    def _run(
+        sessions: list[SFTPClient],
+        remote_path: str,
+        mode: str,
+        transfer: Callable[[SFTPFile, _Chunk], str],
+        chunks: list[_Chunk],
+    ) -> dict[int, str]:
+        """
+        Helper method to transfer ranges, each session taking the next pending range until there is none.
+
+        Args:
+            sessions (list[SFTPClient]): The SFTP sessions.
+            remote_path (str): Path to the file on the remote host.
+            mode (str): Mode the remote file is opened with by each session.
+            transfer (Callable[[SFTPFile, _Chunk], str]): Transfers a range.
+            chunks (list[_Chunk]): The ranges.
+
+        Returns:
+            dict[int, str]: SHA-256 of each range, by index.
+
+        Raises:
+            Exception: The first error of a session. The other sessions stop after their current range.
+        """
+        pending: queue.SimpleQueue[_Chunk] = queue.SimpleQueue()
+        for chunk in chunks:
+            pending.put(chunk)
+        digests: dict[int, str] = {}
+        failed = threading.Event()
+
+        def worker(session: SFTPClient) -> None:
+            try:
+                with session.open(remote_path, mode) as remote_file:
+                    # Writes don't wait for their acknowledgement, errors are raised on close at the latest
+                    remote_file.set_pipelined(True)
+                    while not failed.is_set():
+                        try:
+                            chunk = pending.get_nowait()
+                        except queue.Empty:
+                            return None
+                        digests[chunk[0]] = transfer(remote_file, chunk)
+            except BaseException:
+                failed.set()
+                raise
+
+        with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+            futures = [executor.submit(worker, session) for session in sessions]
+        for future in futures:
+            future.result()
+        return digests
+
+    def _mismatches(
+        self, remote_path: str, chunks: list[_Chunk], digests: dict[int, str]
+    ) -> list[_Chunk]:
+        """
+        Helper method to compute the SHA-256 of ranges of the remote file, and compare them with the local ones.
+
+        Args:
+            remote_path (str): Path to the file on the remote host.
+            chunks (list[_Chunk]): The ranges.
+            digests (dict[int, str]): SHA-256 of each range computed locally, by index.
+
+        Returns:
+            list[_Chunk]: The ranges whose SHA-256 differ.
+        """
+        if not chunks:
+            return []
+        # One process per range, `parallelism` at a time. Each one gets the path as $0 and the index as $1
+        script = (
+            f'echo "$1" $(tail -c +$(($1 * {self.chunk_size} + 1)) "$0" '
+            f"| head -c {self.chunk_size} | sha256sum)"
+        )
+        indexes = " ".join(str(index) for index, _, _ in chunks)
+        cmd_response = self.py_ssh.run_cmd(
+            f"printf '%s\\n' {indexes} | xargs -n 1 -P {self.parallelism} "
+            f"sh -c {shlex.quote(script)} {shlex.quote(remote_path)}",
+            custom_exception=FileTransferError,
+            cmd_timeout=None,
+            get_pty=False,
+        )
+        remote_digests = dict(
+            line.split()[:2] for line in cmd_response.out.splitlines()
+        )
+        return [
+            chunk
+            for chunk in chunks
+            if remote_digests.get(str(chunk[0])) != digests[chunk[0]]
+        ]
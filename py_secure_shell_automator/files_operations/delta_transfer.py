@@ -0,0 +1,229 @@
+"""
+Provides the DeltaTransfer class, which updates a remote file by sending only the blocks that changed.
+"""
+
+import hashlib
+import os
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+from paramiko import SFTPClient
+from .exceptions import *
+from .temporary_path import temporary_path
+from ..base_ssh import BaseSSH
+
+
+class DeltaTransfer:
+    """
+    Updates a file of the remote host from a local file, sending only the blocks that differ.
+
+    The remote host computes the SHA-256 of every block of `block_size` bytes of its copy, with `split` and
+    `sha256sum`, while the client computes the ones of the local file. A local block equal to the remote block
+    at the same offset is left as is, one equal to a remote block at another offset is copied from it by `dd` on
+    the remote host, and only the other blocks are sent. The new file is built in a copy of the remote file, made
+    with `cp --reflink=auto` so it's instant on filesystems sharing blocks between files, then its SHA-256 is
+    compared with the one of the local file and it's renamed over the remote file. With `in_place`, the remote
+    file is changed directly instead, saving the copy, but blocks found at other offsets are sent too, and the
+    file is left half updated if the transfer fails.
+
+    Blocks are compared at multiples of `block_size`, unlike rsync, which finds blocks at any byte offset with a
+    rolling checksum that standard tools can't compute, so data inserted in the middle of a file makes the rest
+    of the file differ. Files changed in place, such as disk images and databases, are not affected.
+
+    Needs GNU coreutils on the remote host, and the SFTP session of `py_ssh`, so it must be created with `sftp`.
+    If the remote file doesn't exist, the whole file is sent.
+
+    Attributes:
+        py_ssh (BaseSSH): The object whose connection is used.
+        block_size (int, optional): Bytes of a block. Defaults to 1 MiB.
+        in_place (bool, optional): Whether to change the remote file directly instead of a copy. Defaults to False.
+
+    Example:
+        ```python
+        from py_secure_shell_automator.files_operations import DeltaTransfer
+
+        sent = DeltaTransfer(py_ssh, block_size=4 * 1024 * 1024).upload('/images/vm.qcow2', '/var/lib/images/vm.qcow2')
+        ```
+    """
+
+    def __init__(
+        self, py_ssh: BaseSSH, block_size: int = 1024 * 1024, in_place: bool = False
+    ) -> None:
+        if block_size < 1:
+            raise ValueError("block_size must be positive")
+        self.py_ssh = py_ssh
+        self.block_size = block_size
+        self.in_place = in_place
+
+    def upload(self, local_path: str, remote_path: str) -> int:
+        """
+        Update a remote file from a local file, creating it if it doesn't exist.
+
+        Args:
+            local_path (str): Path to the local file.
+            remote_path (str): Path to the file on the remote host.
+
+        Returns:
+            int: Bytes of the local file sent.
+
+        Raises:
+            FileTransferError: If the updated remote file differs from the local file.
+            CmdError: If the remote file can't be read or copied.
+            OSError: If the local file can't be read, or the remote file can't be written.
+            AttributeError: If SFTP is not initialized.
+
+        Examples:
+            >>> sent = transfer.upload('/images/vm.qcow2', '/var/lib/images/vm.qcow2')
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Both ends hash their file at the same time
+            local_signature = executor.submit(self._local_signature, local_path)
+            remote_blocks = self._remote_signature(remote_path)
+            local_blocks, local_digest = local_signature.result()
+
+        sftp = self.py_ssh._sftp
+        if remote_blocks is None:
+            sftp.put(local_path, remote_path)
+            return os.path.getsize(local_path)
+
+        remote_offsets: dict[str, int] = {}
+        for index, digest in enumerate(remote_blocks):
+            remote_offsets.setdefault(digest, index)
+        to_send = []
+        # (destination block, source block, number of blocks) copied on the remote host
+        to_copy: list[tuple[int, int, int]] = []
+        for index, digest in enumerate(local_blocks):
+            if index < len(remote_blocks) and remote_blocks[index] == digest:
+                continue
+            source = None if self.in_place else remote_offsets.get(digest)
+            if source is None:
+                to_send.append(index)
+            elif to_copy and to_copy[-1][0] + to_copy[-1][2] == index and (
+                to_copy[-1][1] + to_copy[-1][2] == source
+            ):
+                to_copy[-1] = (*to_copy[-1][:2], to_copy[-1][2] + 1)
+            else:
+                to_copy.append((index, source, 1))
+
+        target = remote_path if self.in_place else temporary_path(remote_path)
+        try:
+            if not self.in_place:
+                self._rebuild(remote_path, target, to_copy)
+            sent = self._send(sftp, local_path, target, to_send)
+            quoted_target = shlex.quote(target)
+            remote_digest = self.py_ssh.run_cmd(
+                f"truncate -s {os.path.getsize(local_path)} -- {quoted_target} && "
+                f"sha256sum -- {quoted_target}",
+                cmd_timeout=None,
+                get_pty=False,
+            ).out[:64]
+            if remote_digest != local_digest:
+                raise FileTransferError(
+                    f"Checksum mismatch of {target} after the delta transfer"
+                )
+            if not self.in_place:
+                sftp.posix_rename(target, remote_path)
+        except BaseException:
+            if not self.in_place:
+                try:
+                    sftp.remove(target)
+                except Exception:
+                    pass
+            raise
+        return sent
+
+    def _local_signature(self, local_path: str) -> tuple[list[str], str]:
+        """
+        Helper method to compute the SHA-256 of every block of the local file, and of the whole file.
+
+        Args:
+            local_path (str): Path to the local file.
+
+        Returns:
+            tuple[list[str], str]: The SHA-256 of each block, and of the file.
+        """
+        file_digest = hashlib.sha256()
+        blocks = []
+        with open(local_path, "rb") as f:
+            while block := f.read(self.block_size):
+                file_digest.update(block)
+                blocks.append(hashlib.sha256(block).hexdigest())
+        return blocks, file_digest.hexdigest()
+
+    def _remote_signature(self, remote_path: str) -> list[str] | None:
+        """
+        Helper method to compute the SHA-256 of every block of the remote file.
+
+        Args:
+            remote_path (str): Path to the file on the remote host.
+
+        Returns:
+            list[str] | None: The SHA-256 of each block, or None if the file doesn't exist.
+        """
+        path = shlex.quote(remote_path)
+        # split runs the filter once per block, one after the other, so the digests come in order
+        cmd_response = self.py_ssh.run_cmd(
+            f"if [ -f {path} ]; then echo exists; "
+            f"split -b {self.block_size} --filter=sha256sum -- {path}; fi",
+            cmd_timeout=None,
+            get_pty=False,
+        )
+        lines = cmd_response.out.splitlines()
+        if not lines:
+            return None
+        return [line[:64] for line in lines[1:]]
+
+    def _rebuild(
+        self, remote_path: str, target: str, to_copy: list[tuple[int, int, int]]
+    ) -> None:
+        """
+        Helper method to copy the remote file, then the blocks found at other offsets within the copy.
+
+        Args:
+            remote_path (str): Path to the file on the remote host.
+            target (str): Path to the copy.
+            to_copy (list[tuple[int, int, int]]): Destination block, source block and number of blocks of each run
+                of blocks to copy.
+        """
+        source = shlex.quote(remote_path)
+        destination = shlex.quote(target)
+        script = [f"cp -p --reflink=auto -- {source} {destination}"]
+        script += [
+            f"dd if={source} of={destination} bs={self.block_size} skip={skip} seek={seek} "
+            f"count={count} conv=notrunc status=none"
+            for seek, skip, count in to_copy
+        ]
+        # Fed on stdin, since there may be too many commands for a command line
+        self.py_ssh.run_cmd(
+            "sh -e", cmd_timeout=None, stdin="\n".join(script).encode() + b"\n"
+        )
+
+    def _send(
+        self, sftp: SFTPClient, local_path: str, target: str, to_send: list[int]
+    ) -> int:
+        """
+        Helper method to write the blocks of the local file at their offset in the remote file.
+
+        Args:
+            sftp (SFTPClient): The SFTP session.
+            local_path (str): Path to the local file.
+            target (str): Path to the remote file.
+            to_send (list[int]): Indexes of the blocks to send.
+
+        Returns:
+            int: Bytes sent.
+        """
+        sent = 0
+        if not to_send:
+            return sent
+        with open(local_path, "rb") as local_file:
+            with sftp.open(target, "r+b") as remote_file:
+                # Writes don't wait for their acknowledgement
+                remote_file.set_pipelined(True)
+                for index in to_send:
+                    block = os.pread(
+                        local_file.fileno(), self.block_size, index * self.block_size
+                    )
+                    remote_file.seek(index * self.block_size)
+                    remote_file.write(block)
+                    sent += len(block)
+        return sent
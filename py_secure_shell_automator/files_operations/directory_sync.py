@@ -0,0 +1,486 @@
+"""
+Provides the DirectorySync class, which copies the differences between a local and a remote directory, like rsync.
+"""
+
+import hashlib
+import os
+import queue
+import re
+import shlex
+import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+from paramiko import SFTPClient
+from .temporary_path import temporary_path
+from ..base_ssh import BaseSSH
+from ..models import SyncPlan
+
+# Bytes read from a local file at once
+_BLOCK_SIZE = 1024 * 1024
+# Size of the data of an SFTP read request of Paramiko, faster to read one by one than in larger reads
+_REQUEST_SIZE = 32 * 1024
+
+
+@dataclass(frozen=True)
+class _Entry:
+    """
+    Metadata of a file or directory of a synced tree.
+    """
+
+    is_dir: bool
+    size: int = 0
+    mtime: float = 0.0
+    mode: int = 0o755
+
+
+class DirectorySync:
+    """
+    Makes a destination directory identical to a source directory, one being local and the other remote,
+    copying only the files that differ.
+
+    The remote tree is listed by a single `find`, whatever its size. A file differs when its size or its
+    modification time, to the second, differs, or with `checksum`, when its SHA-256 differs, computed at
+    both ends only for the files of the same size. The copies keep the permission bits and the modification
+    time of the source, so they are found unchanged by the next sync.
+
+    The differing files are copied by `parallelism` SFTP sessions at once, each to a temporary file renamed
+    over the destination, so a file is never seen half written. Needs GNU `find` on the remote host, and
+    `sha256sum` with `checksum`. Only regular files and directories are synced, other entries are ignored.
+
+    Attributes:
+        py_ssh (BaseSSH): The object whose connection is used.
+        checksum (bool, optional): Whether to compare the content of the files of the same size instead of
+            their modification time. Defaults to False.
+        delete (bool, optional): Whether to delete the entries of the destination missing from the source.
+            Defaults to False.
+        dry_run (bool, optional): Whether to only plan the changes, without making them. Defaults to False.
+        parallelism (int, optional): Number of files copied at once. Defaults to 4.
+
+    Example:
+        ```python
+        from py_secure_shell_automator.files_operations import DirectorySync
+
+        plan = DirectorySync(py_ssh, delete=True, dry_run=True).to_remote('./build', '/srv/app')
+        print(plan)
+        ```
+    """
+
+    def __init__(
+        self,
+        py_ssh: BaseSSH,
+        checksum: bool = False,
+        delete: bool = False,
+        dry_run: bool = False,
+        parallelism: int = 4,
+    ) -> None:
+        if parallelism < 1:
+            raise ValueError("parallelism must be positive")
+        self.py_ssh = py_ssh
+        self.checksum = checksum
+        self.delete = delete
+        self.dry_run = dry_run
+        self.parallelism = parallelism
+
+    def to_remote(self, local_dir: str, remote_dir: str) -> SyncPlan:
+        """
+        Sync a local directory to the remote host, creating the remote directory if needed.
+
+        Args:
+            local_dir (str): Path to the local directory.
+            remote_dir (str): Path to the directory on the remote host.
+
+        Returns:
+            SyncPlan: The changes made, or to be made in a dry run.
+
+        Raises:
+            NotADirectoryError: If the local directory doesn't exist.
+            CmdError: If the remote directory can't be listed or changed.
+            OSError: If a file can't be copied.
+
+        Examples:
+            >>> plan = sync.to_remote('./build', '/srv/app')
+        """
+        if not os.path.isdir(local_dir):
+            raise NotADirectoryError(f"{local_dir} is not a directory")
+        source = self._scan_local(local_dir)
+        destination = self._scan_remote(remote_dir, missing_ok=True)
+        plan, same_size = self._plan(local_dir, remote_dir, source, destination)
+        if same_size:
+            self._compare_digests(
+                plan,
+                source,
+                same_size,
+                self._local_digests(local_dir, same_size),
+                self._remote_digests(remote_dir, same_size),
+            )
+        if self.dry_run:
+            return plan
+
+        remote_root = shlex.quote(remote_dir)
+        if plan.paths_to_delete:
+            self._run_with_paths(
+                f"cd {remote_root} && xargs -0 rm -rf --", plan.paths_to_delete
+            )
+        self._run_with_paths(
+            f"mkdir -p {remote_root} && cd {remote_root} && xargs -0 -r mkdir -p --",
+            plan.dirs_to_create,
+        )
+
+        def upload(sftp: SFTPClient, path: str) -> None:
+            entry = source[path]
+            remote_path = f"{remote_dir.rstrip('/')}/{path}"
+            temporary_file = temporary_path(remote_path)
+            try:
+                with open(os.path.join(local_dir, path), "rb") as local_file:
+                    with sftp.open(temporary_file, "wb") as remote_file:
+                        remote_file.set_pipelined(True)
+                        shutil.copyfileobj(local_file, remote_file, _BLOCK_SIZE)
+                        remote_file.chmod(entry.mode)
+                        remote_file.utime((entry.mtime, entry.mtime))
+                sftp.posix_rename(temporary_file, remote_path)
+            except BaseException:
+                _ignore_errors(sftp.remove, temporary_file)
+                raise
+
+        self._copy(plan, upload)
+        return plan
+
+    def from_remote(self, remote_dir: str, local_dir: str) -> SyncPlan:
+        """
+        Sync a directory of the remote host to a local directory, creating the local directory if needed.
+
+        Args:
+            remote_dir (str): Path to the directory on the remote host.
+            local_dir (str): Path to the local directory.
+
+        Returns:
+            SyncPlan: The changes made, or to be made in a dry run.
+
+        Raises:
+            CmdError: If the remote directory doesn't exist or can't be listed.
+            OSError: If a file can't be copied.
+
+        Examples:
+            >>> plan = sync.from_remote('/etc/nginx', './backup/nginx')
+        """
+        source = self._scan_remote(remote_dir, missing_ok=False)
+        destination = self._scan_local(local_dir) if os.path.isdir(local_dir) else {}
+        plan, same_size = self._plan(remote_dir, local_dir, source, destination)
+        if same_size:
+            self._compare_digests(
+                plan,
+                source,
+                same_size,
+                self._remote_digests(remote_dir, same_size),
+                self._local_digests(local_dir, same_size),
+            )
+        if self.dry_run:
+            return plan
+
+        for path in plan.paths_to_delete:
+            local_path = os.path.join(local_dir, path)
+            if os.path.isdir(local_path) and not os.path.islink(local_path):
+                shutil.rmtree(local_path)
+            else:
+                os.remove(local_path)
+        os.makedirs(local_dir, exist_ok=True)
+        for path in plan.dirs_to_create:
+            os.makedirs(os.path.join(local_dir, path), exist_ok=True)
+
+        def download(sftp: SFTPClient, path: str) -> None:
+            entry = source[path]
+            local_path = os.path.join(local_dir, path)
+            temporary_file = temporary_path(local_path)
+            try:
+                with sftp.open(f"{remote_dir.rstrip('/')}/{path}", "rb") as remote_file:
+                    remote_file.prefetch(entry.size)
+                    with open(temporary_file, "wb") as local_file:
+                        shutil.copyfileobj(remote_file, local_file, _REQUEST_SIZE)
+                os.chmod(temporary_file, entry.mode)
+                os.utime(temporary_file, (entry.mtime, entry.mtime))
+                os.replace(temporary_file, local_path)
+            except BaseException:
+                _ignore_errors(os.remove, temporary_file)
+                raise
+
+        self._copy(plan, download)
+        return plan
+
+    def _plan(
+        self,
+        source_dir: str,
+        destination_dir: str,
+        source: dict[str, _Entry],
+        destination: dict[str, _Entry],
+    ) -> tuple[SyncPlan, list[str]]:
+        """
+        Helper method to compare the trees by type, size and, unless `checksum` is set, modification time.
+
+        Args:
+            source_dir (str): Path to the source directory.
+            destination_dir (str): Path to the destination directory.
+            source (dict[str, _Entry]): Entries of the source, by relative path.
+            destination (dict[str, _Entry]): Entries of the destination, by relative path.
+
+        Returns:
+            tuple[SyncPlan, list[str]]: The changes to make, and with `checksum`, the files of the same size
+                at both ends, whose digests are still to compare.
+        """
+        plan = SyncPlan(source_dir, destination_dir, self.dry_run)
+        same_size = []
+        to_delete = []
+        for path, entry in sorted(source.items()):
+            existing = destination.get(path)
+            if existing is not None and existing.is_dir != entry.is_dir:
+                # Replaced by an entry of another type
+                to_delete.append(path)
+                existing = None
+            if entry.is_dir:
+                if existing is None:
+                    plan.dirs_to_create.append(path)
+            elif existing is None:
+                plan.files_to_create.append(path)
+                plan.bytes_to_copy += entry.size
+            elif existing.size != entry.size or (
+                not self.checksum and int(existing.mtime) != int(entry.mtime)
+            ):
+                plan.files_to_update.append(path)
+                plan.bytes_to_copy += entry.size
+            elif self.checksum:
+                same_size.append(path)
+            else:
+                plan.unchanged += 1
+
+        if self.delete:
+            to_delete += [path for path in destination if path not in source]
+        # Deleting a directory deletes its content
+        for path in sorted(to_delete):
+            if not plan.paths_to_delete or not path.startswith(
+                plan.paths_to_delete[-1] + "/"
+            ):
+                plan.paths_to_delete.append(path)
+        return plan, same_size
+
+    @staticmethod
+    def _compare_digests(
+        plan: SyncPlan,
+        source: dict[str, _Entry],
+        paths: list[str],
+        source_digests: dict[str, str],
+        destination_digests: dict[str, str],
+    ) -> None:
+        """
+        Helper method to add the files whose digests differ to `files_to_update`.
+
+        Args:
+            plan (SyncPlan): The plan, updated in place.
+            source (dict[str, _Entry]): Entries of the source, by relative path.
+            paths (list[str]): The files of the same size at both ends.
+            source_digests (dict[str, str]): SHA-256 of the files of the source, by relative path.
+            destination_digests (dict[str, str]): SHA-256 of the files of the destination, by relative path.
+        """
+        for path in paths:
+            if source_digests[path] == destination_digests.get(path):
+                plan.unchanged += 1
+            else:
+                plan.files_to_update.append(path)
+                plan.bytes_to_copy += source[path].size
+        plan.files_to_update.sort()
+
+    def _copy(self, plan: SyncPlan, copy: Callable[[SFTPClient, str], None]) -> None:
+        """
+        Helper method to copy the files to create and update, each SFTP session taking the next pending file.
+
+        Args:
+            plan (SyncPlan): The plan.
+            copy (Callable[[SFTPClient, str], None]): Copies a file, by relative path, with an SFTP session.
+
+        Raises:
+            Exception: The first error of a session. The other sessions stop after their current file.
+        """
+        paths = plan.files_to_create + plan.files_to_update
+        if not paths:
+            return None
+        pending: queue.SimpleQueue[str] = queue.SimpleQueue()
+        for path in paths:
+            pending.put(path)
+        failed = threading.Event()
+
+        def worker() -> None:
+            sftp = self.py_ssh._ssh.open_sftp()
+            try:
+                while not failed.is_set():
+                    try:
+                        path = pending.get_nowait()
+                    except queue.Empty:
+                        return None
+                    copy(sftp, path)
+            except BaseException:
+                failed.set()
+                raise
+            finally:
+                sftp.close()
+
+        workers = min(self.parallelism, len(paths))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(worker) for _ in range(workers)]
+        for future in futures:
+            future.result()
+
+    @staticmethod
+    def _scan_local(root: str) -> dict[str, _Entry]:
+        """
+        Helper method to list a local tree.
+
+        Args:
+            root (str): Path to the directory.
+
+        Returns:
+            dict[str, _Entry]: The files and directories of the tree, by path relative to the root, with `/` separators.
+        """
+        entries = {}
+        pending = [""]
+        while pending:
+            directory = pending.pop()
+            with os.scandir(os.path.join(root, directory)) as scanned:
+                for item in scanned:
+                    path = f"{directory}/{item.name}" if directory else item.name
+                    if item.is_dir(follow_symlinks=False):
+                        entries[path] = _Entry(True)
+                        pending.append(path)
+                    elif item.is_file(follow_symlinks=False):
+                        item_stat = item.stat(follow_symlinks=False)
+                        entries[path] = _Entry(
+                            False,
+                            item_stat.st_size,
+                            item_stat.st_mtime,
+                            stat.S_IMODE(item_stat.st_mode),
+                        )
+        return entries
+
+    def _scan_remote(self, root: str, missing_ok: bool) -> dict[str, _Entry]:
+        """
+        Helper method to list a remote tree with a single command.
+
+        Args:
+            root (str): Path to the directory on the remote host.
+            missing_ok (bool): Whether a missing directory is an empty tree instead of an error.
+
+        Returns:
+            dict[str, _Entry]: The files and directories of the tree, by path relative to the root.
+        """
+        # NUL separated, since a file name may contain any other character
+        cmd = (
+            f"cd {shlex.quote(root)} && LC_ALL=C find . -mindepth 1 "
+            r"\( -type f -o -type d \) -printf '%y\0%P\0%s\0%T@\0%m\0'"
+        )
+        if missing_ok:
+            cmd = f"if [ -e {shlex.quote(root)} ]; then {cmd}; fi"
+        fields = (
+            self.py_ssh.run_cmd(cmd, cmd_timeout=None, get_pty=False, decode=False)
+            .out.split(b"\0")
+        )
+        entries = {}
+        for start in range(0, len(fields) - 1, 5):
+            kind, path, size, mtime, mode = fields[start : start + 5]
+            entries[os.fsdecode(path)] = _Entry(
+                kind == b"d", int(size), float(mtime), int(mode, 8)
+            )
+        return entries
+
+    def _local_digests(self, root: str, paths: list[str]) -> dict[str, str]:
+        """
+        Helper method to compute the SHA-256 of local files, `parallelism` at once.
+
+        Args:
+            root (str): Path to the directory.
+            paths (list[str]): Paths of the files, relative to the root.
+
+        Returns:
+            dict[str, str]: SHA-256 of each file, by relative path.
+        """
+
+        def digest(path: str) -> str:
+            file_digest = hashlib.sha256()
+            with open(os.path.join(root, path), "rb") as f:
+                while block := f.read(_BLOCK_SIZE):
+                    file_digest.update(block)
+            return file_digest.hexdigest()
+
+        with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+            return dict(zip(paths, executor.map(digest, paths)))
+
+    def _remote_digests(self, root: str, paths: list[str]) -> dict[str, str]:
+        """
+        Helper method to compute the SHA-256 of remote files with a single command.
+
+        Args:
+            root (str): Path to the directory on the remote host.
+            paths (list[str]): Paths of the files, relative to the root.
+
+        Returns:
+            dict[str, str]: SHA-256 of each file, by relative path.
+        """
+        if not paths:
+            return {}
+        # As few sha256sum processes as the length of the command lines allows, one after the other so
+        # their outputs don't interleave
+        out = self._run_with_paths(
+            f"cd {shlex.quote(root)} && xargs -0 -r sha256sum --", paths
+        )
+        digests = {}
+        for line in out.splitlines():
+            digest, path = line[:64], line[66:]
+            if line.startswith(b"\\"):
+                # The name contains a backslash or a line break, escaped by sha256sum
+                digest, path = line[1:65], _unescape(line[67:])
+            digests[os.fsdecode(path)] = digest.decode("ascii")
+        return digests
+
+    def _run_with_paths(self, cmd: str, paths: list[str]) -> bytes:
+        """
+        Helper method to run a command fed with NUL separated paths on its input, so there is no limit
+        to the number of paths.
+
+        Args:
+            cmd (str): The command.
+            paths (list[str]): The paths.
+
+        Returns:
+            bytes: The output of the command.
+        """
+        stdin = b"".join(os.fsencode(path) + b"\0" for path in paths)
+        return self.py_ssh.run_cmd(
+            cmd, cmd_timeout=None, decode=False, stdin=stdin
+        ).out
+
+
+def _unescape(name: bytes) -> bytes:
+    """
+    Helper function to undo the escaping of a file name by sha256sum.
+
+    Args:
+        name (bytes): The escaped name.
+
+    Returns:
+        bytes: The name.
+    """
+    escapes = {b"\\\\": b"\\", b"\\n": b"\n", b"\\r": b"\r"}
+    return re.sub(rb"\\[\\nr]", lambda match: escapes[match.group()], name)
+
+
+def _ignore_errors(function: Callable, *args) -> None:
+    """
+    Helper function to clean up after a failure, without hiding the error of the failure.
+
+    Args:
+        function (Callable): The clean-up function.
+        *args: Arguments of the function.
+    """
+    try:
+        function(*args)
+    except Exception:
+        pass
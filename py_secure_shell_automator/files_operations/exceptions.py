@@ -67,3 +67,19 @@ class OwnerChangeError(Exception):
     """
 
     ...
+
+
+class DirectorySyncError(Exception):
+    """
+    Raised when there is an error syncing a directory.
+    """
+
+    ...
+
+
+class RemoteFileReadError(Exception):
+    """
+    Raised when there is an error opening or reading a remote file.
+    """
+
+    ...
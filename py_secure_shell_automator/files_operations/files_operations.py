@@ -2,9 +2,18 @@
 Module containing files operations for the py_secure_shell_automator module
 """
 
+import io
+import os
+import shlex
+from typing import Iterator
+from .chunked_transfer import ChunkedTransfer
+from .delta_transfer import DeltaTransfer
+from .directory_sync import DirectorySync
 from .exceptions import *
+from .remote_file import RemoteFile, _CommandRawFile, _SFTPRawFile
+from .tar_transfer import TarTransfer
 from ..base_ssh import BaseSSH
-from ..models import Directory
+from ..models import Directory, FileInfo, SyncPlan
 
 
 class SSHFileOperations(BaseSSH):
@@ -12,17 +21,45 @@ class SSHFileOperations(BaseSSH):
     Class to perform files operations on a remote machine
     """
 
-    def copy_file_to_remote(self, local_path: str, remote_path: str) -> None:
+    def copy_file_to_remote(
+        self,
+        local_path: str,
+        remote_path: str,
+        parallelism: int = 1,
+        chunk_size: int = 64 * 1024 * 1024,
+        connections: int = 1,
+        verify: bool = False,
+        delta: bool = False,
+        block_size: int = 1024 * 1024,
+        in_place: bool = False,
+    ) -> None:
         """
         Copies a file from the local machine to the remote host. `SFTP` must be initialized.
     
         The `local_path` and `remote_path` should be absolute paths, including the filename.
     
         If the file already exists at the `remote_path`, it will be overwritten.
+
+        With `parallelism` or `connections` above 1, or `verify`, the file is split into ranges of `chunk_size`
+        bytes moved concurrently by several SFTP sessions, see `ChunkedTransfer`. Through a broker, the broker
+        copies the file in one stream, unverified.
+
+        With `delta`, only the blocks of `block_size` bytes that differ from the existing remote file are sent, and
+        the SHA-256 of the result is compared with the one of the local file, see `DeltaTransfer`. It suits large
+        files changed in a few places, and takes precedence over the other options. Through a broker, it's ignored.
     
         Args:
             local_path (str): Absolute path to the file on the local machine.
             remote_path (str): Absolute path where the file should be copied to on the remote host.
+            parallelism (int, optional): Number of SFTP sessions moving ranges at once. Defaults to 1.
+            chunk_size (int, optional): Bytes of a range. Defaults to 64 MiB.
+            connections (int, optional): Number of SSH connections the sessions are spread over. Defaults to 1.
+            verify (bool, optional): Whether to compare the SHA-256 of every range at both ends, transferring
+                the mismatching ranges again. Defaults to False.
+            delta (bool, optional): Whether to send only the blocks that differ from the remote file. Defaults to False.
+            block_size (int, optional): Bytes of a block compared with `delta`. Defaults to 1 MiB.
+            in_place (bool, optional): Whether `delta` changes the remote file directly instead of a copy renamed
+                over it, which leaves the file half updated if the transfer fails. Defaults to False.
     
         Raises:
             SFTPNotInitializedError: If SFTP is not initialized.
@@ -31,25 +68,59 @@ class SSHFileOperations(BaseSSH):
         Examples:
             >>> py_ssh = PySecureShellAutomator(host='hostname', username='username', password='password', sftp=True)
             >>> py_ssh.copy_file_to_remote('/absolute/path/to/local/file.txt', '/absolute/path/to/remote/file.txt')
+            >>> py_ssh.copy_file_to_remote('/images/disk.qcow2', '/var/lib/images/disk.qcow2', parallelism=8, verify=True)
+            >>> py_ssh.copy_file_to_remote('/images/vm.qcow2', '/var/lib/images/vm.qcow2', delta=True)
         """
         if not self._is_sftp_initialized:
             raise SFTPNotInitializedError("SFTP is not initialized")
         try:
-            self._sftp.put(local_path, remote_path)
+            with self._observe("sftp_put", remote_path=remote_path) as event:
+                if self._broker is None and delta:
+                    # Only the blocks sent count
+                    event.bytes_transferred = DeltaTransfer(
+                        self, block_size, in_place
+                    ).upload(local_path, remote_path)
+                    return None
+                if self._broker is None and (
+                    parallelism > 1 or connections > 1 or verify
+                ):
+                    event.bytes_transferred = ChunkedTransfer(
+                        self, parallelism, chunk_size, connections, verify=verify
+                    ).upload(local_path, remote_path)
+                    return None
+                self._sftp.put(local_path, remote_path)
+                event.bytes_transferred = os.path.getsize(local_path)
         except Exception as e:
             raise FileTransferError(f"Error copying file to remote: {e}")
     
-    def copy_file_from_remote(self, remote_path: str, local_path: str) -> None:
+    def copy_file_from_remote(
+        self,
+        remote_path: str,
+        local_path: str,
+        parallelism: int = 1,
+        chunk_size: int = 64 * 1024 * 1024,
+        connections: int = 1,
+        verify: bool = False,
+    ) -> None:
         """
         Copies a file from the remote host to the local machine. SFTP must be initialized.
     
         The `remote_path` and `local_path` should be absolute paths, including the filename.
     
         If the file already exists at the `local_path`, it will be overwritten.
+
+        With `parallelism` or `connections` above 1, or `verify`, the file is split into ranges of `chunk_size`
+        bytes moved concurrently by several SFTP sessions, see `ChunkedTransfer`. Through a broker, the broker
+        copies the file in one stream, unverified.
     
         Args:
             remote_path (str): Absolute path to the file on the remote host.
             local_path (str): Absolute path where the file should be copied to on the local machine.
+            parallelism (int, optional): Number of SFTP sessions moving ranges at once. Defaults to 1.
+            chunk_size (int, optional): Bytes of a range. Defaults to 64 MiB.
+            connections (int, optional): Number of SSH connections the sessions are spread over. Defaults to 1.
+            verify (bool, optional): Whether to compare the SHA-256 of every range at both ends, transferring
+                the mismatching ranges again. Defaults to False.
     
         Raises:
             SFTPNotInitializedError: If SFTP is not initialized.
@@ -58,14 +129,196 @@ class SSHFileOperations(BaseSSH):
         Examples:
             >>> py_ssh = PySecureShellAutomator(host='hostname', username='username', password='password', sftp=True)
             >>> py_ssh.copy_file_from_remote('/absolute/path/to/remote/file.txt', '/absolute/path/to/local/file.txt')
+            >>> py_ssh.copy_file_from_remote('/var/backups/db.dump', '/backups/db.dump', parallelism=8, verify=True)
         """
         if not self._is_sftp_initialized:
             raise SFTPNotInitializedError("SFTP is not initialized")
         try:
-            self._sftp.get(remote_path, local_path)
+            with self._observe("sftp_get", remote_path=remote_path) as event:
+                if self._broker is None and (
+                    parallelism > 1 or connections > 1 or verify
+                ):
+                    event.bytes_transferred = ChunkedTransfer(
+                        self, parallelism, chunk_size, connections, verify=verify
+                    ).download(remote_path, local_path)
+                    return None
+                self._sftp.get(remote_path, local_path)
+                event.bytes_transferred = os.path.getsize(local_path)
         except Exception as e:
             raise FileTransferError(f"Error copying file from remote: {e}")
 
+    def sync_directory_to_remote(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        checksum: bool = False,
+        delete: bool = False,
+        dry_run: bool = False,
+        parallelism: int = 4,
+    ) -> SyncPlan:
+        """
+        Makes a directory of the remote host identical to a local directory, copying only the files that differ,
+        like rsync.
+
+        The remote tree is listed by a single command. A file differs when its size or its modification time differs,
+        or with `checksum`, when its content differs. The differing files are copied in parallel, each one to a temporary
+        file renamed over the remote file, keeping the permission bits and the modification time of the local file.
+        Needs GNU `find` on the remote host.
+
+        Args:
+            local_dir (str): Path to the local directory.
+            remote_dir (str): Path to the directory on the remote host, created if needed.
+            checksum (bool, optional): Whether to compare the SHA-256 of the files of the same size instead of their
+                modification time. Defaults to False.
+            delete (bool, optional): Whether to delete the remote files and directories missing from the local directory.
+                Defaults to False.
+            dry_run (bool, optional): Whether to only plan the changes, without making them. Defaults to False.
+            parallelism (int, optional): Number of files copied at once. Defaults to 4.
+
+        Returns:
+            SyncPlan: The changes made, or to be made in a dry run.
+
+        Raises:
+            DirectorySyncError: If there is an error listing, copying or deleting files.
+
+        Examples:
+            >>> plan = py_ssh.sync_directory_to_remote('./build', '/srv/app', delete=True, dry_run=True)
+            >>> print(plan)
+            ~ static/app.js
+            + static/app.js.map
+            - static/old.js
+            2 files to copy (183402 bytes), 1 to delete, 12034 unchanged
+            >>> py_ssh.sync_directory_to_remote('./build', '/srv/app', delete=True)
+        """
+        try:
+            with self._observe("sftp_sync_put", remote_path=remote_dir) as event:
+                plan = DirectorySync(
+                    self, checksum, delete, dry_run, parallelism
+                ).to_remote(local_dir, remote_dir)
+                event.bytes_transferred = 0 if dry_run else plan.bytes_to_copy
+                return plan
+        except Exception as e:
+            raise DirectorySyncError(f"Error syncing directory to remote: {e}")
+
+    def sync_directory_from_remote(
+        self,
+        remote_dir: str,
+        local_dir: str,
+        checksum: bool = False,
+        delete: bool = False,
+        dry_run: bool = False,
+        parallelism: int = 4,
+    ) -> SyncPlan:
+        """
+        Makes a local directory identical to a directory of the remote host, copying only the files that differ,
+        like rsync.
+
+        The remote tree is listed by a single command. A file differs when its size or its modification time differs,
+        or with `checksum`, when its content differs. The differing files are copied in parallel, each one to a temporary
+        file renamed over the local file, keeping the permission bits and the modification time of the remote file.
+        Needs GNU `find` on the remote host.
+
+        Args:
+            remote_dir (str): Path to the directory on the remote host.
+            local_dir (str): Path to the local directory, created if needed.
+            checksum (bool, optional): Whether to compare the SHA-256 of the files of the same size instead of their
+                modification time. Defaults to False.
+            delete (bool, optional): Whether to delete the local files and directories missing from the remote directory.
+                Defaults to False.
+            dry_run (bool, optional): Whether to only plan the changes, without making them. Defaults to False.
+            parallelism (int, optional): Number of files copied at once. Defaults to 4.
+
+        Returns:
+            SyncPlan: The changes made, or to be made in a dry run.
+
+        Raises:
+            DirectorySyncError: If there is an error listing, copying or deleting files.
+
+        Examples:
+            >>> plan = py_ssh.sync_directory_from_remote('/etc/nginx', './backup/nginx', checksum=True)
+            >>> print(plan.files_to_update)  # Output: ['sites-available/default']
+        """
+        try:
+            with self._observe("sftp_sync_get", remote_path=remote_dir) as event:
+                plan = DirectorySync(
+                    self, checksum, delete, dry_run, parallelism
+                ).from_remote(remote_dir, local_dir)
+                event.bytes_transferred = 0 if dry_run else plan.bytes_to_copy
+                return plan
+        except Exception as e:
+            raise DirectorySyncError(f"Error syncing directory from remote: {e}")
+
+    def upload_tree(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        compress: bool = False,
+        run_as_root: bool = False,
+    ) -> None:
+        """
+        Copies the content of a local directory into a directory of the remote host, created if needed.
+
+        The files are packed on the fly into a tar stream, sent to `tar -x` through the input of a single command,
+        so copying many small files costs no round trip per file, and no archive is written on either side.
+        Permissions, modification times and symbolic links are kept, and ownership too when extracting as root.
+        Existing remote files are overwritten, the others are kept. SFTP is not needed.
+
+        Args:
+            local_dir (str): Path to the local directory.
+            remote_dir (str): Path to the directory on the remote host.
+            compress (bool, optional): Whether to compress the stream with gzip, worth it on slow links. Defaults to False.
+            run_as_root (bool, optional): Whether to extract the files as root. Defaults to False.
+
+        Raises:
+            FileTransferError: If there is an error packing, sending or extracting the files.
+
+        Examples:
+            >>> py_ssh.upload_tree('./node_modules', '/srv/app/node_modules', compress=True)
+        """
+        try:
+            with self._observe("tar_put", remote_path=remote_dir) as event:
+                event.bytes_transferred = TarTransfer(
+                    self, compress, self._get_user(run_as_root)
+                ).upload(local_dir, remote_dir)
+        except Exception as e:
+            raise FileTransferError(f"Error copying directory to remote: {e}")
+
+    def download_tree(
+        self,
+        remote_dir: str,
+        local_dir: str,
+        compress: bool = False,
+        run_as_root: bool = False,
+    ) -> None:
+        """
+        Copies the content of a directory of the remote host into a local directory, created if needed.
+
+        The files are packed on the fly by `tar -c` into a tar stream, received through the output of a single
+        command and extracted as it arrives, so copying many small files costs no round trip per file, and no
+        archive is written on either side. Permissions, modification times and symbolic links are kept, and
+        ownership too when running as root locally. Members that would be extracted outside of `local_dir` are
+        refused. Existing local files are overwritten, the others are kept. SFTP is not needed.
+
+        Args:
+            remote_dir (str): Path to the directory on the remote host.
+            local_dir (str): Path to the local directory.
+            compress (bool, optional): Whether to compress the stream with gzip, worth it on slow links. Defaults to False.
+            run_as_root (bool, optional): Whether to read the files as root. Defaults to False.
+
+        Raises:
+            FileTransferError: If there is an error packing, receiving or extracting the files.
+
+        Examples:
+            >>> py_ssh.download_tree('/var/www/uploads', './uploads')
+        """
+        try:
+            with self._observe("tar_get", remote_path=remote_dir) as event:
+                event.bytes_transferred = TarTransfer(
+                    self, compress, self._get_user(run_as_root)
+                ).download(remote_dir, local_dir)
+        except Exception as e:
+            raise FileTransferError(f"Error copying directory from remote: {e}")
+
     def get_file_content(self, filepath: str, run_as_root: bool = False) -> str:
         """
         Gets the content of a file as a string.
@@ -85,7 +338,7 @@ class SSHFileOperations(BaseSSH):
             >>> print(content)
             'File content'
         """
-        cmd = f"cat {filepath}"
+        cmd = self._file_content_command(filepath)
         cmd_response = self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=cmd,
@@ -93,6 +346,73 @@ class SSHFileOperations(BaseSSH):
         )
         return cmd_response.out
 
+    def open_remote(
+        self,
+        path: str,
+        mode: str = "rb",
+        run_as_root: bool = False,
+        follow: bool = False,
+        buffer_size: int = 1024 * 1024,
+        encoding: str = "utf-8",
+        poll_interval: float = 1.0,
+    ) -> RemoteFile | io.TextIOWrapper:
+        """
+        Opens a file of the remote host for reading, without transferring it.
+
+        The file is read over an SFTP session of its own, a buffer of `buffer_size` bytes at a time, fetched as
+        requests sent at once. As root, or through a broker, each buffer is read by a `dd` command instead, so
+        larger buffers make fewer round trips. The file object supports `seek`, relative to the end of the file too,
+        `read_range` and line iteration. SFTP doesn't need to be initialized.
+
+        Args:
+            path (str): Path to the file on the remote host.
+            mode (str, optional): "rb" for a binary `RemoteFile`, or "r" for a text file object over it. Defaults to "rb".
+            run_as_root (bool, optional): Whether to read the file as root, with `dd`. Defaults to False.
+            follow (bool, optional): Whether reaching the end of the file waits for more data, like `tail -f`,
+                instead of ending the read. Defaults to False.
+            buffer_size (int, optional): Bytes fetched per read of the remote file. Defaults to 1 MiB.
+            encoding (str, optional): Encoding of the file in text mode. Defaults to "utf-8".
+            poll_interval (float, optional): Seconds between two checks of the size of the file when following it.
+                Defaults to 1.
+
+        Returns:
+            RemoteFile | io.TextIOWrapper: The file object, to close once done, such as with a `with` statement.
+
+        Raises:
+            ValueError: If the mode is not "rb" or "r".
+            RemoteFileReadError: If the file can't be opened.
+
+        Examples:
+            Read the last MiB of a large log
+            >>> with py_ssh.open_remote('/var/log/app.log') as f:
+            >>>     f.seek(-1024 * 1024, os.SEEK_END)
+            >>>     tail = f.read()
+
+            Follow a log as root, like `tail -f`
+            >>> with py_ssh.open_remote('/var/log/auth.log', 'r', run_as_root=True, follow=True) as f:
+            >>>     f.seek(0, os.SEEK_END)
+            >>>     for line in f:
+            >>>         print(line, end='')
+        """
+        if mode not in ("rb", "r"):
+            raise ValueError(f"Invalid mode: {mode!r}, expected 'rb' or 'r'")
+        try:
+            if run_as_root or self._broker is not None:
+                raw = _CommandRawFile(
+                    self, path, self._get_user(run_as_root), follow, poll_interval
+                )
+            else:
+                sftp = self._ssh.open_sftp()
+                try:
+                    raw = _SFTPRawFile(sftp, path, follow, poll_interval)
+                except BaseException:
+                    sftp.close()
+                    raise
+        except Exception as e:
+            raise RemoteFileReadError(f"Error opening remote file {path}: {e}")
+        file = RemoteFile(raw, buffer_size)
+        return file if mode == "rb" else io.TextIOWrapper(file, encoding=encoding)
+
     def remove_file(
         self,
         filepath: str,
@@ -117,7 +437,7 @@ class SSHFileOperations(BaseSSH):
             Force remove a write-protected file
             >>> py_ssh.remove_file('/path/to/protected_file.txt', force=True)
         """
-        cmd = f'rm -f "{filepath}"' if force else f'rm "{filepath}"'
+        cmd = self._remove_file_command(filepath, force)
         self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=cmd,
@@ -158,7 +478,7 @@ class SSHFileOperations(BaseSSH):
             Force remove a non-empty directory as root
             >>> py_ssh.remove_directory('/path/to/non_empty_directory', force=True, run_as_root=True)
         """
-        cmd = f'rm -rf "{dirpath}"' if force else f'rm -r "{dirpath}"'
+        cmd = self._remove_directory_command(dirpath, force)
         self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=cmd,
@@ -186,7 +506,7 @@ class SSHFileOperations(BaseSSH):
             # Create a directory as root
             >>> py_ssh.create_directory('/path/to/new_directory', run_as_root=True)
         """
-        cmd = f'mkdir -p "{dirpath}"'  # Wrap dirpath in quotes
+        cmd = self._create_directory_command(dirpath)
         self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=cmd,
@@ -195,19 +515,22 @@ class SSHFileOperations(BaseSSH):
         return None
 
     def get_directory_structure(
-        self, path: str, run_as_root: bool = False
+        self, path: str, run_as_root: bool = False, metadata: bool = False
     ) -> list[Directory]:
         """
         List the content of a directory on the remote server.
 
         This method returns a list of Directory objects, each representing a directory and its files.
+        The whole tree is listed by a single `find` command, whatever its size. Needs GNU `find` on the remote host.
 
         Args:
             path (str): The path to the directory to list. This should be an absolute path.
             run_as_root (bool, optional): Whether to run the command with root user privileges. Defaults to False.
+            metadata (bool, optional): Whether to fill in the size, modification time, mode and owner of the
+                directories and files, in `info` and `file_info`. Defaults to False.
 
         Returns:
-            list[Directory]: A list of Directory objects representing each directory and its files.
+            list[Directory]: A list of Directory objects representing each directory and its files, parents first.
 
         Raises:
             ListDirectoryContentError: If the command fails to list the directory content.
@@ -221,43 +544,269 @@ class SSHFileOperations(BaseSSH):
             >>>     for file in directory.files:
             >>>         print(f"{file}")
 
+            List the largest files
+            >>> dir_structure = py_ssh.get_directory_structure('/var/log', metadata=True)
+            >>> files = [(info.size, f"{d.dir}/{info.name}") for d in dir_structure for info in d.file_info]
+            >>> print(sorted(files)[-3:])
+
         Notes:
             - Ensure that the user has the necessary permissions to list the directory content at the specified path.
         """
-        directory_structure: list[Directory] = []
-        directories_command = f"LC_ALL=C.UTF-8 find {path} -type d"
-        directories_response = self.run_cmd(
-            user="root" if run_as_root else None,
-            cmd=directories_command,
+        cmd_response = self.run_cmd(
+            user=self._get_user(run_as_root),
+            cmd=self._directory_structure_command(path, metadata),
             raise_exception=True,
             custom_exception=ListDirectoryContentError,
+            cmd_timeout=None,
+            get_pty=False,
+            decode=False,
         )
+        return self._parse_directory_structure(cmd_response.out, metadata)
 
-        for dir in directories_response.out.splitlines():
-            # Use find to list files and then grep to simulate -maxdepth 1 behavior
-            files_command = (
-                f"LC_ALL=C.UTF-8 find '{dir}' -type f | grep -E \"^{dir}/[^/]+$\""
-            )
-            files_response = self.run_cmd(
-                user="root" if run_as_root else None,
-                cmd=files_command,
-                raise_exception=False,
-            )
+    def iter_directory_structure(
+        self,
+        path: str,
+        run_as_root: bool = False,
+        metadata: bool = False,
+        max_depth: int | None = None,
+        include: str | list[str] | None = None,
+        exclude: str | list[str] | None = None,
+        regex: bool = False,
+        flat: bool = False,
+    ) -> Iterator[Directory | FileInfo | str]:
+        """
+        Iterate over the content of a directory on the remote server as it's listed.
 
-            dirs_response_out = files_response.out
-            if dirs_response_out == "":
-                directory_structure.append(Directory(dir=dir, files=[]))
-                continue
+        Unlike `get_directory_structure`, the output of the `find` command is parsed as it arrives, and each
+        directory is yielded as soon as all of its files are listed, so memory stays bounded by the depth of
+        the tree and the size of its directories, whatever the size of the tree. Directories come once complete,
+        so a directory comes after its subdirectories. The filters are applied by `find` on the remote host.
+        Stopping the iteration, or closing the generator, stops the remote command.
 
-            if files_response.ext_code != 0:
-                raise ListDirectoryContentError(
-                    f"Error listing directory content: {dirs_response_out}"
-                )
+        Args:
+            path (str): The path to the directory to list. This should be an absolute path.
+            run_as_root (bool, optional): Whether to run the command with root user privileges. Defaults to False.
+            metadata (bool, optional): Whether to fill in the size, modification time, mode and owner of the
+                directories and files. Defaults to False.
+            max_depth (int, optional): Depth of the deepest directories listed, `path` being at depth 0.
+                If None, the whole tree is listed. Defaults to None.
+            include (str | list[str], optional): Patterns of the files to list, the others are skipped. Directories
+                are always listed. If None, every file is listed. Defaults to None.
+            exclude (str | list[str], optional): Patterns of the files and directories to skip, with their content.
+                Defaults to None.
+            regex (bool, optional): Whether the patterns are POSIX extended regular expressions matched against the
+                whole path, instead of shell globs matched against the name. Defaults to False.
+            flat (bool, optional): Whether to yield the paths of the files one by one, or `FileInfo` objects named
+                after their path with `metadata`, instead of `Directory` objects. Defaults to False.
+
+        Yields:
+            Directory | FileInfo | str: The directories, children first, or the files if `flat`.
+
+        Raises:
+            ListDirectoryContentError: If the command fails to list the directory content. Raised once the
+                entries it could list are yielded.
+
+        Examples:
+            >>> for directory in py_ssh.iter_directory_structure('/srv/data', max_depth=2, exclude='.snapshot'):
+            >>>     print(directory.dir, len(directory.files))
+
+            Find the first core dump, then stop the scan
+            >>> for file in py_ssh.iter_directory_structure('/var', include='core.*', flat=True):
+            >>>     print(file)
+            >>>     break
+        """
+        root = self._strip_trailing_slashes(path)
+        stream = self.stream_cmd(
+            self._directory_structure_command(
+                root, metadata, max_depth, include, exclude, regex
+            ),
+            user=self._get_user(run_as_root),
+            custom_exception=ListDirectoryContentError,
+            cmd_timeout=None,
+            lines=False,
+            chunk_size=256 * 1024,
+            get_pty=False,
+        )
+        width = 6 if metadata else 2
+        # Length of the root in the paths of its entries
+        prefix = len(root.rstrip("/"))
+        pending = b""
+        # The directories being listed, from the root to the current one
+        stack: list[Directory] = []
+        error = None
+        with stream:
+            try:
+                for chunk in stream:
+                    fields = (pending + chunk).split(b"\0")
+                    # The last field, and the entry it belongs to, may be completed by the next chunk
+                    complete = (len(fields) - 1) // width * width
+                    pending = b"\0".join(fields[complete:])
+                    for start in range(0, complete, width):
+                        is_dir, entry_path, info = self._parse_entry(
+                            fields[start : start + width], metadata
+                        )
+                        if (
+                            max_depth is not None
+                            and is_dir
+                            and entry_path != root
+                            # The root is "/" itself at depth 0, not a directory at depth 1
+                            and entry_path[prefix:].count("/") > max_depth
+                        ):
+                            # Listed by find only for the files at max_depth
+                            continue
+                        if flat:
+                            if not is_dir:
+                                yield entry_path if info is None else info
+                            continue
+                        parent, _, name = entry_path.rpartition("/")
+                        # find lists a directory before its content, so the directories left are complete
+                        while stack and stack[-1].dir != (parent or "/"):
+                            yield stack.pop()
+                        if is_dir:
+                            stack.append(
+                                Directory(
+                                    dir=entry_path,
+                                    files=[],
+                                    info=info,
+                                    file_info=[] if metadata else None,
+                                )
+                            )
+                        elif stack:
+                            stack[-1].files.append(name)
+                            if info is not None:
+                                info.name = name
+                                stack[-1].file_info.append(info)
+            except ListDirectoryContentError as e:
+                # Raised by the stream once the output is over, the directories still open are yielded first
+                error = e
+            while stack:
+                yield stack.pop()
+        if error is not None:
+            raise error
+
+    @staticmethod
+    def _strip_trailing_slashes(path: str) -> str:
+        """
+        Helper method to strip the trailing slashes of a path, which would make the paths printed by `find`
+        for the path and for its entries disagree.
+
+        Args:
+            path (str): The path.
+
+        Returns:
+            str: The path without trailing slashes, or "/".
+        """
+        if path.endswith("/"):
+            return path.rstrip("/") or "/"
+        return path
+
+    @staticmethod
+    def _directory_structure_command(
+        path: str,
+        metadata: bool,
+        max_depth: int | None = None,
+        include: str | list[str] | None = None,
+        exclude: str | list[str] | None = None,
+        regex: bool = False,
+    ) -> str:
+        """
+        Helper method to build the command listing the directories and files of a tree.
+
+        Args:
+            path (str): The directory path.
+            metadata (bool): Whether to list the metadata of the entries too.
+            max_depth (int, optional): Depth of the deepest directories whose files are listed. Defaults to None.
+            include (str | list[str], optional): Patterns of the files to list. Defaults to None.
+            exclude (str | list[str], optional): Patterns of the entries to skip, with their content. Defaults to None.
+            regex (bool, optional): Whether the patterns are regular expressions matched against the path.
+                Defaults to False.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+
+        def matches(patterns: str | list[str]) -> str:
+            test = "-regex" if regex else "-name"
+            if isinstance(patterns, str):
+                patterns = [patterns]
+            return " -o ".join(f"{test} {shlex.quote(pattern)}" for pattern in patterns)
+
+        path = SSHFileOperations._strip_trailing_slashes(path)
+        options = "-regextype posix-extended " if regex else ""
+        if max_depth is not None:
+            # The files of the directories at max_depth are one level deeper
+            options += f"-maxdepth {max_depth + 1} "
+        prune = rf"\( {matches(exclude)} \) -prune -o " if exclude else ""
+        files = rf"\( -type f \( {matches(include)} \) \)" if include else "-type f"
+        # NUL separated, since a file name may contain any other character
+        fields = r"%y\0%p\0%s\0%T@\0%m\0%u\0" if metadata else r"%y\0%p\0"
+        return (
+            f"LC_ALL=C find {shlex.quote(path)} {options}"
+            rf"{prune}\( -type d -o {files} \) -printf '{fields}'"
+        )
+
+    @staticmethod
+    def _parse_entry(
+        fields: list[bytes], metadata: bool
+    ) -> tuple[bool, str, FileInfo | None]:
+        """
+        Helper method to parse an entry printed by the command built by `_directory_structure_command`.
+
+        Args:
+            fields (list[bytes]): The fields of the entry.
+            metadata (bool): Whether the fields hold the metadata of the entry.
+
+        Returns:
+            tuple[bool, str, FileInfo | None]: Whether the entry is a directory, its path, and its metadata,
+                named after its path, if requested.
+        """
+        path = os.fsdecode(fields[1])
+        info = None
+        if metadata:
+            size, mtime, mode, owner = fields[2:6]
+            info = FileInfo(
+                path, int(size), float(mtime), int(mode, 8), os.fsdecode(owner)
+            )
+        return fields[0] == b"d", path, info
+
+    @staticmethod
+    def _parse_directory_structure(out: bytes, metadata: bool) -> list[Directory]:
+        """
+        Helper method to build the Directory objects from the output of the command built by
+        `_directory_structure_command`.
 
-            files = [file.split("/")[-1] for file in files_response.out.splitlines()]
-            directory_structure.append(Directory(dir=dir, files=files))
+        Args:
+            out (bytes): Output of the command.
+            metadata (bool): Whether the output holds the metadata of the entries.
 
-        return directory_structure
+        Returns:
+            list[Directory]: The directories and their files, in the order of the output, parents first.
+        """
+        fields = out.split(b"\0")
+        width = 6 if metadata else 2
+        directories: dict[str, Directory] = {}
+        for start in range(0, len(fields) - 1, width):
+            is_dir, path, info = SSHFileOperations._parse_entry(
+                fields[start : start + width], metadata
+            )
+            if is_dir:
+                directories[path] = Directory(
+                    dir=path,
+                    files=[],
+                    info=info,
+                    file_info=[] if metadata else None,
+                )
+                continue
+            parent, _, name = path.rpartition("/")
+            # find lists a directory before its content. A file listed alone has no directory
+            directory = directories.get(parent or "/")
+            if directory is None:
+                continue
+            directory.files.append(name)
+            if info is not None:
+                info.name = name
+                directory.file_info.append(info)
+        return list(directories.values())
 
     def change_owner(
         self,
@@ -290,10 +839,79 @@ class SSHFileOperations(BaseSSH):
             Change the owner of a directory and its contents recursively:
             >>> py_ssh.change_owner('/path/to/directory', 'new_owner', recursive=True)
         """
-        cmd = f"chown -R {owner} {path}" if recursive else f"chown {owner} {path}"
+        cmd = self._change_owner_command(path, owner, recursive)
         self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=cmd,
             custom_exception=OwnerChangeError,
         )
         return None
+
+    @staticmethod
+    def _file_content_command(filepath: str) -> str:
+        """
+        Helper method to build the command printing the content of a file.
+
+        Args:
+            filepath (str): Path to the file.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f"cat {filepath}"
+
+    @staticmethod
+    def _remove_file_command(filepath: str, force: bool) -> str:
+        """
+        Helper method to build the command removing a file.
+
+        Args:
+            filepath (str): Path to the file.
+            force (bool): Whether to remove the file even if it's write-protected.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f'rm -f "{filepath}"' if force else f'rm "{filepath}"'
+
+    @staticmethod
+    def _remove_directory_command(dirpath: str, force: bool) -> str:
+        """
+        Helper method to build the command removing a directory.
+
+        Args:
+            dirpath (str): Path to the directory.
+            force (bool): Whether to remove the directory even if it's not empty.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f'rm -rf "{dirpath}"' if force else f'rm -r "{dirpath}"'
+
+    @staticmethod
+    def _create_directory_command(dirpath: str) -> str:
+        """
+        Helper method to build the command creating a directory and its parents.
+
+        Args:
+            dirpath (str): Path to the directory.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f'mkdir -p "{dirpath}"'  # Wrap dirpath in quotes
+
+    @staticmethod
+    def _change_owner_command(path: str, owner: str, recursive: bool) -> str:
+        """
+        Helper method to build the command changing the owner of a file or directory.
+
+        Args:
+            path (str): Path to the file or directory.
+            owner (str): The new owner.
+            recursive (bool): Whether to change the owner recursively.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f"chown -R {owner} {path}" if recursive else f"chown {owner} {path}"
@@ -0,0 +1,260 @@
+"""
+Provides the RemoteFile class, a buffered file object reading a file of the remote host over SFTP or with `dd`.
+"""
+
+import io
+import shlex
+import time
+from abc import ABC, abstractmethod
+from paramiko import SFTPClient
+from .exceptions import *
+from ..base_ssh import BaseSSH
+
+# Size of the data of an SFTP read request of Paramiko
+_REQUEST_SIZE = 32 * 1024
+
+
+class RemoteFile(io.BufferedReader):
+    """
+    Buffered binary file object reading a file of the remote host, as returned by `open_remote`.
+
+    Every read of the underlying raw file fetches a whole buffer: over SFTP, as requests of 32 KiB sent at once
+    instead of one after the other, otherwise, as one `dd` command. Seeking is supported, relative to the end of
+    the file too, so the end of a large file is read without transferring the rest. Iterating yields lines.
+
+    With `follow`, reaching the end of the file waits for more data instead, like `tail -f`, so reads and line
+    iteration never end. If the file shrinks, it was truncated and is read from its start.
+
+    Example:
+        ```python
+        with py_ssh.open_remote('/var/log/syslog') as f:
+            f.seek(-5 * 1024 * 1024, os.SEEK_END)
+            last_lines = f.read().splitlines()[-100:]
+        ```
+    """
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Read a range of the file without moving the position, nor going through the buffer.
+
+        Args:
+            offset (int): Offset of the first byte.
+            length (int): Number of bytes to read.
+
+        Returns:
+            bytes: The bytes of the range, fewer if the file ends before its end.
+
+        Examples:
+            >>> header = f.read_range(0, 512)
+        """
+        return self.raw.read_range(offset, length)
+
+
+class _RemoteRawFile(io.RawIOBase, ABC):
+    """
+    Unbuffered reader of a remote file, keeping its position and its last known size.
+    Subclasses read ranges of the file and get its size.
+
+    Attributes:
+        name (str): Path to the file on the remote host.
+        follow (bool): Whether to wait for more data at the end of the file.
+        poll_interval (float): Seconds between two checks of the size of the file when following it.
+    """
+
+    def __new__(cls, *args, **kwargs) -> "_RemoteRawFile":
+        # Unlike object, the io classes don't refuse to create objects with abstract methods
+        if cls.__abstractmethods__:
+            raise TypeError(
+                f"Can't instantiate abstract class {cls.__name__} with abstract methods "
+                f"{', '.join(sorted(cls.__abstractmethods__))}"
+            )
+        return super().__new__(cls)
+
+    def __init__(self, name: str, follow: bool, poll_interval: float) -> None:
+        self.name = name
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self._position = 0
+        self._size = self._stat_size()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            self._size = self._stat_size()
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        # Like local files, seeking before the start of the file is an error, but not after its end
+        if position < 0:
+            raise OSError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        if self._position >= self._size:
+            self._update_size()
+        while self.follow and self._position >= self._size:
+            time.sleep(self.poll_interval)
+            self._update_size()
+        length = min(len(buffer), self._size - self._position)
+        if length <= 0:
+            return 0
+        data = self._read(self._position, length)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def readall(self) -> bytes:
+        if self.follow:
+            return super().readall()
+        # At once, rather than in blocks of the default buffer size
+        self._size = self._stat_size()
+        # Past the end of the file, after a seek or because it shrank, there is nothing to read
+        data = self.read_range(self._position, max(0, self._size - self._position))
+        self._position += len(data)
+        return data
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Read a range of the file, without moving the position.
+
+        Args:
+            offset (int): Offset of the first byte.
+            length (int): Number of bytes to read.
+
+        Returns:
+            bytes: The bytes of the range, fewer if the file ends before its end.
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must not be negative")
+        if offset + length > self._size:
+            self._update_size()
+        length = min(length, self._size - offset)
+        return self._read(offset, length) if length > 0 else b""
+
+    def _update_size(self) -> None:
+        """
+        Helper method to get the current size of the file. When following the file, a size smaller than the
+        last known one means the file was truncated, by a log rotation for instance, so it's read from its start.
+        """
+        size = self._stat_size()
+        if self.follow and size < self._size:
+            self._position = 0
+        self._size = size
+
+    @abstractmethod
+    def _read(self, offset: int, length: int) -> bytes:
+        """
+        Helper method to read a range of the file, within its last known size.
+
+        Args:
+            offset (int): Offset of the first byte.
+            length (int): Number of bytes to read.
+
+        Returns:
+            bytes: The bytes of the range.
+        """
+
+    @abstractmethod
+    def _stat_size(self) -> int:
+        """
+        Helper method to get the current size of the file.
+
+        Returns:
+            int: The size, in bytes.
+        """
+
+
+class _SFTPRawFile(_RemoteRawFile):
+    """
+    Reads a remote file through a handle of an SFTP session of its own, closed with the file.
+    """
+
+    def __init__(
+        self, sftp: SFTPClient, name: str, follow: bool, poll_interval: float
+    ) -> None:
+        self._sftp = sftp
+        self._file = sftp.open(name, "rb")
+        super().__init__(name, follow, poll_interval)
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._file.close()
+            finally:
+                self._sftp.close()
+        super().close()
+
+    def _read(self, offset: int, length: int) -> bytes:
+        # Paramiko reassembles reads larger than a request slowly, so the range is requested in pieces, all at once
+        requests = [
+            (start, min(_REQUEST_SIZE, offset + length - start))
+            for start in range(offset, offset + length, _REQUEST_SIZE)
+        ]
+        return b"".join(self._file.readv(requests))
+
+    def _stat_size(self) -> int:
+        return self._file.stat().st_size
+
+
+class _CommandRawFile(_RemoteRawFile):
+    """
+    Reads a remote file with `dd` and `stat` commands, which can run as another user, such as root.
+    Each read runs one command, so reads are best done a whole buffer at a time.
+    """
+
+    def __init__(
+        self,
+        py_ssh: BaseSSH,
+        name: str,
+        user: str | None,
+        follow: bool,
+        poll_interval: float,
+    ) -> None:
+        self._py_ssh = py_ssh
+        self._user = user
+        super().__init__(name, follow, poll_interval)
+
+    def _read(self, offset: int, length: int) -> bytes:
+        # skip and count in bytes, whatever the block size
+        return self._run(
+            f"dd if={shlex.quote(self.name)} bs={min(length, 1024 * 1024)} "
+            f"skip={offset} count={length} iflag=skip_bytes,count_bytes status=none"
+        )
+
+    def _stat_size(self) -> int:
+        return int(self._run(f"stat -L -c %s -- {shlex.quote(self.name)}"))
+
+    def _run(self, cmd: str) -> bytes:
+        """
+        Helper method to run a command reading the file.
+
+        Args:
+            cmd (str): The command.
+
+        Returns:
+            bytes: The output of the command.
+
+        Raises:
+            RemoteFileReadError: If the command fails.
+        """
+        return self._py_ssh.run_cmd(
+            cmd,
+            user=self._user,
+            custom_exception=RemoteFileReadError,
+            cmd_timeout=None,
+            get_pty=False,
+            decode=False,
+        ).out
@@ -0,0 +1,303 @@
+"""
+Provides the TarTransfer class, which copies a directory tree as a tar stream through a single command.
+"""
+
+import gzip
+import io
+import os
+import shlex
+import tarfile
+import threading
+from typing import BinaryIO, Iterator
+from paramiko import Channel
+from .exceptions import *
+from ..base_ssh import BaseSSH
+
+# Bytes read from the channel at once
+_CHUNK_SIZE = 256 * 1024
+
+
+class TarTransfer:
+    """
+    Copies a directory tree packed on the fly into a tar stream, extracted on the fly at the other end by `tar`
+    on the remote host, or by the `tarfile` module locally. The stream goes through the input or the output of
+    a single command, so the cost of a file is its bytes in the stream instead of the round trips of opening,
+    writing and closing it over SFTP, and no archive is written on either side.
+
+    Permissions, modification times and symbolic links, which are not followed, are kept. Ownership is kept
+    when the extracting side runs as root, otherwise the files belong to the extracting user. The stream is in
+    the GNU tar format, the default of GNU tar, so modification times are whole seconds.
+
+    Attributes:
+        py_ssh (BaseSSH): The object whose connection is used.
+        compress (bool, optional): Whether to compress the stream with gzip. Worth it on slow links only, since
+            compressing costs more than sending on fast ones. Defaults to False.
+        user (str, optional): User running `tar` on the remote host. If None, the user used to connect. Defaults to None.
+
+    Example:
+        ```python
+        from py_secure_shell_automator.files_operations import TarTransfer
+
+        TarTransfer(py_ssh, compress=True).upload('./node_modules', '/srv/app/node_modules')
+        ```
+    """
+
+    def __init__(
+        self, py_ssh: BaseSSH, compress: bool = False, user: str | None = None
+    ) -> None:
+        self.py_ssh = py_ssh
+        self.compress = compress
+        self.user = user
+
+    def upload(self, local_dir: str, remote_dir: str) -> int:
+        """
+        Copy the content of a local directory into a directory of the remote host, created if needed.
+        Remote files that already exist are overwritten, the others are kept.
+
+        Args:
+            local_dir (str): Path to the local directory.
+            remote_dir (str): Path to the directory on the remote host.
+
+        Returns:
+            int: Bytes of the stream sent.
+
+        Raises:
+            FileTransferError: If the remote `tar` fails.
+            OSError: If a local file can't be read.
+
+        Examples:
+            >>> sent = transfer.upload('./venv', '/opt/app/venv')
+        """
+        if not os.path.isdir(local_dir):
+            raise NotADirectoryError(f"{local_dir} is not a directory")
+        read_fd, write_fd = os.pipe()
+        writer = _CountingWriter(open(write_fd, "wb"))
+        errors: list[BaseException] = []
+
+        def pack() -> None:
+            try:
+                with writer.file:
+                    self._pack(local_dir, writer)
+            except BrokenPipeError:
+                # The remote tar exited early, its error is raised by run_cmd
+                pass
+            except BaseException as e:
+                errors.append(e)
+
+        packer = threading.Thread(target=pack, daemon=True)
+        packer.start()
+        directory = shlex.quote(remote_dir)
+        try:
+            with open(read_fd, "rb") as reader:
+                self.py_ssh.run_cmd(
+                    f"mkdir -p -- {directory} && "
+                    f"tar -x{'z' if self.compress else ''}pf - -C {directory}",
+                    user=self.user,
+                    custom_exception=FileTransferError,
+                    cmd_timeout=None,
+                    get_pty=False,
+                    stdin=reader,
+                )
+        finally:
+            packer.join()
+            # A local error truncates the stream, which the remote tar may or may not notice, so it comes first
+            if errors:
+                raise errors[0]
+        return writer.bytes_written
+
+    def download(self, remote_dir: str, local_dir: str) -> int:
+        """
+        Copy the content of a directory of the remote host into a local directory, created if needed.
+        Local files that already exist are overwritten, the others are kept.
+
+        Args:
+            remote_dir (str): Path to the directory on the remote host.
+            local_dir (str): Path to the local directory.
+
+        Returns:
+            int: Bytes of the stream received.
+
+        Raises:
+            FileTransferError: If the remote `tar` fails, or its stream is invalid.
+            OSError: If a local file can't be written.
+
+        Examples:
+            >>> received = transfer.download('/var/www/uploads', './uploads')
+        """
+        os.makedirs(local_dir, exist_ok=True)
+        channel = self.py_ssh._open_cmd_channel(
+            f"tar -c{'z' if self.compress else ''}f - -C {shlex.quote(remote_dir)} .",
+            self.user,
+            None,
+            get_pty=False,
+        )
+        reader = _ChannelReader(channel)
+        try:
+            try:
+                with tarfile.open(
+                    fileobj=io.BufferedReader(reader, _CHUNK_SIZE),
+                    mode="r|gz" if self.compress else "r|",
+                ) as tar:
+                    if hasattr(tarfile, "tar_filter"):
+                        tar.extractall(local_dir, filter=_extraction_filter)
+                    else:
+                        tar.extractall(
+                            local_dir, members=_checked_members(tar, local_dir)
+                        )
+            except tarfile.TarError as e:
+                ext_code = channel.recv_exit_status()
+                # A failed tar explains itself better than the stream it cut short
+                if ext_code == 0:
+                    raise FileTransferError(f"Invalid tar stream: {e}")
+            ext_code = channel.recv_exit_status()
+            if ext_code != 0:
+                error = channel.makefile_stderr("rb").read().decode(errors="replace")
+                raise FileTransferError(
+                    error.strip() or f"tar failed with exit code {ext_code}"
+                )
+        finally:
+            channel.close()
+        return reader.bytes_read
+
+    def _pack(self, local_dir: str, writer: BinaryIO) -> None:
+        """
+        Helper method to write the tar stream of a local directory.
+
+        Args:
+            local_dir (str): Path to the local directory.
+            writer (BinaryIO): Where the stream is written.
+        """
+        target = (
+            gzip.GzipFile(fileobj=writer, mode="wb", compresslevel=6)
+            if self.compress
+            else writer
+        )
+        try:
+            # The GNU format doesn't add a header to every file for the fractions of second of its mtime, as
+            # the default PAX format does, doubling the size of the stream of small files
+            with tarfile.open(
+                fileobj=target,
+                mode="w|",
+                format=tarfile.GNU_FORMAT,
+                bufsize=_CHUNK_SIZE,
+            ) as tar:
+                for entry in sorted(os.listdir(local_dir)):
+                    tar.add(os.path.join(local_dir, entry), entry)
+        finally:
+            if target is not writer:
+                target.close()
+
+
+class _CountingWriter(io.RawIOBase):
+    """
+    Writes to a file, counting the bytes written.
+
+    Attributes:
+        file (BinaryIO): The file written to.
+        bytes_written (int): Bytes written so far.
+    """
+
+    def __init__(self, file: BinaryIO) -> None:
+        self.file = file
+        self.bytes_written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        written = self.file.write(data)
+        self.bytes_written += written
+        return written
+
+
+class _ChannelReader(io.RawIOBase):
+    """
+    Reads the output of a command from its channel, counting the bytes read.
+
+    Attributes:
+        channel (Channel): The channel running the command.
+        bytes_read (int): Bytes read so far.
+    """
+
+    def __init__(self, channel: Channel) -> None:
+        self.channel = channel
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:
+        data = self.channel.recv(min(len(buffer), _CHUNK_SIZE))
+        buffer[: len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+def _extraction_filter(member: tarfile.TarInfo, path: str) -> tarfile.TarInfo:
+    """
+    Refuse the members extracted outside of the destination, as the `tar` filter of `tarfile` does, but keep
+    their permission bits, which the filter restricts.
+
+    Args:
+        member (tarfile.TarInfo): The member.
+        path (str): The destination.
+
+    Returns:
+        tarfile.TarInfo: The member to extract.
+    """
+    return tarfile.tar_filter(member, path).replace(mode=member.mode, deep=False)
+
+
+def _checked_members(
+    tar: tarfile.TarFile, local_dir: str
+) -> Iterator[tarfile.TarInfo]:
+    """
+    Yield the members of a tar stream, refusing the ones extracted outside of the destination, for the versions
+    of Python whose `tarfile` has no extraction filter. As with the `tar` filter, symbolic links may point
+    anywhere, such as the interpreter of a virtual environment, but nothing is written through them: the
+    members are checked as they are extracted, so a member written through a symbolic link extracted before it
+    is refused. Hard links, which would give access to the file they link, must link a file of the destination.
+
+    Args:
+        tar (tarfile.TarFile): The tar stream.
+        local_dir (str): The destination.
+
+    Yields:
+        tarfile.TarInfo: The members to extract.
+
+    Raises:
+        FileTransferError: If a member is not a file, a directory or a link, is extracted outside of the
+            destination, or is a hard link to a file outside of it.
+    """
+    destination = os.path.realpath(local_dir)
+
+    def is_within(path: str) -> bool:
+        return os.path.commonpath([destination, path]) == destination
+
+    for member in tar:
+        if not (
+            member.isreg() or member.isdir() or member.issym() or member.islnk()
+        ):
+            raise FileTransferError(
+                f"Refusing to extract the special file {member.name}"
+            )
+        path = os.path.join(destination, member.name)
+        directory, name = os.path.split(path)
+        # The member replaces a link already at its path instead of being written through it,
+        # so only its directory is resolved
+        resolved = (
+            os.path.realpath(path)
+            if name in ("", ".", "..")
+            else os.path.join(os.path.realpath(directory), name)
+        )
+        if os.path.isabs(member.name) or not is_within(resolved):
+            raise FileTransferError(
+                f"Refusing to extract {member.name} outside of {local_dir}"
+            )
+        if member.islnk() and not is_within(
+            os.path.realpath(os.path.join(destination, member.linkname))
+        ):
+            raise FileTransferError(
+                f"Refusing to extract {member.name}, linking to {member.linkname} outside of {local_dir}"
+            )
+        yield member
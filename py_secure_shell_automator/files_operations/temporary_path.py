@@ -0,0 +1,23 @@
+"""
+Provides the temporary_path function, which names the temporary file a file is written to before it's renamed over it.
+"""
+
+import os
+import uuid
+
+
+def temporary_path(path: str) -> str:
+    """
+    Build the path of the temporary file a file is copied to, next to it, so it can be renamed over it.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Path to the temporary file.
+
+    Examples:
+        >>> temporary_path('/srv/app/config.yml')  # Output: '/srv/app/.config.yml.1f2e3d4c.py_ssh_tmp'
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.py_ssh_tmp")
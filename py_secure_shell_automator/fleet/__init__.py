@@ -0,0 +1 @@
+from .fleet_executor import FleetExecutor, run_cmd_many
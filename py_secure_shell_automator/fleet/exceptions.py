@@ -0,0 +1,11 @@
+"""
+Module containing custom exceptions for the fleet module
+"""
+
+
+class FleetTimeoutError(Exception):
+    """
+    Raised when a host does not finish before its own or the global deadline.
+    """
+
+    ...
@@ -0,0 +1,320 @@
+"""
+Module containing the parallel execution of commands across many hosts
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Type
+from .exceptions import *
+from ..base_ssh import BaseSSH, CmdError, TransportProfile
+from ..base_ssh.output_buffer import TruncatePolicy
+from ..connection_pool import SSHConnectionPool
+from ..models import CmdResponse
+
+
+@dataclass
+class FleetExecutor:
+    """
+    Runs a command on many hosts concurrently, using a bounded pool of worker threads.
+
+    Each host gets its own connection (or a pooled one, if `pool` is provided). Results are yielded
+    as soon as each host finishes, so the total time of a sweep is bounded by the slowest host
+    instead of the sum of all of them.
+
+    Attributes:
+        username (str): Username to connect to the remote hosts.
+        password (str, optional): Password to connect to the remote hosts. Defaults to None.
+        port (int, optional): Port to connect to the remote hosts. Defaults to 22.
+        pkey (str, optional): Private key to connect to the remote hosts. Defaults to None.
+        timeout (int, optional): Timeout to connect to each remote host. Defaults to 10.
+        auth_timeout (int, optional): Authentication timeout for each remote host. Defaults to 10.
+        auto_add_policy (bool, optional): Whether to add the hosts to the known hosts. Defaults to True.
+        max_workers (int, optional): Maximum number of hosts handled at the same time. Defaults to 32.
+        pool (SSHConnectionPool, optional): Pool to take the connections from. If None, a new connection
+            is opened and closed for every host. Defaults to None.
+        transport_profile (str | TransportProfile, optional): Tuning of the SSH transport, the name of a predefined
+            profile or a `TransportProfile`. Defaults to "default".
+
+    Example:
+        ```python
+        from py_secure_shell_automator.fleet import FleetExecutor
+
+        fleet = FleetExecutor(username='admin', password='admin_pass', max_workers=64)
+        for host, result in fleet.run_cmd(['host1', 'host2'], cmd='uptime', host_timeout=30):
+            if isinstance(result, Exception):
+                print(f"{host} failed: {result}")
+            else:
+                print(f"{host}: {result.out}")
+        ```
+    """
+
+    username: str
+    password: str | None = None
+    port: int = 22
+    pkey: str | None = None
+    timeout: int = 10
+    auth_timeout: int = 10
+    auto_add_policy: bool = True
+    max_workers: int = 32
+    pool: SSHConnectionPool | None = None
+    transport_profile: str | TransportProfile = "default"
+
+    def run_cmd(
+        self,
+        hosts: Iterable[str],
+        cmd: str,
+        user: str | None = None,
+        raise_exception: bool = True,
+        custom_exception: Type[Exception] = CmdError,
+        err_message: str | None = None,
+        host_timeout: float | None = None,
+        timeout: float | None = None,
+        max_output_bytes: int | None = None,
+        truncate: TruncatePolicy = "tail",
+    ) -> Iterator[tuple[str, CmdResponse | Exception]]:
+        """
+        Execute a command on every host, yielding each result as soon as the host finishes.
+
+        Failures never stop the sweep: connection errors, command errors and timeouts are yielded as
+        the exception instance in place of the `CmdResponse`.
+
+        Args:
+            hosts (Iterable[str]): Hosts to run the command on.
+            cmd (str): Command to execute on the remote hosts.
+            user (str, optional): User to execute the command. If None, the user is the same as the one used to connect. Defaults to None.
+            raise_exception (bool, optional): If True, a non zero exit code is reported as an exception. Defaults to True.
+            custom_exception (Type[Exception], optional): Exception reported for non zero exit codes when raise_exception is True. Defaults to CmdError.
+            err_message (str, optional): Error message of the reported exception. If None, the output of the command is used. Defaults to None.
+            host_timeout (float, optional): Deadline in seconds for each host, covering connection and execution,
+                counted from the moment a worker picks the host. If None, there is no per-host deadline. Defaults to None.
+            timeout (float, optional): Deadline in seconds for the whole sweep. Hosts still pending when it expires are
+                reported with a FleetTimeoutError. If None, there is no global deadline. Defaults to None.
+            max_output_bytes (int, optional): Bytes of output kept per host, so a runaway command on many hosts can't exhaust
+                the memory. If None, the whole outputs are kept. Defaults to None.
+            truncate (str, optional): Part of an output kept when it's truncated: "head", "tail" or "head+tail".
+                Defaults to "tail".
+
+        Yields:
+            tuple[str, CmdResponse | Exception]: The host and either its command response or the error it raised.
+
+        Examples:
+            >>> results = dict(fleet.run_cmd(hosts, cmd='systemctl is-active nginx', raise_exception=False))
+            >>> inactive = [host for host, result in results.items() if isinstance(result, Exception) or result.out != 'active']
+        """
+        hosts = list(hosts)
+        active: dict[int, BaseSSH] = {}
+        active_lock = threading.Lock()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures: dict[Future, str] = {}
+        try:
+            for index, host in enumerate(hosts):
+                future = executor.submit(
+                    self._run_on_host,
+                    index,
+                    host,
+                    active,
+                    active_lock,
+                    cmd=cmd,
+                    user=user,
+                    raise_exception=raise_exception,
+                    custom_exception=custom_exception,
+                    err_message=err_message,
+                    host_timeout=host_timeout,
+                    max_output_bytes=max_output_bytes,
+                    truncate=truncate,
+                )
+                futures[future] = host
+
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    host = futures.pop(future)
+                    try:
+                        yield host, future.result()
+                    except Exception as e:
+                        yield host, e
+            except FuturesTimeoutError:
+                for future in futures:
+                    future.cancel()
+                with active_lock:
+                    for py_ssh in active.values():
+                        py_ssh.close()
+                for host in futures.values():
+                    yield host, FleetTimeoutError(
+                        f"{host} did not finish before the global deadline of {timeout} seconds"
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_on_host(
+        self,
+        index: int,
+        host: str,
+        active: dict[int, BaseSSH],
+        active_lock: threading.Lock,
+        host_timeout: float | None,
+        **run_cmd_kwargs,
+    ) -> CmdResponse:
+        """
+        Connect to a single host and run the command, enforcing the per-host deadline.
+
+        When the deadline expires, the connection is closed, which unblocks the pending command.
+
+        Args:
+            index (int): Position of the host in the sweep, used as key of `active`.
+            host (str): Host to run the command on.
+            active (dict[int, BaseSSH]): Connections currently in use, closed on the global deadline.
+            active_lock (threading.Lock): Lock protecting `active`.
+            host_timeout (float, optional): Deadline in seconds for the host.
+            **run_cmd_kwargs: Arguments forwarded to `run_cmd`.
+
+        Returns:
+            CmdResponse: The response of the command.
+
+        Raises:
+            FleetTimeoutError: If the host did not finish before `host_timeout`.
+        """
+        start = time.monotonic()
+        connect_timeout = (
+            self.timeout if host_timeout is None else min(self.timeout, host_timeout)
+        )
+        py_ssh = self._connect(host, connect_timeout)
+        timed_out = threading.Event()
+
+        def expire() -> None:
+            timed_out.set()
+            py_ssh.close()
+
+        with active_lock:
+            active[index] = py_ssh
+        watchdog = None
+        try:
+            if host_timeout is not None:
+                remaining = host_timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise FleetTimeoutError(
+                        f"{host} did not finish before the deadline of {host_timeout} seconds"
+                    )
+                run_cmd_kwargs["cmd_timeout"] = remaining
+                watchdog = threading.Timer(remaining, expire)
+                watchdog.start()
+
+            try:
+                cmd_response = py_ssh.run_cmd(**run_cmd_kwargs)
+            except Exception:
+                if timed_out.is_set():
+                    raise FleetTimeoutError(
+                        f"{host} did not finish before the deadline of {host_timeout} seconds"
+                    )
+                raise
+
+            # A command interrupted by the deadline may still return when raise_exception is False
+            if timed_out.is_set():
+                raise FleetTimeoutError(
+                    f"{host} did not finish before the deadline of {host_timeout} seconds"
+                )
+            return cmd_response
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            with active_lock:
+                active.pop(index, None)
+            if self.pool is not None:
+                self.pool.release(py_ssh)
+            else:
+                py_ssh.close()
+
+    def _connect(self, host: str, connect_timeout: float) -> BaseSSH:
+        """
+        Open a connection to the host, or check one out of the pool.
+
+        Args:
+            host (str): Host to connect to.
+            connect_timeout (float): Timeout of the TCP connection.
+
+        Returns:
+            BaseSSH: The connected object.
+        """
+        if self.pool is not None:
+            return self.pool.checkout(
+                host=host,
+                username=self.username,
+                password=self.password,
+                port=self.port,
+                pkey=self.pkey,
+                automator_cls=BaseSSH,
+                timeout=connect_timeout,
+                auth_timeout=self.auth_timeout,
+                auto_add_policy=self.auto_add_policy,
+                transport_profile=self.transport_profile,
+            )
+        return BaseSSH(
+            host=host,
+            username=self.username,
+            password=self.password,
+            port=self.port,
+            pkey=self.pkey,
+            timeout=connect_timeout,
+            auth_timeout=self.auth_timeout,
+            auto_add_policy=self.auto_add_policy,
+            transport_profile=self.transport_profile,
+        )
+
+
+def run_cmd_many(
+    hosts: Iterable[str],
+    cmd: str,
+    username: str,
+    password: str | None = None,
+    max_workers: int = 32,
+    host_timeout: float | None = None,
+    timeout: float | None = None,
+    **kwargs,
+) -> Iterator[tuple[str, CmdResponse | Exception]]:
+    """
+    Execute a command on many hosts concurrently. Shortcut for `FleetExecutor(...).run_cmd(...)`.
+
+    Args:
+        hosts (Iterable[str]): Hosts to run the command on.
+        cmd (str): Command to execute on the remote hosts.
+        username (str): Username to connect to the remote hosts.
+        password (str, optional): Password to connect to the remote hosts. Defaults to None.
+        max_workers (int, optional): Maximum number of hosts handled at the same time. Defaults to 32.
+        host_timeout (float, optional): Deadline in seconds for each host. Defaults to None.
+        timeout (float, optional): Deadline in seconds for the whole sweep. Defaults to None.
+        **kwargs: Other connection attributes of `FleetExecutor` (port, pkey, timeout, ...)
+            or arguments of `FleetExecutor.run_cmd` (user, raise_exception, ...).
+
+    Yields:
+        tuple[str, CmdResponse | Exception]: The host and either its command response or the error it raised.
+
+    Examples:
+        >>> from py_secure_shell_automator import run_cmd_many
+        >>> for host, result in run_cmd_many(['host1', 'host2'], cmd='uptime', username='admin', password='admin_pass'):
+                print(host, result)
+    """
+    run_cmd_params = {
+        "user",
+        "raise_exception",
+        "custom_exception",
+        "err_message",
+        "max_output_bytes",
+        "truncate",
+    }
+    run_cmd_kwargs = {k: v for k, v in kwargs.items() if k in run_cmd_params}
+    executor_kwargs = {k: v for k, v in kwargs.items() if k not in run_cmd_params}
+    fleet = FleetExecutor(
+        username=username,
+        password=password,
+        max_workers=max_workers,
+        **executor_kwargs,
+    )
+    return fleet.run_cmd(
+        hosts,
+        cmd,
+        host_timeout=host_timeout,
+        timeout=timeout,
+        **run_cmd_kwargs,
+    )
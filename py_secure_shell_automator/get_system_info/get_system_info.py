@@ -3,7 +3,7 @@ Module containing methods to get system information
 """
 
 from .exceptions import *
-from ..base_ssh import BaseSSH
+from ..base_ssh import BaseSSH, cached_query
 
 
 class SSHSystemInfo(BaseSSH):
@@ -89,9 +89,10 @@ class SSHSystemInfo(BaseSSH):
         )
         return cmd_response.out
 
+    @cached_query()
     def get_kernel_version(self, run_as_root: bool = False) -> str:
         """
-        Get the kernel version of the remote host.
+        Get the kernel version of the remote host. The result is cached for `cache_ttl` seconds.
 
         Args:
             run_as_root (bool): Whether to run the command as root. Default is False.
@@ -115,9 +116,10 @@ class SSHSystemInfo(BaseSSH):
         )
         return cmd_response.out
 
+    @cached_query()
     def get_os_version(self, run_as_root: bool = False) -> str:
         """
-        Get the operating system version of the remote host.
+        Get the operating system version of the remote host. The result is cached for `cache_ttl` seconds.
 
         Args:
             run_as_root (bool): Whether to run the command as root. Default is False.
@@ -0,0 +1 @@
+from .metrics_collector import MetricsCollector
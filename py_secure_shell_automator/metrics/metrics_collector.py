@@ -0,0 +1,250 @@
+"""
+Module containing an observer aggregating the operations of BaseSSH objects into metrics
+"""
+
+import json
+import os
+import socket
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from ..base_ssh import SSHObserver
+from ..models import SSHEvent
+
+# Upper bounds, in seconds, of the buckets of the duration histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Timing attributes of CmdResponse, exported as the phases of the commands
+_PHASES = {
+    "channel_open": "channel_open_time",
+    "first_byte": "time_to_first_byte",
+    "exit": "time_to_exit",
+}
+
+_SeriesKey = tuple[str, str, str]
+
+
+@dataclass
+class _Series:
+    """
+    Aggregated events of one kind, host and operation.
+    """
+
+    bucket_counts: list[int]
+    count: int = 0
+    errors: int = 0
+    duration_sum: float = 0.0
+    duration_max: float = 0.0
+    bytes_transferred: int = 0
+    phase_sums: dict[str, float] = field(default_factory=dict)
+
+
+class MetricsCollector(SSHObserver):
+    """
+    Observer aggregating the events of every object it's registered on, per kind of operation,
+    host and helper method, and exporting them in the Prometheus text format or as JSON.
+
+    The durations are aggregated in histograms, so the slow hosts and helper methods stand out
+    without keeping every event. For commands executed on their own channel, the time spent
+    opening the channel, until the first byte and until the exit status is also summed.
+
+    Attributes:
+        buckets (tuple[float, ...], optional): Upper bounds, in seconds, of the buckets of the duration histograms.
+            Defaults to DEFAULT_BUCKETS.
+
+    Example:
+        ```python
+        from py_secure_shell_automator.metrics import MetricsCollector
+
+        metrics = MetricsCollector()
+        py_ssh = PySecureShellAutomator(host='hostname', username='admin', password='admin_pass', observers=[metrics])
+        py_ssh.get_file_content('/etc/hostname')
+        metrics.export(path='/var/lib/node_exporter/py_ssh.prom')
+        ```
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[_SeriesKey, _Series] = {}
+        self._lock = threading.Lock()
+
+    def on_event(self, event: SSHEvent) -> None:
+        """
+        Aggregate an event.
+
+        Args:
+            event (SSHEvent): The operation.
+        """
+        key = (event.kind, event.host, event.operation or "")
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series([0] * len(self.buckets))
+            series.count += 1
+            series.errors += event.error is not None
+            series.duration_sum += event.duration
+            series.duration_max = max(series.duration_max, event.duration)
+            series.bytes_transferred += event.bytes_transferred or 0
+            for index, bound in enumerate(self.buckets):
+                if event.duration <= bound:
+                    series.bucket_counts[index] += 1
+            if event.cmd_response is not None:
+                for phase, attribute in _PHASES.items():
+                    value = getattr(event.cmd_response, attribute)
+                    if value is not None:
+                        series.phase_sums[phase] = series.phase_sums.get(phase, 0.0) + value
+
+    def reset(self) -> None:
+        """
+        Forget every aggregated event.
+
+        Example:
+            >>> metrics.reset()
+        """
+        with self._lock:
+            self._series.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics.
+
+        Example:
+            >>> print(metrics.to_prometheus())
+        """
+        lines = [
+            "# HELP py_ssh_operation_duration_seconds Duration of the SSH operations.",
+            "# TYPE py_ssh_operation_duration_seconds histogram",
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+            for key, data in series:
+                labels = self._labels(key)
+                for bound, bucket_count in zip(self.buckets, data.bucket_counts):
+                    lines.append(
+                        f'py_ssh_operation_duration_seconds_bucket{{{labels},le="{bound}"}} {bucket_count}'
+                    )
+                lines.append(
+                    f'py_ssh_operation_duration_seconds_bucket{{{labels},le="+Inf"}} {data.count}'
+                )
+                lines.append(f"py_ssh_operation_duration_seconds_sum{{{labels}}} {data.duration_sum}")
+                lines.append(f"py_ssh_operation_duration_seconds_count{{{labels}}} {data.count}")
+
+            lines.append("# HELP py_ssh_operation_errors_total SSH operations that raised an exception.")
+            lines.append("# TYPE py_ssh_operation_errors_total counter")
+            for key, data in series:
+                lines.append(f"py_ssh_operation_errors_total{{{self._labels(key)}}} {data.errors}")
+
+            lines.append("# HELP py_ssh_bytes_transferred_total Bytes received by the commands or transferred by SFTP.")
+            lines.append("# TYPE py_ssh_bytes_transferred_total counter")
+            for key, data in series:
+                lines.append(
+                    f"py_ssh_bytes_transferred_total{{{self._labels(key)}}} {data.bytes_transferred}"
+                )
+
+            lines.append("# HELP py_ssh_cmd_phase_seconds_total Time spent by the commands until each phase.")
+            lines.append("# TYPE py_ssh_cmd_phase_seconds_total counter")
+            for key, data in series:
+                for phase, phase_sum in sorted(data.phase_sums.items()):
+                    lines.append(
+                        f'py_ssh_cmd_phase_seconds_total{{{self._labels(key)},phase="{phase}"}} {phase_sum}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> str:
+        """
+        Render the metrics as a JSON list, one object per kind of operation, host and helper method.
+
+        Returns:
+            str: The metrics.
+
+        Example:
+            >>> slowest = max(json.loads(metrics.to_json()), key=lambda series: series['duration_max'])
+        """
+        with self._lock:
+            return json.dumps(
+                [
+                    {
+                        "kind": kind,
+                        "host": host,
+                        "operation": operation or None,
+                        "count": data.count,
+                        "errors": data.errors,
+                        "duration_sum": data.duration_sum,
+                        "duration_max": data.duration_max,
+                        "buckets": dict(zip(map(str, self.buckets), data.bucket_counts)),
+                        "bytes_transferred": data.bytes_transferred,
+                        "phase_sums": data.phase_sums,
+                    }
+                    for (kind, host, operation), data in sorted(self._series.items())
+                ]
+            )
+
+    def export(
+        self,
+        path: str | None = None,
+        address: str | tuple[str, int] | None = None,
+        format: str = "prometheus",
+    ) -> None:
+        """
+        Write the metrics to a file, replaced atomically so readers never see a partial file,
+        and/or send them to a socket.
+
+        Args:
+            path (str, optional): Path of the file to write. Defaults to None.
+            address (str | tuple[str, int], optional): Path of a Unix domain socket, or host and port
+                of a TCP socket, to send the metrics to. Defaults to None.
+            format (str, optional): "prometheus" or "json". Defaults to "prometheus".
+
+        Raises:
+            ValueError: If the format is unknown.
+
+        Examples:
+            Textfile for the node_exporter:
+            >>> metrics.export(path='/var/lib/node_exporter/py_ssh.prom')
+
+            JSON to a local collector:
+            >>> metrics.export(address='/run/collector.sock', format='json')
+        """
+        match format:
+            case "prometheus":
+                data = self.to_prometheus().encode("utf-8")
+            case "json":
+                data = self.to_json().encode("utf-8")
+            case _:
+                raise ValueError(f"Unknown metrics format: {format}")
+
+        if path is not None:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        if address is not None:
+            family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                sock.connect(address)
+                sock.sendall(data)
+
+    @staticmethod
+    def _labels(key: _SeriesKey) -> str:
+        """
+        Helper method to render the labels of a series.
+
+        Args:
+            key (_SeriesKey): The kind, host and operation of the series.
+
+        Returns:
+            str: The labels, without the braces.
+        """
+        kind, host, operation = (
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            for value in key
+        )
+        return f'kind="{kind}",host="{host}",operation="{operation}"'
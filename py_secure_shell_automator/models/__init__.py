@@ -1 +1,5 @@
-from .executions_results import CmdResponse, Directory, Process
+from .executions_results import CmdOutput, CmdResponse, Directory, FileInfo, Process
+from .pool_stats import PoolStats
+from .sync_plan import SyncPlan
+from .transport_calibration import TransportCalibration
+from .ssh_event import SSHEvent
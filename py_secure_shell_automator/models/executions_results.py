@@ -2,7 +2,11 @@
 Type Models of the package 
 """
 
-from dataclasses import dataclass
+import mmap
+from dataclasses import dataclass, field
+
+# Output of a command: decoded, raw, or a memory map of the temporary file it was spilled to
+CmdOutput = str | bytes | mmap.mmap
 
 
 @dataclass
@@ -10,13 +14,30 @@ class CmdResponse:
     """
     Command response of a remote command execution in a remote host.
 
+    The timing attributes are only filled in for commands executed on their own channel, and they are
+    ignored when comparing responses.
+
     Attributes:
         ext_code (int): The exit code of the command.
-        out (str): The output of the command.
+        out (CmdOutput): The output of the command, in bytes if it was not decoded, or a read-only memory map
+            if it was spilled to disk.
+        err (CmdOutput, optional): The error output of the command, if it was run without a PTY.
+        channel_open_time (float, optional): Seconds spent opening the channel and starting the command.
+        time_to_first_byte (float, optional): Seconds from the start of the call to the first byte of output,
+            or None if the command had no output.
+        time_to_exit (float, optional): Seconds from the start of the call to the exit status of the command.
+        bytes_received (int, optional): Bytes of output received, before decoding.
+        truncated_bytes (int, optional): Bytes of output dropped to stay within `max_output_bytes`.
     """
 
     ext_code: int
-    out: str
+    out: CmdOutput
+    err: CmdOutput | None = field(default=None, compare=False, repr=False)
+    channel_open_time: float | None = field(default=None, compare=False, repr=False)
+    time_to_first_byte: float | None = field(default=None, compare=False, repr=False)
+    time_to_exit: float | None = field(default=None, compare=False, repr=False)
+    bytes_received: int | None = field(default=None, compare=False, repr=False)
+    truncated_bytes: int | None = field(default=None, compare=False, repr=False)
 
     @property
     def is_successful(self) -> bool:
@@ -29,6 +50,26 @@ class CmdResponse:
         return self.ext_code == 0
 
 
+@dataclass(slots=True)
+class FileInfo:
+    """
+    Metadata of a file or directory.
+
+    Attributes:
+        name (str): The name of the entry, without its directory, or the path of a listed directory.
+        size (int): The size in bytes.
+        mtime (float): The modification time, in seconds since the epoch.
+        mode (int): The permission bits, such as 0o644.
+        owner (str): The name of the owner, or its UID if it has no name.
+    """
+
+    name: str
+    size: int
+    mtime: float
+    mode: int
+    owner: str
+
+
 @dataclass
 class Directory:
     """
@@ -37,10 +78,14 @@ class Directory:
     Attributes:
         dir (str): The directory path.
         files (list[str]): List of files in the directory.
+        info (FileInfo, optional): Metadata of the directory, if requested.
+        file_info (list[FileInfo], optional): Metadata of the files, in the order of `files`, if requested.
     """
 
     dir: str
     files: list[str]
+    info: FileInfo | None = None
+    file_info: list[FileInfo] | None = None
 
 
 @dataclass
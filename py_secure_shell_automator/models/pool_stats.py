@@ -0,0 +1,25 @@
+"""
+Type Models of the connection pool
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class PoolStats:
+    """
+    Usage statistics of a connection pool.
+
+    Attributes:
+        hits (int): Number of checkouts served by an already authenticated connection.
+        misses (int): Number of checkouts that had to open a new connection.
+        evictions (int): Number of pooled connections closed because they were idle for too long or unhealthy.
+        in_use (int): Number of connections currently checked out.
+        idle (int): Number of connections currently waiting in the pool.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    in_use: int = 0
+    idle: int = 0
@@ -0,0 +1,51 @@
+"""
+Type Models of the events reported to the observers
+"""
+
+from dataclasses import dataclass
+from .executions_results import CmdResponse
+
+
+@dataclass
+class SSHEvent:
+    """
+    An operation performed on a remote host, reported to the observers once it's over.
+
+    Attributes:
+        kind (str): Kind of operation: "connect", "run_cmd", "sftp_put", "sftp_get", "sftp_sync_put", "sftp_sync_get",
+            "tar_put" or "tar_get".
+        host (str): Host the operation was performed on.
+        port (int): Port of the connection.
+        operation (str, optional): Public method that triggered the operation, such as "get_file_content",
+            or None if it was not triggered by a method of the object.
+        cmd (str, optional): Command executed, for "run_cmd" events.
+        user (str, optional): User the command was executed as, for "run_cmd" events.
+        remote_path (str, optional): Path on the remote host, for SFTP and tar events.
+        duration (float): Seconds the operation took.
+        bytes_transferred (int, optional): Bytes received by a command, or transferred by SFTP or in a tar
+            stream, when known.
+        cmd_response (CmdResponse, optional): Response of the command, for "run_cmd" events that did not raise.
+        error (Exception, optional): Exception raised by the operation, if any.
+    """
+
+    kind: str
+    host: str
+    port: int
+    operation: str | None = None
+    cmd: str | None = None
+    user: str | None = None
+    remote_path: str | None = None
+    duration: float = 0.0
+    bytes_transferred: int | None = None
+    cmd_response: CmdResponse | None = None
+    error: Exception | None = None
+
+    @property
+    def is_successful(self) -> bool:
+        """
+        Return True if the operation did not raise, False otherwise.
+
+        Returns:
+            bool: True if there is no error, False otherwise.
+        """
+        return self.error is None
@@ -0,0 +1,65 @@
+"""
+Type Models of the directory sync
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class SyncPlan:
+    """
+    Changes of a directory sync, made or, in a dry run, to be made. Paths are relative to the synced directories.
+
+    Attributes:
+        source (str): Directory copied from.
+        destination (str): Directory copied to.
+        dry_run (bool): Whether the changes were only planned.
+        dirs_to_create (list[str]): Directories missing from the destination.
+        files_to_create (list[str]): Files missing from the destination.
+        files_to_update (list[str]): Files of the destination that differ from the source.
+        paths_to_delete (list[str]): Files and directories removed from the destination: the ones missing from the
+            source if deletion is enabled, and the ones replaced by an entry of another type.
+        unchanged (int): Number of files already up to date.
+        bytes_to_copy (int): Bytes of the files to create and update.
+    """
+
+    source: str
+    destination: str
+    dry_run: bool = False
+    dirs_to_create: list[str] = field(default_factory=list)
+    files_to_create: list[str] = field(default_factory=list)
+    files_to_update: list[str] = field(default_factory=list)
+    paths_to_delete: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    bytes_to_copy: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        """
+        Return True if the destination differs from the source, False otherwise.
+
+        Returns:
+            bool: True if there is anything to create, update or delete.
+        """
+        return bool(
+            self.dirs_to_create
+            or self.files_to_create
+            or self.files_to_update
+            or self.paths_to_delete
+        )
+
+    def __str__(self) -> str:
+        """
+        One line per change, like rsync's itemized output: `-` deleted, `d` directory created,
+        `+` file created, `~` file updated.
+        """
+        lines = [f"- {path}" for path in self.paths_to_delete]
+        lines += [f"d {path}/" for path in self.dirs_to_create]
+        lines += [f"+ {path}" for path in self.files_to_create]
+        lines += [f"~ {path}" for path in self.files_to_update]
+        lines.append(
+            f"{len(self.files_to_create) + len(self.files_to_update)} files to copy "
+            f"({self.bytes_to_copy} bytes), {len(self.paths_to_delete)} to delete, "
+            f"{self.unchanged} unchanged"
+        )
+        return "\n".join(lines)
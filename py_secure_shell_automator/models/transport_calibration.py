@@ -0,0 +1,25 @@
+"""
+Type Models of the transport calibration
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class TransportCalibration:
+    """
+    Performance of a transport profile measured against a host.
+
+    Attributes:
+        profile (str): Name of the transport profile.
+        connect_time (float): Seconds to connect, authenticate and open the SFTP session.
+        cmd_latency (float): Median seconds of a `run_cmd` of a command doing nothing.
+        upload_throughput (float): Bytes per second of an SFTP upload of the payload.
+        download_throughput (float): Bytes per second of an SFTP download of the payload.
+    """
+
+    profile: str
+    connect_time: float
+    cmd_latency: float
+    upload_throughput: float
+    download_throughput: float
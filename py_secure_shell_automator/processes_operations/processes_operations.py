@@ -34,28 +34,14 @@ class SSHProcessOperations(BaseSSH):
             >>>     for process in processes:
             >>>         print(process)
         """
-        cmd = f"ps aux | grep {process} | grep -v grep"
+        cmd = self._process_status_command(process)
         cmd_response = self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=cmd,
             err_message=f"Process {process} not found",
         )
 
-        processes: list[Process] = []
-        for line in cmd_response.out.split("\n"):
-            fields = line.split()
-            if fields:
-                processes.append(
-                    Process(
-                        user=fields[0],
-                        pid=int(fields[1]),
-                        cpu=float(fields[2]),
-                        mem=float(fields[3]),
-                        command=" ".join(fields[10:]),
-                    )
-                )
-
-        return processes
+        return self._parse_single_process_status(cmd_response.out)
 
     def kill_process(self, process: str, run_as_root: bool = False) -> None:
         """
@@ -71,7 +57,7 @@ class SSHProcessOperations(BaseSSH):
         Examples:
             >>> py_ssh.kill_process('nginx')
         """
-        cmd = f"pkill {process}"
+        cmd = self._kill_process_command(process)
         self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=cmd,
@@ -97,15 +83,91 @@ class SSHProcessOperations(BaseSSH):
             >>> for process in processes:
             >>>     print(process)
         """
-        cmd = "ps aux"
+        cmd = self._running_processes_command()
         cmd_response = self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=cmd,
             custom_exception=GetProcessesStatusError,
         )
 
+        return self._parse_running_processes(cmd_response.out)
+
+    @staticmethod
+    def _process_status_command(process: str) -> str:
+        """
+        Helper method to build the command listing the processes with a given name.
+
+        Args:
+            process (str): Name of the process.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f"ps aux | grep {process} | grep -v grep"
+
+    @staticmethod
+    def _kill_process_command(process: str) -> str:
+        """
+        Helper method to build the command killing the processes with a given name.
+
+        Args:
+            process (str): Name of the process.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f"pkill {process}"
+
+    @staticmethod
+    def _running_processes_command() -> str:
+        """
+        Helper method to build the command listing every running process.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return "ps aux"
+
+    @staticmethod
+    def _parse_single_process_status(out: str) -> list[Process]:
+        """
+        Helper method to parse the output of `ps aux | grep process`.
+
+        Args:
+            out (str): Output of the command, without header.
+
+        Returns:
+            list[Process]: A list of Process objects, one per line of the output.
+        """
+        processes: list[Process] = []
+        for line in out.split("\n"):
+            fields = line.split()
+            if fields:
+                processes.append(
+                    Process(
+                        user=fields[0],
+                        pid=int(fields[1]),
+                        cpu=float(fields[2]),
+                        mem=float(fields[3]),
+                        command=" ".join(fields[10:]),
+                    )
+                )
+
+        return processes
+
+    @staticmethod
+    def _parse_running_processes(out: str) -> list[Process]:
+        """
+        Helper method to parse the output of `ps aux`.
+
+        Args:
+            out (str): Output of the command, including the header line.
+
+        Returns:
+            list[Process]: A list of Process objects, one per process.
+        """
         processes = []
-        for line in cmd_response.out.splitlines()[1:]:  # Skip the header line
+        for line in out.splitlines()[1:]:  # Skip the header line
             fields = line.split()
             command_start_index = line.index(fields[10])
             command = line[command_start_index:]
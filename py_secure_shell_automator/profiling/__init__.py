@@ -0,0 +1 @@
+from .operation_profiler import MethodProfile, OperationProfiler, profile_from_env
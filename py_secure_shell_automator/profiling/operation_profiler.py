@@ -0,0 +1,331 @@
+"""
+Module containing an opt-in profiler of the public methods of PySecureShellAutomator
+"""
+
+import atexit
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable
+from ..py_secure_shell_automator import PySecureShellAutomator
+
+# Environment variable enabling the profiler for the whole process, set to the path of the summary
+PROFILE_ENV_VAR = "PY_SSH_PROFILE"
+
+# The profiler whose wrappers are installed, if any
+_active: "OperationProfiler | None" = None
+
+
+@dataclass
+class MethodProfile:
+    """
+    Measures of one public method.
+
+    Attributes:
+        calls (int): Number of calls, nested ones included.
+        profiled_calls (int): Number of outermost calls recorded by cProfile.
+        cumulative_time (float): Seconds spent in the outermost calls.
+        max_time (float): Seconds of the slowest outermost call.
+        peak_memory (int): Largest peak of memory allocated during an outermost call, in bytes. 0 if memory is not traced.
+        profile (cProfile.Profile): Functions called during the outermost calls.
+        snapshot (tracemalloc.Snapshot, optional): Memory still allocated at the end of the call with the largest peak,
+            if snapshots are enabled.
+    """
+
+    calls: int = 0
+    profiled_calls: int = 0
+    cumulative_time: float = 0.0
+    max_time: float = 0.0
+    peak_memory: int = 0
+    profile: cProfile.Profile = field(default_factory=cProfile.Profile, repr=False)
+    snapshot: tracemalloc.Snapshot | None = field(default=None, repr=False)
+
+
+class OperationProfiler:
+    """
+    Profiles every public method of `PySecureShellAutomator`, for all the instances, while it's active.
+
+    Only the outermost call of a thread is profiled: when `get_file_content` calls `run_cmd`, the time of
+    `run_cmd` is part of `get_file_content`, and `run_cmd` only counts one more call. For each method, the
+    functions called are recorded with cProfile, so the summary tells whether the time went to the network
+    wait, to paramiko's crypto or to parsing, and the peak of memory allocated is measured with tracemalloc.
+
+    cProfile only profiles one call at a time, so when several threads call methods concurrently, the
+    calls that overlap with another profiled call are timed but not profiled. The memory peaks of calls
+    overlapping in several threads include each other's allocations.
+
+    Attributes:
+        output (str, optional): Path of the summary written when the profiler stops. Defaults to None.
+        memory (bool, optional): Whether to trace the memory allocations. Defaults to True.
+        snapshots (bool, optional): Whether to keep a tracemalloc snapshot of the call with the largest peak of each method.
+            Defaults to False.
+        top (int, optional): Number of functions listed per method in the summary. Defaults to 10.
+
+    Example:
+        ```python
+        from py_secure_shell_automator.profiling import OperationProfiler
+
+        with OperationProfiler(output='profile.txt'):
+            py_ssh.get_all_running_processes()
+            py_ssh.get_directory_structure('/var/log')
+        ```
+    """
+
+    def __init__(
+        self,
+        output: str | None = None,
+        memory: bool = True,
+        snapshots: bool = False,
+        top: int = 10,
+    ) -> None:
+        self.output = output
+        self.memory = memory
+        self.snapshots = snapshots
+        self.top = top
+        self.methods: dict[str, MethodProfile] = {}
+        self._lock = threading.Lock()
+        # Held during a call profiled by cProfile, only one at a time
+        self._profiling = threading.Lock()
+        self._local = threading.local()
+        self._originals: dict[str, Callable] = {}
+        self._started_tracemalloc = False
+
+    def __enter__(self) -> "OperationProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Wrap the public methods of `PySecureShellAutomator`.
+
+        Raises:
+            RuntimeError: If the methods are already wrapped by another profiler.
+
+        Example:
+            >>> profiler = OperationProfiler()
+            >>> profiler.start()
+        """
+        global _active
+        if _active is not None:
+            raise RuntimeError("Another OperationProfiler is already active")
+        _active = self
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        for name in dir(PySecureShellAutomator):
+            attribute = getattr(PySecureShellAutomator, name)
+            if (
+                name.startswith("_")
+                or isinstance(attribute, property)
+                or not callable(attribute)
+            ):
+                continue
+            self._originals[name] = PySecureShellAutomator.__dict__.get(name)
+            setattr(PySecureShellAutomator, name, self._wrap(name, attribute))
+
+    def stop(self) -> None:
+        """
+        Restore the methods and write the summary to `output`, if set.
+
+        Example:
+            >>> profiler.stop()
+        """
+        for name, original in self._originals.items():
+            if original is None:
+                # The method is inherited, removing the wrapper exposes it again
+                delattr(PySecureShellAutomator, name)
+            else:
+                setattr(PySecureShellAutomator, name, original)
+        self._originals.clear()
+        global _active
+        _active = None
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        if self.output:
+            self.dump(self.output)
+
+    def summary(self) -> str:
+        """
+        Build the per-method summary: calls, cumulative and maximum time, peak memory, and the functions
+        taking the most cumulative time in each method.
+
+        Returns:
+            str: The summary, methods sorted by cumulative time.
+
+        Example:
+            >>> print(profiler.summary())
+        """
+        with self._lock:
+            methods = sorted(
+                self.methods.items(), key=lambda item: item[1].cumulative_time, reverse=True
+            )
+        out = io.StringIO()
+        out.write(
+            f"{'method':<32} {'calls':>7} {'cumulative s':>13} "
+            f"{'max ms':>10} {'peak KiB':>10}\n"
+        )
+        for name, method in methods:
+            out.write(
+                f"{name:<32} {method.calls:>7} {method.cumulative_time:>13.4f} "
+                f"{method.max_time * 1000:>10.2f} {method.peak_memory / 1024:>10.1f}\n"
+            )
+
+        for name, method in methods:
+            out.write(f"\n=== {name} ===\n")
+            if not method.profiled_calls:
+                out.write("Not profiled, every call overlapped with another profiled call\n")
+                continue
+            stats = pstats.Stats(method.profile, stream=out)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+            if method.snapshot is not None:
+                out.write(
+                    "Largest allocations still held at the end of the call "
+                    "with the largest peak:\n"
+                )
+                for stat in method.snapshot.statistics("lineno")[: self.top]:
+                    out.write(f"  {stat}\n")
+        return out.getvalue()
+
+    def dump(self, path: str) -> None:
+        """
+        Write the summary to a file.
+
+        Args:
+            path (str): Path of the file.
+
+        Example:
+            >>> profiler.dump('profile.txt')
+        """
+        with open(path, "w") as f:
+            f.write(self.summary())
+
+    def dump_stats(self, directory: str) -> None:
+        """
+        Write the cProfile stats of each method to `<directory>/<method>.prof`, to explore them with
+        tools such as snakeviz.
+
+        Args:
+            directory (str): Directory of the files, created if needed.
+
+        Example:
+            >>> profiler.dump_stats('profiles')
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            methods = list(self.methods.items())
+        for name, method in methods:
+            if method.profiled_calls:
+                method.profile.dump_stats(os.path.join(directory, f"{name}.prof"))
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        """
+        Build the wrapper profiling a method.
+
+        Args:
+            name (str): Name of the method.
+            method (Callable): The method.
+
+        Returns:
+            Callable: The wrapper.
+        """
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs) -> Any:
+            with self._lock:
+                profile = self.methods.setdefault(name, MethodProfile())
+                profile.calls += 1
+            if getattr(self._local, "active", False):
+                return method(*args, **kwargs)
+            return self._profile_call(profile, method, args, kwargs)
+
+        return wrapper
+
+    def _profile_call(
+        self, profile: MethodProfile, method: Callable, args: tuple, kwargs: dict
+    ) -> Any:
+        """
+        Run an outermost call under cProfile and tracemalloc.
+
+        Args:
+            profile (MethodProfile): Measures of the method.
+            method (Callable): The method.
+            args (tuple): Positional arguments of the call.
+            kwargs (dict): Keyword arguments of the call.
+
+        Returns:
+            Any: The return value of the method.
+        """
+        self._local.active = True
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        profiled = self._profiling.acquire(blocking=False)
+        if profiled:
+            try:
+                profile.profile.enable()
+            except ValueError:
+                # Another profiler, outside of this one, is active
+                self._profiling.release()
+                profiled = False
+
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiled:
+                profile.profile.disable()
+                self._profiling.release()
+            self._local.active = False
+            peak = tracemalloc.get_traced_memory()[1] - baseline if tracing else 0
+            snapshot = (
+                tracemalloc.take_snapshot()
+                if tracing and self.snapshots and peak > profile.peak_memory
+                else None
+            )
+            with self._lock:
+                profile.profiled_calls += profiled
+                profile.cumulative_time += elapsed
+                profile.max_time = max(profile.max_time, elapsed)
+                if peak > profile.peak_memory:
+                    profile.peak_memory = peak
+                    if snapshot is not None:
+                        profile.snapshot = snapshot
+
+
+def profile_from_env() -> OperationProfiler | None:
+    """
+    Start a profiler for the whole process if the PY_SSH_PROFILE environment variable is set,
+    writing the summary to the path it contains when the process exits.
+
+    Called when the package is imported, so production runs can be profiled without editing any code.
+
+    Returns:
+        OperationProfiler | None: The started profiler, or None if the variable is not set.
+
+    Example:
+        ```bash
+        PY_SSH_PROFILE=/tmp/py_ssh_profile.txt python deploy.py
+        ```
+    """
+    output = os.environ.get(PROFILE_ENV_VAR)
+    if not output:
+        return None
+    profiler = OperationProfiler(output=output)
+    profiler.start()
+    atexit.register(profiler.stop)
+    return profiler
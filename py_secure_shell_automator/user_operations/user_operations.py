@@ -29,7 +29,7 @@ class SSHUserOperations(BaseSSH):
             >>> py_ssh.create_user(username='newuser', password='newpassword')
         """
         # Create the user
-        create_user_cmd = f"useradd -m {username}"
+        create_user_cmd = self._create_user_command(username)
         self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=create_user_cmd,
@@ -37,7 +37,7 @@ class SSHUserOperations(BaseSSH):
         )
 
         # Set the user's password
-        set_password_cmd = f"echo '{username}:{password}' | sudo chpasswd"
+        set_password_cmd = self._set_password_command(username, password)
         self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=set_password_cmd,
@@ -59,9 +59,49 @@ class SSHUserOperations(BaseSSH):
             >>> py_ssh.delete_user(username='olduser')
         """
         # Delete the user
-        delete_user_cmd = f"userdel -r {username}"
+        delete_user_cmd = self._delete_user_command(username)
         self.run_cmd(
             user=self._get_user(run_as_root),
             cmd=delete_user_cmd,
             custom_exception=UserDeletionError,
         )
+
+    @staticmethod
+    def _create_user_command(username: str) -> str:
+        """
+        Helper method to build the command creating a user and its home directory.
+
+        Args:
+            username (str): The username of the new user.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f"useradd -m {username}"
+
+    @staticmethod
+    def _set_password_command(username: str, password: str) -> str:
+        """
+        Helper method to build the command setting the password of a user.
+
+        Args:
+            username (str): The username of the user.
+            password (str): The new password.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f"echo '{username}:{password}' | sudo chpasswd"
+
+    @staticmethod
+    def _delete_user_command(username: str) -> str:
+        """
+        Helper method to build the command deleting a user and its home directory.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            str: The command to execute on the remote host.
+        """
+        return f"userdel -r {username}"
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+
+from py_secure_shell_automator import AsyncPySecureShellAutomator
+from . import *
+
+
+def _async_py_ssh(**kwargs) -> AsyncPySecureShellAutomator:
+    return AsyncPySecureShellAutomator(
+        host=PYSECURE_SHELL_AUTOMATOR_HOST,
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        **kwargs,
+    )
+
+
+def test_run_cmd():
+    async def main():
+        async with _async_py_ssh() as py_ssh:
+            return await py_ssh.run_cmd("echo Hello, World!")
+
+    cmd_response = asyncio.run(main())
+    assert cmd_response.ext_code == 0
+    assert cmd_response.out == "Hello, World!"
+
+
+def test_run_cmd_concurrently():
+    async def main():
+        async with _async_py_ssh() as py_ssh:
+            return await asyncio.gather(
+                *(py_ssh.run_cmd(f"sleep 0.5; echo {i}") for i in range(8))
+            )
+
+    responses = asyncio.run(main())
+    assert [response.out for response in responses] == [str(i) for i in range(8)]
+
+
+def test_run_cmd_with_raise_exception():
+    async def main():
+        async with _async_py_ssh() as py_ssh:
+            await py_ssh.run_cmd("inexistent command")
+
+    with pytest.raises(Exception):
+        asyncio.run(main())
+
+
+def test_run_cmd_timeout():
+    async def main():
+        async with _async_py_ssh() as py_ssh:
+            await py_ssh.run_cmd("sleep 5", cmd_timeout=0.5)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(main())
+
+
+def test_operations():
+    async def main():
+        async with _async_py_ssh(sftp=True) as py_ssh:
+            assert isinstance(await py_ssh.hostname, str)
+            assert isinstance(await py_ssh.get_kernel_version(), str)
+            assert await py_ssh.get_all_running_processes()
+            await py_ssh.create_directory("/tmp/async_test_dir")
+            dir_structure = await py_ssh.get_directory_structure("/tmp/async_test_dir")
+            await py_ssh.remove_directory("/tmp/async_test_dir", force=True)
+            return dir_structure
+
+    dir_structure = asyncio.run(main())
+    assert dir_structure[0].dir == "/tmp/async_test_dir"
+
+
+def test_stream_cmd():
+    async def main():
+        async with _async_py_ssh() as py_ssh:
+            stream = py_ssh.stream_cmd("seq 1 1000")
+            return [line async for line in stream], stream.ext_code
+
+    lines, ext_code = asyncio.run(main())
+    assert lines == [str(i) for i in range(1, 1001)]
+    assert ext_code == 0
+
+
+def test_run_cmd_stderr_only():
+    async def main():
+        async with _async_py_ssh() as py_ssh:
+            return await asyncio.wait_for(
+                py_ssh.run_cmd(
+                    "echo first >&2; sleep 0.2; echo second >&2; exit 3",
+                    raise_exception=False,
+                    get_pty=False,
+                ),
+                5,
+            )
+
+    # Without output, the command is only noticed through its stderr data and its EOF
+    cmd_response = asyncio.run(main())
+    assert cmd_response.ext_code == 3
+    assert cmd_response.err == "first\nsecond"
@@ -1,7 +1,16 @@
+import os
+import select
+import socket
+import threading
+
 import pytest
+from paramiko import SSHException
 
 from py_secure_shell_automator import PySecureShellAutomator
-from . import py_ssh
+from py_secure_shell_automator.base_ssh import BatchError, ResultCache
+from py_secure_shell_automator.base_ssh.exceptions import CmdError
+from py_secure_shell_automator.base_ssh.key_cache import load_host_keys
+from . import *
 
 def test_hostname(py_ssh: PySecureShellAutomator):
     hostname = py_ssh.hostname
@@ -22,3 +31,310 @@ def test_run_cmd_with_raise_exception(py_ssh: PySecureShellAutomator):
 
 def test_run_cmd_without_raise_exception(py_ssh: PySecureShellAutomator):
     py_ssh.run_cmd("inexistent command", raise_exception=False)
+
+
+def test_run_cmd_bytes_without_pty(py_ssh: PySecureShellAutomator):
+    cmd_response = py_ssh.run_cmd(
+        "printf 'Hello\nWorld\n'; echo warning >&2", get_pty=False, decode=False
+    )
+    assert cmd_response.out == b"Hello\nWorld\n"
+    assert cmd_response.err == b"warning\n"
+
+
+def test_run_cmd_large_stderr(py_ssh: PySecureShellAutomator):
+    # Far more than the channel window on stderr, while stdout is still open
+    cmd_response = py_ssh.run_cmd(
+        "head -c 8000000 /dev/zero >&2; echo done", get_pty=False, decode=False
+    )
+    assert cmd_response.out == b"done\n"
+    assert len(cmd_response.err) == 8000000
+
+
+@pytest.mark.parametrize(
+    "truncate, expected",
+    [("head", b"0123"), ("tail", b"6789"), ("head+tail", b"0189")],
+)
+def test_run_cmd_truncate(py_ssh: PySecureShellAutomator, truncate, expected):
+    cmd_response = py_ssh.run_cmd(
+        "printf 0123456789",
+        get_pty=False,
+        decode=False,
+        max_output_bytes=4,
+        truncate=truncate,
+    )
+    assert cmd_response.out == expected
+    assert cmd_response.truncated_bytes == 6
+    decoded = py_ssh.run_cmd(
+        "printf 0123456789", get_pty=False, max_output_bytes=4, truncate=truncate
+    )
+    assert decoded.out == expected.decode()
+
+
+def test_run_cmd_spill_to_disk(py_ssh: PySecureShellAutomator):
+    cmd_response = py_ssh.run_cmd(
+        "seq 1 100000", max_output_bytes=1024, spill_to_disk=True, get_pty=False
+    )
+    with cmd_response.out as view:
+        assert view[:6] == b"1\n2\n3\n"
+        assert view[-7:] == b"100000\n"
+    assert cmd_response.truncated_bytes == 0
+
+
+def test_run_cmd_stdin(py_ssh: PySecureShellAutomator, tmp_path):
+    assert py_ssh.run_cmd("cat", stdin=b"Hello, World!").out == "Hello, World!"
+    assert py_ssh.run_cmd("wc -c", stdin=iter([b"abc", b"def"])).out == "6"
+
+    # Much more than the channel window, while the command writes as much output
+    local_file = tmp_path / "input.bin"
+    local_file.write_bytes(os.urandom(8 * 1024 * 1024))
+    with open(local_file, "rb") as f:
+        cmd_response = py_ssh.run_cmd("cat", stdin=f, decode=False)
+    assert cmd_response.out == local_file.read_bytes()
+
+
+def test_run_cmd_stdin_not_consumed(py_ssh: PySecureShellAutomator):
+    cmd_response = py_ssh.run_cmd("head -c 3", stdin=b"x" * (8 * 1024 * 1024))
+    assert cmd_response.out == "xxx"
+
+
+def test_run_cmd_stdin_invalid(py_ssh: PySecureShellAutomator):
+    with pytest.raises(TypeError):
+        py_ssh.run_cmd("cat", stdin=["text"])
+    assert py_ssh.run_cmd("echo Hello, World!").out == "Hello, World!"
+
+
+def test_stream_cmd(py_ssh: PySecureShellAutomator):
+    stream = py_ssh.stream_cmd("seq 1 1000")
+    lines = list(stream)
+    assert lines == [str(i) for i in range(1, 1001)]
+    assert stream.ext_code == 0
+
+
+def test_stream_cmd_bytes(py_ssh: PySecureShellAutomator):
+    output = b"".join(py_ssh.stream_cmd("printf 'Hello, World!'", lines=False))
+    assert output == b"Hello, World!"
+
+
+def test_stream_cmd_with_raise_exception(py_ssh: PySecureShellAutomator):
+    stream = py_ssh.stream_cmd("echo first line; exit 3")
+    with pytest.raises(Exception):
+        for line in stream:
+            assert line == "first line"
+    assert stream.ext_code == 3
+
+
+def test_stream_cmd_without_pty(py_ssh: PySecureShellAutomator):
+    stream = py_ssh.stream_cmd(
+        "printf 'a\\r\\n\\0b'; echo oops >&2; exit 2", lines=False, get_pty=False
+    )
+    chunks = []
+    with pytest.raises(CmdError, match="oops"):
+        for chunk in stream:
+            chunks.append(chunk)
+    assert b"".join(chunks) == b"a\r\n\0b"
+
+
+def test_stream_cmd_timeout(py_ssh: PySecureShellAutomator):
+    with pytest.raises(TimeoutError):
+        list(py_ssh.stream_cmd("sleep 5", cmd_timeout=0.5, get_pty=False))
+
+
+def test_run_cmds_concurrently(py_ssh: PySecureShellAutomator):
+    cmds = [f"sleep 0.5; echo {i}" for i in range(12)]
+    responses = py_ssh.run_cmds_concurrently(cmds, max_sessions=6)
+    assert [response.out for response in responses] == [str(i) for i in range(12)]
+
+
+def test_run_cmds_concurrently_no_retry_once_started(
+    py_ssh: PySecureShellAutomator, tmp_path, monkeypatch
+):
+    runs = tmp_path / "runs"
+    drain = py_ssh._drain_channel
+
+    def failing_drain(channel, *args):
+        drain(channel, *args)
+        raise SSHException("Connection lost")
+
+    monkeypatch.setattr(py_ssh, "_drain_channel", failing_drain)
+    with pytest.raises(SSHException):
+        py_ssh.run_cmds_concurrently([f"echo {i} >> {runs}" for i in range(4)])
+    # Each command ran once, none was retried after it started
+    assert sorted(runs.read_text().split()) == ["0", "1", "2", "3"]
+
+
+def test_run_cmds_concurrently_with_raise_exception(py_ssh: PySecureShellAutomator):
+    with pytest.raises(Exception):
+        py_ssh.run_cmds_concurrently(["echo Hello, World!", "inexistent command"])
+
+
+def test_shell_session(py_ssh: PySecureShellAutomator):
+    with py_ssh.shell_session():
+        assert py_ssh.run_cmd("echo Hello, World!").out == "Hello, World!"
+        assert py_ssh.run_cmd("whoami", user="root").out == "root"
+        cmd_response = py_ssh.run_cmd("echo error >&2; exit 3", raise_exception=False)
+        assert cmd_response.ext_code == 3
+        assert cmd_response.out == "error"
+        with pytest.raises(Exception):
+            py_ssh.run_cmd("inexistent command")
+        assert py_ssh.run_cmd("cat; echo done").out == "done"
+
+
+def test_batch(py_ssh: PySecureShellAutomator):
+    with py_ssh.batch() as batch:
+        created = batch.create_directory("/tmp/batch_test_dir")
+        echoed = batch.run_cmd("echo Hello, World!")
+        failed = batch.get_file_content("/tmp/batch_test_dir/inexistent_file")
+        removed = batch.remove_directory("/tmp/batch_test_dir")
+        assert not created.done
+    assert created.result() is None
+    assert echoed.result().out == "Hello, World!"
+    with pytest.raises(Exception):
+        failed.result()
+    assert removed.exception() is None
+    assert [response.ext_code for response in echoed.cmd_responses] == [0]
+
+
+def test_batch_stop_on_error(py_ssh: PySecureShellAutomator):
+    with py_ssh.batch(stop_on_error=True) as batch:
+        failed = batch.run_cmd("exit 2", raise_exception=False)
+        skipped = batch.run_cmd("echo skipped")
+    assert failed.result().ext_code == 2
+    with pytest.raises(BatchError):
+        skipped.result()
+
+
+def test_batch_not_batchable(py_ssh: PySecureShellAutomator):
+    with pytest.raises(BatchError):
+        py_ssh.batch().copy_file_to_remote("/etc/hostname", "/tmp/hostname")
+    with pytest.raises(BatchError):
+        py_ssh.batch().run_cmd("cat", stdin=b"Hello, World!")
+
+
+def test_lazy_connection():
+    py_ssh = PySecureShellAutomator(
+        host=PYSECURE_SHELL_AUTOMATOR_HOST,
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        lazy=True,
+    )
+    assert py_ssh._client is None
+    assert py_ssh.run_cmd("echo Hello, World!").out == "Hello, World!"
+    assert py_ssh._client is not None
+    py_ssh.close()
+
+
+def test_host_keys_cache(tmp_path):
+    known_hosts = tmp_path / "known_hosts"
+    known_hosts.write_text(
+        "host1 ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAIOMqqnkVzrm0SdG6UOoqKLsabgH5C9okWi0dh2l9GKJl\n"
+    )
+    host_keys = load_host_keys(str(known_hosts))
+    assert "host1" in host_keys
+    assert load_host_keys(str(known_hosts)) is host_keys
+
+    known_hosts.write_text("")
+    assert "host1" not in load_host_keys(str(known_hosts))
+    assert len(load_host_keys(str(tmp_path / "inexistent"))) == 0
+
+
+def test_reconnect(py_ssh: PySecureShellAutomator):
+    py_ssh._ssh.get_transport().close()
+    assert py_ssh.run_cmd("echo Hello, World!").out == "Hello, World!"
+    assert py_ssh.reconnect_count == 1
+
+
+class FreezingProxy:
+    """TCP proxy to the test host whose open connections can be frozen: they stay open but nothing goes through."""
+
+    def __init__(self):
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.port = self.server.getsockname()[1]
+        self.frozen = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client = self.server.accept()[0]
+            upstream = socket.create_connection((PYSECURE_SHELL_AUTOMATOR_HOST, PYSECURE_SHELL_AUTOMATOR_PORT))
+            threading.Thread(target=self._forward, args=(client, upstream, threading.Event()), daemon=True).start()
+
+    def _forward(self, client, upstream, frozen):
+        self.frozen.append(frozen)
+        peers = {client: upstream, upstream: client}
+        while not frozen.is_set():
+            for sock in select.select(list(peers), [], [], 0.1)[0]:
+                if not frozen.is_set():
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    peers[sock].sendall(data)
+
+    def freeze(self):
+        for frozen in self.frozen:
+            frozen.set()
+
+
+def test_reconnect_half_open():
+    proxy = FreezingProxy()
+    py_ssh = PySecureShellAutomator(
+        host="127.0.0.1",
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        port=proxy.port,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+    )
+    proxy.freeze()
+    assert py_ssh.run_cmd("echo Hello, World!", cmd_timeout=1).out == "Hello, World!"
+    assert py_ssh.reconnect_count == 1
+
+
+def test_no_reconnect_after_close(py_ssh: PySecureShellAutomator):
+    py_ssh.close()
+    with pytest.raises(Exception):
+        py_ssh.run_cmd("echo Hello, World!")
+    assert py_ssh.reconnect_count == 0
+
+
+def test_run_cmd_cached(py_ssh: PySecureShellAutomator):
+    first = py_ssh.run_cmd("date +%s%N", cached=True)
+    assert py_ssh.run_cmd("date +%s%N", cached=True) is first
+    assert py_ssh.run_cmd("date +%s%N").out != first.out
+    assert py_ssh.invalidate_cache("date +%s%N") == 1
+    assert py_ssh.run_cmd("date +%s%N", cached=True) is not first
+
+
+def test_run_cmd_cached_spill_to_disk(py_ssh: PySecureShellAutomator):
+    truncated = py_ssh.run_cmd("seq 1 1000", cached=True, max_output_bytes=16)
+    assert truncated.truncated_bytes > 0
+    spilled = py_ssh.run_cmd(
+        "seq 1 1000", cached=True, max_output_bytes=16, spill_to_disk=True
+    )
+    assert spilled is not truncated
+    assert spilled.truncated_bytes == 0
+
+
+def test_run_cmd_cached_failure_not_cached(py_ssh: PySecureShellAutomator):
+    py_ssh.run_cmd("inexistent command", raise_exception=False, cached=True)
+    assert py_ssh.invalidate_cache() == 0
+
+
+def test_cached_query(py_ssh: PySecureShellAutomator):
+    hostname = py_ssh.hostname
+    kernel_version = py_ssh.get_kernel_version()
+    assert py_ssh.get_kernel_version(run_as_root=False) is kernel_version
+    assert py_ssh.hostname is hostname
+    assert py_ssh.invalidate_cache("hostname") == 1
+    assert py_ssh.invalidate_cache() == 1
+
+
+def test_result_cache_ttl_and_lru():
+    cache = ResultCache(ttl=60, max_entries=2)
+    cache.put(("a",), 1)
+    cache.put(("b",), 2, ttl=0)
+    assert cache.lookup(("b",)) == (False, None)
+    cache.put(("c",), 3)
+    cache.lookup(("a",))
+    cache.put(("d",), 4)
+    assert cache.lookup(("c",)) == (False, None)
+    assert cache.lookup(("a",)) == (True, 1)
+    assert cache.lookup(("d",)) == (True, 4)
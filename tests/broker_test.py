@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from py_secure_shell_automator import PySecureShellAutomator, SSHBroker
+from . import *
+
+
+@pytest.fixture
+def broker(tmp_path) -> SSHBroker:
+    with SSHBroker(str(tmp_path / "broker.sock")) as broker:
+        yield broker
+
+
+def _brokered(broker: SSHBroker, **kwargs) -> PySecureShellAutomator:
+    return PySecureShellAutomator(
+        host=PYSECURE_SHELL_AUTOMATOR_HOST,
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        broker_socket=broker.socket_path,
+        **kwargs,
+    )
+
+
+def test_run_cmd_through_broker(broker: SSHBroker):
+    first, second = _brokered(broker), _brokered(broker)
+    assert first.run_cmd("echo Hello, World!").out == "Hello, World!"
+    assert second.run_cmd("whoami", user="root").out == "root"
+    assert first._client is None and second._client is None
+    assert len(broker._connections) == 1
+
+    cmd_response = first.run_cmd("echo error >&2; exit 3", raise_exception=False)
+    assert cmd_response.ext_code == 3
+    with pytest.raises(Exception):
+        first.run_cmd("inexistent command")
+
+
+def test_run_cmd_outputs_through_broker(broker: SSHBroker):
+    py_ssh = _brokered(broker)
+    cmd_response = py_ssh.run_cmd(
+        "printf 'raw\\0'; echo warning >&2", get_pty=False, decode=False
+    )
+    assert cmd_response.out == b"raw\0"
+    assert cmd_response.err == b"warning\n"
+
+    assert py_ssh.run_cmd("cat", stdin=iter([b"Hello, ", b"World!"])).out == "Hello, World!"
+
+    cmd_response = py_ssh.run_cmd(
+        "seq 1 100000", max_output_bytes=1024, spill_to_disk=True, get_pty=False
+    )
+    with cmd_response.out as view:
+        assert view[-7:] == b"100000\n"
+
+
+def test_sftp_through_broker(broker: SSHBroker, tmp_path):
+    local_file = tmp_path / "file.txt"
+    local_file.write_text("Hello, World!")
+    py_ssh = _brokered(broker, sftp=True)
+    py_ssh.copy_file_to_remote(str(local_file), "/tmp/broker_test_file.txt")
+    py_ssh.copy_file_from_remote("/tmp/broker_test_file.txt", str(tmp_path / "copy.txt"))
+    assert (tmp_path / "copy.txt").read_text() == "Hello, World!"
+    py_ssh.remove_file("/tmp/broker_test_file.txt")
+
+
+def test_connection_options_through_broker(broker: SSHBroker):
+    _brokered(broker).run_cmd("true")
+    _brokered(broker, keepalive_interval=30).run_cmd("true")
+    _brokered(broker, timeout=30).run_cmd("true")
+    assert len(broker._connections) == 3
+
+
+def test_broker_socket_permissions(broker: SSHBroker, tmp_path):
+    assert os.stat(broker.socket_path).st_mode & 0o777 == 0o600
+    assert os.listdir(tmp_path) == ["broker.sock"]
@@ -0,0 +1,103 @@
+import pytest
+
+from py_secure_shell_automator import SSHConnectionPool
+from py_secure_shell_automator.connection_pool.exceptions import PoolExhaustedError
+from . import *
+
+
+@pytest.fixture
+def pool() -> SSHConnectionPool:
+    with SSHConnectionPool(max_per_host=1, checkout_timeout=0.1) as pool:
+        yield pool
+
+
+def _connection(pool: SSHConnectionPool, **kwargs):
+    return pool.connection(
+        host=PYSECURE_SHELL_AUTOMATOR_HOST,
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        **kwargs,
+    )
+
+
+def test_connection_is_reused(pool: SSHConnectionPool):
+    with _connection(pool) as py_ssh:
+        assert py_ssh.run_cmd("echo Hello, World!").out == "Hello, World!"
+        first_client = py_ssh._ssh
+
+    with _connection(pool) as py_ssh:
+        assert py_ssh._ssh is first_client
+
+    stats = pool.stats
+    assert stats.misses == 1
+    assert stats.hits == 1
+    assert stats.idle == 1
+
+
+def test_max_per_host(pool: SSHConnectionPool):
+    with _connection(pool):
+        with pytest.raises(PoolExhaustedError):
+            with _connection(pool):
+                ...
+
+
+def test_idle_connections_are_evicted(pool: SSHConnectionPool):
+    pool.idle_ttl = 0
+    with _connection(pool):
+        ...
+
+    assert pool.evict_idle() == 1
+    assert pool.stats.evictions == 1
+
+
+def test_unhealthy_connections_are_replaced(pool: SSHConnectionPool):
+    with _connection(pool) as py_ssh:
+        first_client = py_ssh._ssh
+    first_client.close()
+
+    with _connection(pool, sftp=True) as py_ssh:
+        assert py_ssh._ssh is not first_client
+        assert py_ssh.run_cmd("echo Hello, World!").is_successful
+
+
+def test_failed_checkout_frees_its_slot(pool: SSHConnectionPool):
+    with _connection(pool):
+        ...
+
+    with pytest.raises(TypeError):
+        with _connection(pool, bogus=1):
+            ...
+    assert (pool.stats.in_use, pool.stats.idle) == (0, 0)
+
+    with _connection(pool) as py_ssh:
+        assert py_ssh.run_cmd("echo Hello, World!").is_successful
+
+
+def test_connection_options_are_part_of_the_key(pool: SSHConnectionPool):
+    with _connection(pool) as py_ssh:
+        first_client = py_ssh._ssh
+
+    with _connection(pool, transport_profile="lan-bulk") as py_ssh:
+        assert py_ssh._ssh is not first_client
+
+    with _connection(pool, transport_profile="default", timeout=10) as py_ssh:
+        assert py_ssh._ssh is first_client
+
+
+def test_release_is_idempotent(pool: SSHConnectionPool):
+    py_ssh = pool.checkout(
+        host=PYSECURE_SHELL_AUTOMATOR_HOST,
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+    )
+    pool.release(py_ssh)
+    pool.release(py_ssh)
+    assert (pool.stats.in_use, pool.stats.idle) == (0, 1)
+
+    # The released handle neither shares the pooled connection, nor opens one
+    with pytest.raises(ConnectionError):
+        py_ssh.run_cmd("echo Hello, World!")
+    with _connection(pool) as other:
+        assert other.run_cmd("echo Hello, World!").is_successful
@@ -1,5 +1,25 @@
+import io
+import os
+import tarfile
+import threading
+import time
+import uuid
+
 import pytest
-from py_secure_shell_automator.files_operations import SSHFileOperations
+from py_secure_shell_automator import SSHEvent
+from py_secure_shell_automator.base_ssh import SSHObserver
+from py_secure_shell_automator.files_operations import (
+    ChunkedTransfer,
+    DeltaTransfer,
+    SSHFileOperations,
+)
+from py_secure_shell_automator.files_operations.exceptions import (
+    DirectorySyncError,
+    FileTransferError,
+    ListDirectoryContentError,
+    RemoteFileReadError,
+)
+from py_secure_shell_automator.files_operations.tar_transfer import _checked_members
 from . import *
 
 
@@ -55,6 +75,364 @@ def test_copy_file_from_remote(ssh_file_ops: SSHFileOperations):
     ssh_file_ops.copy_file_from_remote(remote_path, local_path)
 
 
+@pytest.mark.parametrize("connections", [1, 2])
+def test_copy_file_parallel(ssh_file_ops: SSHFileOperations, tmp_path, connections: int):
+    content = os.urandom(1024 * 1024 + 123)
+    local_path = tmp_path / "parallel.bin"
+    local_path.write_bytes(content)
+    remote_path = "/tmp/py_ssh_parallel.bin"
+    copy_path = tmp_path / "parallel.copy"
+
+    options = dict(parallelism=3, chunk_size=256 * 1024, connections=connections, verify=True)
+    ssh_file_ops.copy_file_to_remote(str(local_path), remote_path, **options)
+    ssh_file_ops.copy_file_from_remote(remote_path, str(copy_path), **options)
+    assert copy_path.read_bytes() == content
+
+
+def test_copy_file_verify_mismatch(ssh_file_ops: SSHFileOperations, tmp_path):
+    local_path = tmp_path / "mismatch.bin"
+    local_path.write_bytes(b"a" * 1000)
+    transfer = ChunkedTransfer(ssh_file_ops, parallelism=2, chunk_size=300)
+    # Local checksums that never match the remote ones, so the second attempt fails too
+    transfer._run = lambda *args: {index: "0" * 64 for index in range(4)}
+    with pytest.raises(FileTransferError):
+        transfer.upload(str(local_path), "/tmp/py_ssh_mismatch.bin")
+
+
+@pytest.mark.parametrize("in_place", [False, True])
+def test_delta_transfer(ssh_file_ops: SSHFileOperations, tmp_path, in_place: bool):
+    blocks = [os.urandom(1024) for _ in range(8)]
+    local_path = tmp_path / "delta.bin"
+    remote_path = f"/tmp/py_ssh_delta_{uuid.uuid4().hex}.bin"
+    transfer = DeltaTransfer(ssh_file_ops, block_size=1024, in_place=in_place)
+
+    local_path.write_bytes(b"".join(blocks) + b"tail")
+    # Missing remote file, sent whole
+    assert transfer.upload(str(local_path), remote_path) == 8 * 1024 + 4
+
+    # A changed block, two swapped blocks, and a new tail
+    new_content = b"".join(
+        [blocks[0], os.urandom(1024), blocks[3], blocks[2], *blocks[4:], b"new tail!"]
+    )
+    local_path.write_bytes(new_content)
+    sent = transfer.upload(str(local_path), remote_path)
+    assert sent == (3 * 1024 + 9 if in_place else 1024 + 9)
+    ssh_file_ops.copy_file_from_remote(remote_path, str(tmp_path / "delta.copy"))
+    assert (tmp_path / "delta.copy").read_bytes() == new_content
+
+    # Shrunk file, whose last block is cut short
+    local_path.write_bytes(new_content[:2500])
+    assert transfer.upload(str(local_path), remote_path) == 2500 - 2 * 1024
+    ssh_file_ops.copy_file_from_remote(remote_path, str(tmp_path / "delta.copy"))
+    assert (tmp_path / "delta.copy").read_bytes() == new_content[:2500]
+
+
+def test_copy_file_delta(ssh_file_ops: SSHFileOperations, tmp_path):
+    local_path = tmp_path / "delta.bin"
+    local_path.write_bytes(os.urandom(3 * 1024 * 1024))
+    remote_path = "/tmp/py_ssh_delta.bin"
+    ssh_file_ops.copy_file_to_remote(str(local_path), remote_path, delta=True)
+
+    class Recorder(SSHObserver):
+        def on_event(self, event: SSHEvent) -> None:
+            if event.kind == "sftp_put":
+                sent.append(event.bytes_transferred)
+
+    sent = []
+    ssh_file_ops.observers.append(Recorder())
+    with open(local_path, "r+b") as f:
+        f.seek(100_000)
+        f.write(b"changed")
+    ssh_file_ops.copy_file_to_remote(
+        str(local_path), remote_path, delta=True, block_size=64 * 1024
+    )
+    # Only the block of 64 KiB holding the change is sent
+    assert sent == [64 * 1024]
+    ssh_file_ops.copy_file_from_remote(remote_path, str(tmp_path / "delta.copy"))
+    assert (tmp_path / "delta.copy").read_bytes() == local_path.read_bytes()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_upload_download_tree(ssh_file_ops: SSHFileOperations, tmp_path, compress: bool):
+    local_dir = tmp_path / "tree"
+    (local_dir / "bin").mkdir(parents=True)
+    (local_dir / "lib" / "pkg").mkdir(parents=True)
+    for i in range(50):
+        (local_dir / "lib" / "pkg" / f"module_{i}.py").write_text(f"value = {i}\n")
+    (local_dir / "bin" / "run").write_text("#!/bin/sh\n")
+    (local_dir / "bin" / "run").chmod(0o750)
+    (local_dir / "bin" / "python").symlink_to("/usr/bin/python3")
+    (local_dir / "empty").mkdir()
+    remote_dir = f"/tmp/py_ssh_tree_{uuid.uuid4().hex}"
+
+    ssh_file_ops.upload_tree(str(local_dir), remote_dir, compress=compress)
+    copy_dir = tmp_path / "copy"
+    ssh_file_ops.download_tree(remote_dir, str(copy_dir), compress=compress)
+
+    assert (copy_dir / "lib" / "pkg" / "module_49.py").read_text() == "value = 49\n"
+    assert (copy_dir / "bin" / "run").stat().st_mode & 0o777 == 0o750
+    assert os.readlink(copy_dir / "bin" / "python") == "/usr/bin/python3"
+    assert (copy_dir / "empty").is_dir()
+    assert sorted(p.relative_to(copy_dir) for p in copy_dir.rglob("*")) == sorted(
+        p.relative_to(local_dir) for p in local_dir.rglob("*")
+    )
+
+
+def test_tree_transfer_errors(ssh_file_ops: SSHFileOperations, tmp_path):
+    with pytest.raises(FileTransferError):
+        ssh_file_ops.upload_tree(str(tmp_path / "missing"), "/tmp/py_ssh_missing_tree")
+    with pytest.raises(FileTransferError):
+        ssh_file_ops.download_tree("/tmp/py_ssh_missing_tree", str(tmp_path / "copy"))
+
+
+@pytest.mark.parametrize(
+    "members",
+    [
+        [("../evil", tarfile.REGTYPE, "")],
+        [("/tmp/evil", tarfile.REGTYPE, "")],
+        [("link", tarfile.SYMTYPE, ".."), ("link/evil", tarfile.REGTYPE, "")],
+        [("link", tarfile.SYMTYPE, "."), ("link/../../evil", tarfile.REGTYPE, "")],
+        [("hard", tarfile.LNKTYPE, "../evil")],
+        [("fifo", tarfile.FIFOTYPE, "")],
+    ],
+)
+def test_tree_download_members_are_checked(tmp_path, members: list):
+    stream = io.BytesIO()
+    with tarfile.open(fileobj=stream, mode="w|") as tar:
+        for name, type, linkname in members:
+            member = tarfile.TarInfo(name)
+            member.type, member.linkname = type, linkname
+            tar.addfile(member, io.BytesIO(b""))
+    stream.seek(0)
+
+    destination = tmp_path / "copy"
+    destination.mkdir()
+    with tarfile.open(fileobj=stream, mode="r|") as tar:
+        with pytest.raises(FileTransferError):
+            tar.extractall(destination, members=_checked_members(tar, str(destination)))
+    assert not (tmp_path / "evil").exists()
+
+
+def test_tree_download_symlinks_may_point_anywhere(tmp_path):
+    stream = io.BytesIO()
+    with tarfile.open(fileobj=stream, mode="w|") as tar:
+        for name, linkname in (("bin/python", "/usr/bin/python3"), ("parent", "..")):
+            member = tarfile.TarInfo(name)
+            member.type, member.linkname = tarfile.SYMTYPE, linkname
+            tar.addfile(member)
+
+    destination = tmp_path / "venv"
+    # Twice, the second time over the links of the first
+    for _ in range(2):
+        stream.seek(0)
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            tar.extractall(destination, members=_checked_members(tar, str(destination)))
+    assert os.readlink(destination / "bin" / "python") == "/usr/bin/python3"
+
+
+def test_get_directory_structure(py_ssh: SSHFileOperations, tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "b" / "deep.txt").write_text("deep")
+    (tmp_path / "a" / "name with\nnewline").write_text("x")
+    (tmp_path / "top.txt").write_text("hello")
+    (tmp_path / "top.txt").chmod(0o640)
+    (tmp_path / "link").symlink_to("top.txt")
+
+    structure = py_ssh.get_directory_structure(f"{tmp_path}/")
+    assert [(d.dir, sorted(d.files)) for d in structure] == [
+        (str(tmp_path), ["top.txt"]),
+        (f"{tmp_path}/a", ["name with\nnewline"]),
+        (f"{tmp_path}/a/b", ["deep.txt"]),
+    ]
+    assert structure[0].info is None and structure[0].file_info is None
+
+    structure = py_ssh.get_directory_structure(str(tmp_path), metadata=True)
+    top = structure[0].file_info[0]
+    assert (top.name, top.size, top.mode) == ("top.txt", 5, 0o640)
+    assert top.mtime == pytest.approx((tmp_path / "top.txt").stat().st_mtime)
+    assert structure[0].info.name == str(tmp_path)
+
+    with pytest.raises(ListDirectoryContentError):
+        py_ssh.get_directory_structure(str(tmp_path / "missing"))
+
+
+def test_iter_directory_structure(py_ssh: SSHFileOperations, tmp_path):
+    for d in ("a/b/c", "a/.git", "d"):
+        (tmp_path / d).mkdir(parents=True)
+    for f in ("top.py", "a/one.py", "a/notes.txt", "a/b/two.py", "a/b/c/three.py", "a/.git/config"):
+        (tmp_path / f).write_text(f)
+
+    structure = list(py_ssh.iter_directory_structure(str(tmp_path)))
+    # Children first, each directory once complete
+    assert structure[-1].dir == str(tmp_path)
+    assert structure.index(next(d for d in structure if d.dir.endswith("/a/b"))) < (
+        structure.index(next(d for d in structure if d.dir.endswith("/a")))
+    )
+    expected = py_ssh.get_directory_structure(str(tmp_path))
+    assert sorted((d.dir, sorted(d.files)) for d in structure) == sorted(
+        (d.dir, sorted(d.files)) for d in expected
+    )
+
+    structure = py_ssh.iter_directory_structure(
+        str(tmp_path), max_depth=1, include="*.py", exclude=".git"
+    )
+    assert sorted((d.dir[len(str(tmp_path)) :], d.files) for d in structure) == [
+        ("", ["top.py"]),
+        ("/a", ["one.py"]),
+        ("/d", []),
+    ]
+
+    files = py_ssh.iter_directory_structure(
+        str(tmp_path), exclude=r".*/(b|\.git)", regex=True, flat=True, metadata=True
+    )
+    assert sorted((info.name[len(str(tmp_path)) :], info.size) for info in files) == [
+        ("/a/notes.txt", 11),
+        ("/a/one.py", 8),
+        ("/top.py", 6),
+    ]
+
+    # The root directory is at depth 0, "/" too
+    structure = list(py_ssh.iter_directory_structure("/", max_depth=0))
+    assert [d.dir for d in structure] == ["/"]
+    assert sorted(structure[0].files) == sorted(
+        entry.name for entry in os.scandir("/") if entry.is_file(follow_symlinks=False)
+    )
+
+    # Stopping early closes the remote command
+    files = py_ssh.iter_directory_structure("/usr", flat=True)
+    assert next(files).startswith("/usr/")
+    files.close()
+
+    with pytest.raises(ListDirectoryContentError):
+        list(py_ssh.iter_directory_structure(str(tmp_path / "missing")))
+
+
+def test_sync_directory(ssh_file_ops: SSHFileOperations, tmp_path):
+    local_dir = tmp_path / "local"
+    (local_dir / "conf" / "sites").mkdir(parents=True)
+    (local_dir / "conf" / "app.conf").write_text("port = 80\n")
+    (local_dir / "conf" / "sites" / "default").write_text("root /srv\n")
+    (local_dir / "name with spaces\nand newline").write_bytes(b"\0binary")
+    (local_dir / "back\\slash").write_text("escaped by sha256sum")
+    remote_dir = f"/tmp/py_ssh_sync_{uuid.uuid4().hex}"
+
+    plan = ssh_file_ops.sync_directory_to_remote(str(local_dir), remote_dir, dry_run=True)
+    assert plan.dirs_to_create == ["conf", "conf/sites"]
+    assert len(plan.files_to_create) == 4
+    assert not os.path.exists(remote_dir)
+
+    ssh_file_ops.sync_directory_to_remote(str(local_dir), remote_dir)
+    plan = ssh_file_ops.sync_directory_to_remote(str(local_dir), remote_dir)
+    assert not plan.has_changes and plan.unchanged == 4
+
+    # Same size and modification time, only a checksum finds the change
+    app_conf = local_dir / "conf" / "app.conf"
+    mtime = app_conf.stat().st_mtime
+    app_conf.write_text("port = 81\n")
+    os.utime(app_conf, (mtime, mtime))
+    assert not ssh_file_ops.sync_directory_to_remote(str(local_dir), remote_dir).has_changes
+    plan = ssh_file_ops.sync_directory_to_remote(str(local_dir), remote_dir, checksum=True)
+    assert plan.files_to_update == ["conf/app.conf"]
+
+    (local_dir / "conf" / "sites" / "default").unlink()
+    (local_dir / "conf" / "sites").rmdir()
+    plan = ssh_file_ops.sync_directory_to_remote(str(local_dir), remote_dir, delete=True)
+    assert plan.paths_to_delete == ["conf/sites"]
+
+    copy_dir = tmp_path / "copy"
+    ssh_file_ops.sync_directory_from_remote(remote_dir, str(copy_dir))
+    assert (copy_dir / "conf" / "app.conf").read_text() == "port = 81\n"
+    assert (copy_dir / "name with spaces\nand newline").read_bytes() == b"\0binary"
+    assert not (copy_dir / "conf" / "sites").exists()
+    assert not ssh_file_ops.sync_directory_from_remote(remote_dir, str(copy_dir)).has_changes
+    ssh_file_ops.run_cmd(f"rm -rf {remote_dir}")
+
+
+def test_sync_directory_missing_local_dir(ssh_file_ops: SSHFileOperations, tmp_path):
+    with pytest.raises(DirectorySyncError):
+        ssh_file_ops.sync_directory_to_remote(str(tmp_path / "missing"), "/tmp/missing")
+
+
+def test_sftp_reopened_after_reconnect(ssh_file_ops: SSHFileOperations):
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    local_path = os.path.join(current_dir, "data", "file_test1.txt")
+
+    ssh_file_ops._ssh.get_transport().close()
+    ssh_file_ops.copy_file_to_remote(local_path, "/tmp/file_test1.txt")
+    assert ssh_file_ops.reconnect_count == 1
+
+
+@pytest.mark.parametrize("run_as_root", [False, True])
+def test_open_remote(py_ssh: SSHFileOperations, tmp_path, run_as_root: bool):
+    data = os.urandom(300 * 1024 + 7)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+
+    with py_ssh.open_remote(str(path), buffer_size=64 * 1024, run_as_root=run_as_root) as f:
+        assert f.read(10) == data[:10]
+        assert f.read() == data[10:]
+        f.seek(-100, os.SEEK_END)
+        assert f.read() == data[-100:]
+        assert f.read_range(1000, 50_000) == data[1000:51_000]
+        assert f.read_range(len(data) - 3, 10) == data[-3:]
+        assert f.tell() == len(data)
+        f.seek(len(data) + 100)
+        assert f.read() == b""
+
+    path.write_text("first\nsecond\nthird")
+    with py_ssh.open_remote(str(path), "r", run_as_root=run_as_root) as f:
+        assert list(f) == ["first\n", "second\n", "third"]
+
+    with pytest.raises(RemoteFileReadError):
+        py_ssh.open_remote(str(tmp_path / "missing"), run_as_root=run_as_root)
+    with pytest.raises(ValueError):
+        py_ssh.open_remote(str(path), "w")
+
+
+def test_open_remote_follow(py_ssh: SSHFileOperations, tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("old\n")
+
+    def append() -> None:
+        time.sleep(0.3)
+        with open(path, "a") as f:
+            f.write("new 1\nnew 2\n")
+
+    writer = threading.Thread(target=append)
+    with py_ssh.open_remote(str(path), "r", follow=True, poll_interval=0.05) as f:
+        f.seek(0, os.SEEK_END)
+        writer.start()
+        assert f.readline() == "new 1\n"
+        assert f.readline() == "new 2\n"
+    writer.join()
+
+
+def test_open_remote_follow_past_end_and_truncation(py_ssh: SSHFileOperations, tmp_path):
+    path = tmp_path / "app.log"
+    path.write_bytes(b"0123456789")
+
+    def write(data: bytes, mode: str) -> None:
+        time.sleep(0.3)
+        with open(path, mode) as f:
+            f.write(data)
+
+    # Reading past the end waits for the data there, instead of restarting from the start
+    writer = threading.Thread(target=write, args=(b"abcdefghijklmnopqrst", "ab"))
+    with py_ssh.open_remote(str(path), follow=True, poll_interval=0.05) as f:
+        f.seek(20)
+        writer.start()
+        assert f.read1(5) == b"klmno"
+    writer.join()
+
+    # A file getting smaller was truncated, so it's read from its start
+    writer = threading.Thread(target=write, args=(b"rotated", "wb"))
+    with py_ssh.open_remote(str(path), follow=True, poll_interval=0.05) as f:
+        f.seek(0, os.SEEK_END)
+        writer.start()
+        assert f.read1(7) == b"rotated"
+    writer.join()
+
+
 def test_get_file_content(ssh_file_ops: SSHFileOperations):
 
     filepath = "/tmp/file_test1.txt"
@@ -0,0 +1,49 @@
+from py_secure_shell_automator import CmdResponse, FleetExecutor, run_cmd_many
+from py_secure_shell_automator.fleet.exceptions import FleetTimeoutError
+from . import *
+
+
+def _fleet() -> FleetExecutor:
+    return FleetExecutor(
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        max_workers=4,
+    )
+
+
+def test_run_cmd_many():
+    hosts = [PYSECURE_SHELL_AUTOMATOR_HOST] * 3
+    results = list(
+        run_cmd_many(
+            hosts,
+            cmd="echo Hello, World!",
+            username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+            password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+            port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        )
+    )
+    assert len(results) == 3
+    for host, result in results:
+        assert host == PYSECURE_SHELL_AUTOMATOR_HOST
+        assert isinstance(result, CmdResponse)
+        assert result.out == "Hello, World!"
+
+
+def test_errors_are_yielded():
+    results = list(_fleet().run_cmd([PYSECURE_SHELL_AUTOMATOR_HOST], cmd="exit 3"))
+    assert isinstance(results[0][1], Exception)
+
+
+def test_host_timeout():
+    results = list(
+        _fleet().run_cmd([PYSECURE_SHELL_AUTOMATOR_HOST], cmd="sleep 5", host_timeout=1)
+    )
+    assert isinstance(results[0][1], FleetTimeoutError)
+
+
+def test_global_timeout():
+    hosts = [PYSECURE_SHELL_AUTOMATOR_HOST] * 2
+    results = list(_fleet().run_cmd(hosts, cmd="sleep 5", timeout=1))
+    assert len(results) == 2
+    assert all(isinstance(result, FleetTimeoutError) for _, result in results)
@@ -0,0 +1,62 @@
+import json
+
+from py_secure_shell_automator import PySecureShellAutomator, SSHEvent
+from py_secure_shell_automator.base_ssh import SSHObserver
+from py_secure_shell_automator.metrics import MetricsCollector
+from . import *
+
+
+class _Recorder(SSHObserver):
+    def __init__(self) -> None:
+        self.events: list[SSHEvent] = []
+
+    def on_event(self, event: SSHEvent) -> None:
+        self.events.append(event)
+
+
+def _observed(*observers: SSHObserver) -> PySecureShellAutomator:
+    return PySecureShellAutomator(
+        host=PYSECURE_SHELL_AUTOMATOR_HOST,
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        observers=list(observers),
+    )
+
+
+def test_cmd_response_timing(py_ssh: PySecureShellAutomator):
+    cmd_response = py_ssh.run_cmd("echo Hello, World!")
+    assert 0 < cmd_response.channel_open_time <= cmd_response.time_to_first_byte
+    assert cmd_response.time_to_first_byte <= cmd_response.time_to_exit
+    assert cmd_response.bytes_received >= len("Hello, World!")
+
+
+def test_observer_events():
+    recorder = _Recorder()
+    py_ssh = _observed(recorder)
+    py_ssh.get_file_content("/etc/hostname")
+    try:
+        py_ssh.run_cmd("inexistent command")
+    except Exception:
+        pass
+
+    connect, cmd, failed = recorder.events
+    assert connect.kind == "connect" and connect.is_successful
+    assert cmd.kind == "run_cmd" and cmd.operation == "get_file_content"
+    assert cmd.cmd_response.ext_code == 0
+    assert failed.operation == "run_cmd" and not failed.is_successful
+
+
+def test_metrics_collector(tmp_path):
+    metrics = MetricsCollector()
+    py_ssh = _observed(metrics)
+    py_ssh.get_file_content("/etc/hostname")
+
+    path = tmp_path / "py_ssh.prom"
+    metrics.export(path=str(path))
+    text = path.read_text()
+    assert 'operation="get_file_content"' in text
+    assert "py_ssh_operation_duration_seconds_count" in text
+
+    series = json.loads(metrics.to_json())
+    assert {s["kind"] for s in series} == {"connect", "run_cmd"}
@@ -0,0 +1,63 @@
+import os
+import threading
+
+import pytest
+from py_secure_shell_automator import PySecureShellAutomator
+from py_secure_shell_automator.profiling import OperationProfiler
+from . import *
+
+
+def test_profiler_outermost_calls(py_ssh: PySecureShellAutomator, tmp_path):
+    original = PySecureShellAutomator.run_cmd
+    output = tmp_path / "profile.txt"
+    with OperationProfiler(output=str(output)) as profiler:
+        py_ssh.get_file_content("/etc/hostname")
+        py_ssh.run_cmd("echo Hello, World!")
+
+    get_file_content = profiler.methods["get_file_content"]
+    run_cmd = profiler.methods["run_cmd"]
+    assert get_file_content.calls == get_file_content.profiled_calls == 1
+    # The nested call of get_file_content is counted, but only the direct one is profiled
+    assert run_cmd.calls == 2
+    assert run_cmd.profiled_calls == 1
+    assert get_file_content.cumulative_time >= get_file_content.max_time > 0
+    assert get_file_content.peak_memory > 0
+
+    summary = output.read_text()
+    assert "=== get_file_content ===" in summary
+    assert "=== run_cmd ===" in summary
+
+    profiler.dump_stats(str(tmp_path / "profiles"))
+    assert os.path.exists(tmp_path / "profiles" / "run_cmd.prof")
+
+    # The methods are restored, and inherited ones exposed again
+    assert PySecureShellAutomator.run_cmd is original
+    assert "run_cmd" not in PySecureShellAutomator.__dict__
+
+
+def test_single_active_profiler():
+    with OperationProfiler():
+        with pytest.raises(RuntimeError):
+            OperationProfiler().start()
+
+
+def test_profiler_overlapping_calls(py_ssh: PySecureShellAutomator):
+    barrier = threading.Barrier(2)
+
+    def sleep():
+        barrier.wait()
+        py_ssh.run_cmd("sleep 0.5")
+
+    with OperationProfiler(memory=False) as profiler:
+        threads = [threading.Thread(target=sleep) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    run_cmd = profiler.methods["run_cmd"]
+    assert run_cmd.calls == 2
+    # The call overlapping with the profiled one is only timed
+    assert run_cmd.profiled_calls == 1
+    assert run_cmd.cumulative_time >= 1
+    assert "=== run_cmd ===" in profiler.summary()
@@ -0,0 +1,69 @@
+import socket
+
+import pytest
+
+from py_secure_shell_automator import PySecureShellAutomator
+from py_secure_shell_automator.base_ssh import (
+    TRANSPORT_PROFILES,
+    TransportProfile,
+    calibrate_transport_profiles,
+)
+from . import *
+
+
+def _connect(transport_profile) -> PySecureShellAutomator:
+    return PySecureShellAutomator(
+        host=PYSECURE_SHELL_AUTOMATOR_HOST,
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        transport_profile=transport_profile,
+    )
+
+
+@pytest.mark.parametrize("name", list(TRANSPORT_PROFILES))
+def test_transport_profiles(name):
+    py_ssh = _connect(name)
+    try:
+        assert py_ssh.run_cmd("echo Hello, World!").out == "Hello, World!"
+        transport = py_ssh._client.get_transport()
+        assert transport.sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        if name == "lan-bulk":
+            assert transport.local_cipher == "aes128-gcm@openssh.com"
+            assert transport.default_window_size == 16 * 1024 * 1024
+    finally:
+        py_ssh.close()
+
+
+def test_custom_transport_profile():
+    # Unsupported algorithms are ignored, the next preferred one is negotiated
+    profile = TransportProfile(
+        "custom", compress=True, ciphers=("chacha20-poly1305@openssh.com", "aes256-ctr")
+    )
+    py_ssh = _connect(profile)
+    try:
+        assert py_ssh.run_cmd("seq 1 3").out == "1\r\n2\r\n3"
+        assert py_ssh._client.get_transport().local_cipher == "aes256-ctr"
+    finally:
+        py_ssh.close()
+
+
+def test_unknown_transport_profile():
+    with pytest.raises(ValueError):
+        _connect("unknown")
+
+
+def test_calibrate_transport_profiles():
+    results = calibrate_transport_profiles(
+        host=PYSECURE_SHELL_AUTOMATOR_HOST,
+        username=PYSECURE_SHELL_AUTOMATOR_USERNAME,
+        password=PYSECURE_SHELL_AUTOMATOR_PASSWORD,
+        port=PYSECURE_SHELL_AUTOMATOR_PORT,
+        profiles=["default", "low-latency"],
+        workload="commands",
+        payload=b"x" * 100000,
+        cmd_samples=3,
+    )
+    assert {result.profile for result in results} == {"default", "low-latency"}
+    assert results[0].cmd_latency <= results[1].cmd_latency
+    assert all(result.upload_throughput > 0 for result in results)